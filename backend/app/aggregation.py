@@ -0,0 +1,275 @@
+"""
+Rank aggregation over Stage 2 reviews
+
+Reviews are turned into a rank matrix (reviewers x answers, NaN where a
+reviewer did not rank an answer) and a pairwise preference matrix, from which
+every method is computed with array operations:
+
+- Borda: mean normalized points, so partial rankings from round-robin or
+  tournament reviews count as much as full ones
+- Copeland: pairwise majority wins minus losses
+- Kemeny: the order that agrees with the most pairwise preferences; exact for
+  small councils, insertion local search from the Copeland order otherwise
+- Bradley-Terry: strengths fitted by Newton's method on the log-likelihood
+- Agreement: mean pairwise Kendall tau between reviewers
+"""
+
+import itertools
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models import AggregateScore, LLMResponse, RankAggregate, ReviewResponse
+
+# Councils up to this size get an exact Kemeny order (7! = 5040 permutations)
+KEMENY_EXACT_MAX = 7
+
+# Pseudo-comparisons added between every pair so Bradley-Terry converges
+# when an answer won or lost every comparison, or the graph is disconnected
+BT_PRIOR = 0.1
+BT_MAX_ITERATIONS = 50
+BT_TOLERANCE = 1e-6
+
+
+def rank_matrix(reviews: List[ReviewResponse], ids: List[str]) -> np.ndarray:
+    """
+    Reviewers x answers matrix of the ranks each reviewer gave
+    
+    Args:
+        reviews: Parsed Stage 2 reviews
+        ids: Anonymous ids of the answers, one column each
+    
+    Returns:
+        Float array, NaN where a reviewer did not rank an answer
+    """
+    column = {response_id: idx for idx, response_id in enumerate(ids)}
+    matrix = np.full((len(reviews), len(ids)), np.nan)
+    for row, review in enumerate(reviews):
+        for entry in review.rankings:
+            idx = column.get(entry.response_id)
+            if idx is not None:
+                matrix[row, idx] = entry.rank
+    return matrix
+
+
+def pairwise_wins(ranks: np.ndarray) -> np.ndarray:
+    """
+    Answers x answers matrix: wins[i, j] = reviewers ranking i above j
+    
+    Comparisons with NaN are False, so only pairs a reviewer ranked count.
+    """
+    with np.errstate(invalid="ignore"):
+        return (ranks[:, :, None] < ranks[:, None, :]).sum(axis=0).astype(float)
+
+
+def positions(ranks: np.ndarray) -> np.ndarray:
+    """
+    1-based position of each answer within each review
+    
+    Raw ranks may have gaps (a reviewer ranking 1, 2, 4); positions count the
+    answers ranked strictly better, so ties share a position.
+    
+    Returns:
+        Float array shaped like ranks, NaN where an answer was not ranked
+    """
+    with np.errstate(invalid="ignore"):
+        better = (ranks[:, None, :] < ranks[:, :, None]).sum(axis=2).astype(float)
+    better[np.isnan(ranks)] = np.nan
+    return better + 1
+
+
+def borda_scores(placed: np.ndarray) -> np.ndarray:
+    """Mean Borda points per answer, normalized to [0, 1] within each review"""
+    sizes = (~np.isnan(placed)).sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore"):
+        points = np.where(sizes > 1, (sizes - placed) / np.maximum(sizes - 1, 1), np.nan)
+    counts = (~np.isnan(points)).sum(axis=0)
+    return np.divide(np.nansum(points, axis=0), counts, out=np.zeros(placed.shape[1]), where=counts > 0)
+
+
+def copeland_scores(wins: np.ndarray) -> np.ndarray:
+    """Pairwise majority wins minus losses per answer"""
+    return np.sign(wins - wins.T).sum(axis=1)
+
+
+@lru_cache(maxsize=KEMENY_EXACT_MAX + 1)
+def _permutations(n: int) -> np.ndarray:
+    return np.array(list(itertools.permutations(range(n))), dtype=np.intp)
+
+
+def kemeny_order(wins: np.ndarray, initial: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Order of answers that agrees with the most pairwise preferences
+    
+    Exact by scoring every permutation up to KEMENY_EXACT_MAX answers. Larger
+    councils start from initial (best first) and repeatedly move single answers
+    to the position that gains the most agreement until nothing improves.
+    
+    Args:
+        wins: Pairwise wins matrix
+        initial: Starting order for the local search
+    
+    Returns:
+        Answer indices, best first
+    """
+    n = wins.shape[0]
+    if n <= 1:
+        return np.arange(n)
+    
+    if n <= KEMENY_EXACT_MAX:
+        perms = _permutations(n)
+        first, second = np.triu_indices(n, k=1)
+        agreement = wins[perms[:, first], perms[:, second]].sum(axis=1)
+        return perms[int(np.argmax(agreement))]
+    
+    order = list(initial) if initial is not None else list(range(n))
+    margin = wins - wins.T
+    improved = True
+    while improved:
+        improved = False
+        for item in list(order):
+            rest = [other for other in order if other != item]
+            # Gain of placing item at each slot: it beats everything after it
+            before = margin[item, rest]
+            gains = np.concatenate(([0.0], np.cumsum(-before)))
+            gains = gains + before.sum()
+            best = int(np.argmax(gains))
+            current = order.index(item)
+            if gains[best] > gains[current] + 1e-12:
+                rest.insert(best, item)
+                order = rest
+                improved = True
+    return np.array(order, dtype=np.intp)
+
+
+def bradley_terry(wins: np.ndarray) -> np.ndarray:
+    """
+    Bradley-Terry strengths by Newton's method on the log-likelihood
+    
+    The likelihood is concave in log-strengths, so a few Newton steps
+    converge where the classic MM iteration needs dozens. The Hessian is a
+    weighted graph Laplacian; adding the all-ones matrix fixes the scale.
+    
+    Args:
+        wins: Pairwise wins matrix
+    
+    Returns:
+        Strength per answer, summing to 1; P(i beats j) = p_i / (p_i + p_j)
+    """
+    n = wins.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    wins = wins + BT_PRIOR * (1 - np.eye(n))
+    games = wins + wins.T
+    total_wins = wins.sum(axis=1)
+    fix_scale = np.ones((n, n)) / n
+    
+    theta = np.zeros(n)
+    for _ in range(BT_MAX_ITERATIONS):
+        prob = 1.0 / (1.0 + np.exp(theta[None, :] - theta[:, None]))
+        gradient = total_wins - (games * prob).sum(axis=1)
+        weights = games * prob * prob.T
+        laplacian = np.diag(weights.sum(axis=1)) - weights
+        step = np.linalg.solve(laplacian + fix_scale, gradient)
+        theta += step
+        if np.abs(step).max() < BT_TOLERANCE:
+            break
+    
+    strength = np.exp(theta - theta.max())
+    return strength / strength.sum()
+
+
+def kendall_agreement(ranks: np.ndarray) -> Optional[float]:
+    """
+    Mean Kendall tau over reviewer pairs that ranked two or more common answers
+    
+    Returns:
+        Agreement in [-1, 1], or None if no two reviews overlap
+    """
+    if ranks.shape[0] < 2:
+        return None
+    signs = np.nan_to_num(np.sign(ranks[:, None, :] - ranks[:, :, None]))
+    upper = np.triu(np.ones(signs.shape[1:], dtype=bool), k=1)
+    signs = signs[:, upper]
+    concordance = signs @ signs.T
+    compared = np.abs(signs) @ np.abs(signs).T
+    pairs = np.triu(compared > 0, k=1)
+    if not pairs.any():
+        return None
+    return float((concordance[pairs] / compared[pairs]).mean())
+
+
+def aggregate_rankings(reviews: List[ReviewResponse], responses: List[LLMResponse]) -> Optional[RankAggregate]:
+    """
+    Aggregate the Stage 2 reviews of the successful Stage 1 answers
+    
+    Args:
+        reviews: Parsed Stage 2 reviews
+        responses: Stage 1 responses; only successful ones are scored
+    
+    Returns:
+        RankAggregate with answers in consensus order, or None without reviews
+    """
+    candidates = [resp for resp in responses if resp.is_ok]
+    if not reviews or not candidates:
+        return None
+    
+    ids = [resp.model_id for resp in candidates]
+    ranks = rank_matrix(reviews, ids)
+    placed = positions(ranks)
+    wins = pairwise_wins(ranks)
+    borda = borda_scores(placed)
+    copeland = copeland_scores(wins)
+    strength = bradley_terry(wins)
+    
+    # Copeland order with Borda breaking ties seeds the Kemeny search
+    initial = np.lexsort((-borda, -copeland))
+    order = kemeny_order(wins, initial)
+    position = np.empty(len(ids), dtype=np.intp)
+    position[order] = np.arange(1, len(ids) + 1)
+    
+    counts = (~np.isnan(ranks)).sum(axis=0)
+    mean_rank = np.divide(np.nansum(placed, axis=0), counts, out=np.full(len(ids), np.nan), where=counts > 0)
+    
+    scores = [
+        AggregateScore(
+            response_id=ids[idx],
+            model_name=candidates[idx].model_name,
+            consensus_rank=int(position[idx]),
+            borda=round(float(borda[idx]), 4),
+            copeland=int(copeland[idx]),
+            bradley_terry=round(float(strength[idx]), 4),
+            mean_rank=round(float(mean_rank[idx]), 3) if counts[idx] else None,
+            reviews=int(counts[idx])
+        )
+        for idx in order
+    ]
+    agreement = kendall_agreement(ranks)
+    return RankAggregate(
+        scores=scores,
+        agreement=round(agreement, 4) if agreement is not None else None,
+        reviewers=len(reviews)
+    )
+
+
+def format_scoreboard(aggregate: Dict) -> str:
+    """
+    Compact text scoreboard of an aggregate, for the chairman prompt
+    
+    Args:
+        aggregate: RankAggregate.to_dict() output
+    
+    Returns:
+        One line per answer in consensus order, plus the agreement
+    """
+    lines = [
+        f"#{s['consensus_rank']} Response {s['response_id']}: Borda {s['borda']:.2f}, "
+        f"pairwise {s['copeland']:+d}, strength {s['bradley_terry']:.2f}, "
+        f"ranked by {s['reviews']} reviewer(s)"
+        for s in aggregate["scores"]
+    ]
+    if aggregate["agreement"] is not None:
+        lines.append(f"Reviewer agreement (Kendall tau, 1 = unanimous): {aggregate['agreement']:.2f}")
+    return "\n".join(lines)
+
@@ -0,0 +1,124 @@
+"""
+Stage 1 agreement detection for adaptive early exit
+
+Easy questions often get essentially the same answer from every member, and
+reviewing and synthesizing those answers buys little. Answers are compared
+with the hashed n-gram embedding used by the semantic cache. The cosine
+similarity of a pair is scaled by how well their key terms (numbers and
+capitalized names) overlap, because "Paris" and "Berlin" answers share most
+of their wording. The council agrees when every pair of successful answers
+is at or above the threshold.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models import LLMResponse
+from app.semantic_cache import HashedNGramVectorizer, key_numbers
+
+# Larger than the query cache's embedding: answers are much longer than queries
+EMBEDDING_DIM = 1024
+
+_NAME = re.compile(r"\b[A-Z][a-zA-Z]+\b")
+_NAME_STOPWORDS = frozenset(
+    "A An And As At But By For From How However If In It Its No Not Of On Or So That The "
+    "Then There These They This Those To We What When Where Which While Who Why Yes You "
+    "I First Second Third Finally Also Note Here Answer Response".split()
+)
+
+_vectorizer = HashedNGramVectorizer(dim=EMBEDDING_DIM)
+
+
+def key_terms(text: str) -> frozenset:
+    """Numbers and capitalized names in text, normalized to lowercase"""
+    names = {name.lower() for name in _NAME.findall(text) if name not in _NAME_STOPWORDS}
+    return key_numbers(text) | names
+
+
+def pair_similarity(vector_a: np.ndarray, terms_a: frozenset, vector_b: np.ndarray, terms_b: frozenset) -> float:
+    """
+    Similarity of two answers in [0, 1]
+    
+    Cosine of their embeddings, scaled by the overlap coefficient of their key
+    terms when both have any (a short answer naming a subset of the facts in a
+    longer one still overlaps fully).
+    """
+    cosine = max(float(vector_a @ vector_b), 0.0)
+    if not terms_a or not terms_b:
+        return cosine
+    overlap = len(terms_a & terms_b) / min(len(terms_a), len(terms_b))
+    return cosine * overlap
+
+
+def text_similarity(text_a: str, text_b: str) -> float:
+    """pair_similarity of two texts embedded on the spot"""
+    return pair_similarity(_vectorizer.transform(text_a), key_terms(text_a), _vectorizer.transform(text_b), key_terms(text_b))
+
+
+class AgreementDetector:
+    """
+    Tracks whether the Stage 1 answers settled so far all agree
+    
+    Answers are embedded once as they arrive. The score is the minimum
+    pairwise similarity, so it can only drop as answers come in. Once two
+    answers disagree the detector stops holding back reviews for the rest
+    of the run.
+    """
+    
+    def __init__(self, threshold: float, min_answers: int = 2):
+        self.threshold = threshold
+        self.min_answers = max(2, min_answers)
+        self.score: Optional[float] = None
+        self.possible = True
+        self._embedded: Dict[str, tuple] = {}
+        self._similarity: Dict[str, float] = {}
+    
+    def update(self, responses: List[LLMResponse]) -> bool:
+        """
+        Add newly settled answers
+        
+        Args:
+            responses: Stage 1 responses settled so far, in any order
+        
+        Returns:
+            bool: True while the successful answers still agree (so reviews
+            should wait), False once they do not
+        """
+        if not self.possible:
+            return False
+        
+        for resp in responses:
+            if not resp.is_ok or resp.model_name in self._embedded:
+                continue
+            vector, terms = _vectorizer.transform(resp.response), key_terms(resp.response)
+            for other, (other_vector, other_terms) in self._embedded.items():
+                similarity = pair_similarity(vector, terms, other_vector, other_terms)
+                self._similarity[resp.model_name] = self._similarity.get(resp.model_name, 0.0) + similarity
+                self._similarity[other] = self._similarity.get(other, 0.0) + similarity
+                self.score = similarity if self.score is None else min(self.score, similarity)
+            self._embedded[resp.model_name] = (vector, terms)
+        
+        if self.score is not None and self.score < self.threshold:
+            self.possible = False
+        return self.possible
+    
+    @property
+    def agreed(self) -> bool:
+        """Whether enough answers arrived and all of them agree"""
+        return self.possible and self.score is not None and len(self._embedded) >= self.min_answers
+    
+    def most_representative(self) -> Optional[str]:
+        """Model whose answer is most similar to all the others (the medoid)"""
+        if not self._similarity:
+            return next(iter(self._embedded), None)
+        return max(self._similarity, key=self._similarity.get)
+
+
+def stage_1_agreement(responses: List[LLMResponse]) -> Optional[float]:
+    """Minimum pairwise similarity of the successful answers, None below two"""
+    detector = AgreementDetector(threshold=0.0)
+    detector.update(responses)
+    return detector.score
+
@@ -0,0 +1,272 @@
+"""
+Batch runner for offline evaluations
+
+Usage:
+    python -m app.batch questions.jsonl [--output results.jsonl] [--concurrency 8]
+
+Each input line is either a JSON string or an object with a "query" field and
+an optional "id". Results are appended to the output JSONL file as soon as each
+run finishes, so an interrupted batch resumes where it stopped when restarted
+with the same output file.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from app.config import settings
+from app.llm_client import llm_client
+from app.pipeline import pipeline
+from app.rate_limiter import rate_limiter
+from app.usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    """One question in a batch"""
+    id: str
+    query: str
+
+
+@dataclass
+class BatchReport:
+    """Throughput and latency summary for a batch run"""
+    completed: int = 0
+    failed: int = 0
+    wall_time: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    stage_latencies: Dict[str, List[float]] = field(default_factory=dict)
+    
+    def record(self, result: Dict[str, Any]):
+        """Add the timings of one successful run"""
+        self.completed += 1
+        self.latencies.append(result["processing_time"])
+        for stage, seconds in result.get("stage_timings", {}).items():
+            self.stage_latencies.setdefault(stage, []).append(seconds)
+    
+    def to_dict(self) -> dict:
+        def summary(values: List[float]) -> Dict[str, float]:
+            if not values:
+                return {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+            return {
+                "p50": round(float(np.percentile(values, 50)), 3),
+                "p95": round(float(np.percentile(values, 95)), 3),
+                "mean": round(float(np.mean(values)), 3)
+            }
+        
+        minutes = self.wall_time / 60
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "wall_time": round(self.wall_time, 2),
+            "queries_per_minute": round(self.completed / minutes, 2) if minutes else 0.0,
+            "latency": summary(self.latencies),
+            "stage_latency": {
+                stage: summary(values)
+                for stage, values in sorted(self.stage_latencies.items())
+            }
+        }
+
+
+def load_questions(path: str) -> List[BatchItem]:
+    """
+    Read questions from a JSONL file
+    
+    Args:
+        path: File with one JSON string or {"id", "query"} object per line
+    
+    Returns:
+        List of BatchItem objects; ids default to the line number
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if isinstance(data, str):
+                data = {"query": data}
+            items.append(BatchItem(
+                id=str(data.get("id", line_no)),
+                query=data["query"]
+            ))
+    return items
+
+
+def completed_ids(path: str) -> Set[str]:
+    """
+    Ids that already have a successful result in an output file
+    
+    Args:
+        path: Output JSONL file of a previous (possibly interrupted) run
+    
+    Returns:
+        Set of ids to skip when resuming
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+class BatchRunner:
+    """Runs many council queries under a global concurrency limit"""
+    
+    def __init__(
+        self,
+        concurrency: int = settings.batch_concurrency,
+        bypass_cache: bool = False,
+        tenant: Optional[str] = None
+    ):
+        self.concurrency = max(1, concurrency)
+        self.bypass_cache = bypass_cache
+        # Each query is admitted against this tenant's token budget; None is unmetered
+        self.tenant = tenant
+    
+    async def run(
+        self,
+        items: List[BatchItem],
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> BatchReport:
+        """
+        Run the full pipeline for every item
+        
+        Args:
+            items: Questions to run
+            on_result: Called with each result record as soon as it is ready
+        
+        Returns:
+            BatchReport for this run
+        """
+        report = BatchReport()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start_time = time.time()
+        
+        async def run_one(item: BatchItem):
+            async with semaphore:
+                try:
+                    budget = await usage_ledger.admit(self.tenant) if self.tenant is not None else None
+                    result = await pipeline.run_full_pipeline(
+                        item.query,
+                        bypass_cache=self.bypass_cache,
+                        budget=budget
+                    )
+                    record = {"id": item.id, "query": item.query, "status": "ok", "result": result}
+                    report.record(result)
+                except Exception as e:
+                    logger.error(f"Batch item {item.id} failed: {str(e)}")
+                    record = {"id": item.id, "query": item.query, "status": "error", "error": str(e)}
+                    report.failed += 1
+            
+            if on_result is not None:
+                on_result(record)
+        
+        await asyncio.gather(*(run_one(item) for item in items))
+        report.wall_time = time.time() - start_time
+        return report
+
+
+async def run_batch_file(
+    input_path: str,
+    output_path: str,
+    concurrency: int,
+    resume: bool = True,
+    bypass_cache: bool = False
+) -> BatchReport:
+    """
+    Run a JSONL file of questions and append results to output_path
+    
+    Args:
+        input_path: Questions file
+        output_path: Results file, appended to line by line
+        concurrency: Maximum pipelines running at once
+        resume: Skip ids that already succeeded in output_path
+        bypass_cache: Skip cached completions
+    
+    Returns:
+        BatchReport for the questions run in this invocation
+    """
+    items = load_questions(input_path)
+    if resume:
+        done = completed_ids(output_path)
+        if done:
+            logger.info(f"Resuming: {len(done)} of {len(items)} questions already done")
+        items = [item for item in items if item.id not in done]
+    else:
+        open(output_path, "w").close()
+    
+    logger.info(f"Running {len(items)} questions with concurrency {concurrency}")
+    
+    with open(output_path, "a", encoding="utf-8") as out:
+        def write(record: Dict[str, Any]):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+        
+        await llm_client.start()
+        try:
+            runner = BatchRunner(concurrency=concurrency, bypass_cache=bypass_cache)
+            return await runner.run(items, on_result=write)
+        finally:
+            await llm_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of LLM Council queries")
+    parser.add_argument("input", help="JSONL file of questions")
+    parser.add_argument("--output", help="Results JSONL file (default: <input>.results.jsonl)")
+    parser.add_argument("--report", help="Also write the throughput report to this JSON file")
+    parser.add_argument("--concurrency", type=int, default=settings.batch_concurrency,
+                        help="Maximum council runs in flight")
+    parser.add_argument("--model-concurrency", type=int, default=settings.model_max_concurrency,
+                        help="Maximum in-flight calls per model (0 = unlimited)")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of resuming")
+    parser.add_argument("--bypass-cache", action="store_true", help="Ignore cached completions")
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    if not settings.hf_token:
+        parser.error("HuggingFace token not configured. Please set HF_TOKEN environment variable.")
+    
+    rate_limiter.set_default_concurrency(args.model_concurrency)
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    
+    report = asyncio.run(run_batch_file(
+        args.input,
+        output_path,
+        concurrency=args.concurrency,
+        resume=not args.no_resume,
+        bypass_cache=args.bypass_cache
+    ))
+    
+    summary = json.dumps(report.to_dict(), indent=2)
+    print(summary)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Interface for persistent cache storage behind the in-memory LRU"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored value, or None if missing or expired"""
+    
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float):
+        """Store a value that expires after ttl seconds"""
+    
+    @abstractmethod
+    def clear(self):
+        """Remove every entry"""
+    
+    def close(self):
+        """Release any resources held by the backend"""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Persistent cache stored in a local SQLite file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at)")
+        self._conn.commit()
+        self.prune()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+    
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            self._conn.commit()
+    
+    def prune(self):
+        """Delete expired entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LRUCache:
+    """In-memory LRU cache with a per-entry time to live"""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._entries[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for LLM completions
+    
+    Entries are keyed by a hash of the model, messages and sampling
+    parameters, so identical calls are served without an upstream request
+    regardless of which stage or run issued them.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        backend: Optional[CacheBackend] = None,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.memory = LRUCache(max_entries, ttl)
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.backend_hits = 0
+    
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """
+        Build the cache key for a completion request
+        
+        Args:
+            model: Model identifier
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+        
+        Returns:
+            str: SHA-256 hex digest of the canonical request
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a completion, checking memory first and then the backend
+        
+        Args:
+            key: Key from make_key
+        
+        Returns:
+            The cached completion, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            self.memory_hits += 1
+            return value
+        
+        if self.backend is not None:
+            try:
+                value = await asyncio.to_thread(self.backend.get, key)
+            except Exception as e:
+                logger.error(f"Cache backend read failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self.hits += 1
+                self.backend_hits += 1
+                return value
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: str):
+        """
+        Store a completion in memory and in the backend
+        
+        Args:
+            key: Key from make_key
+            value: Completion content
+        """
+        if not self.enabled:
+            return
+        
+        self.memory.set(key, value)
+        if self.backend is not None:
+            try:
+                await asyncio.to_thread(self.backend.set, key, value, self.ttl)
+            except Exception as e:
+                logger.error(f"Cache backend write failed: {str(e)}")
+    
+    def clear(self):
+        """Drop every cached completion"""
+        self.memory.clear()
+        if self.backend is not None:
+            self.backend.clear()
+    
+    def close(self):
+        """Close the persistent backend"""
+        if self.backend is not None:
+            self.backend.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "backend_hits": self.backend_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory)
+        }
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    """Build the persistent backend selected by settings.cache_backend"""
+    if not settings.cache_enabled or settings.cache_backend == "none":
+        return None
+    if settings.cache_backend == "sqlite":
+        return SQLiteCacheBackend(settings.cache_sqlite_path)
+    raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
+
+
+# Global cache instance
+response_cache = ResponseCache(
+    max_entries=settings.cache_max_entries,
+    ttl=settings.cache_ttl_seconds,
+    backend=create_cache_backend(),
+    enabled=settings.cache_enabled
+)
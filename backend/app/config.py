@@ -21,11 +21,189 @@ class Settings:
         # CORS
         self.cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173")
         
+        # Response compression: brotli (if installed) or gzip, negotiated from
+        # Accept-Encoding, for complete bodies of at least COMPRESSION_MIN_SIZE bytes
+        self.compression_enabled = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+        self.compression_min_size = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.compression_gzip_level = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+        self.compression_brotli_quality = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+        
         # LLM Models
         self.model_1 = os.getenv("MODEL_1", "openai/gpt-oss-safeguard-20b:groq")
         self.model_2 = os.getenv("MODEL_2", "moonshotai/Kimi-K2-Instruct-0905:groq")
         self.model_3 = os.getenv("MODEL_3", "meta-llama/Llama-3.3-70B-Instruct:groq")
         self.chairman_model = os.getenv("CHAIRMAN_MODEL", "meta-llama/Llama-3.3-70B-Instruct:groq")
+        # Comma-separated list of any size; overrides MODEL_1..MODEL_3 when set
+        self.council_models_override = os.getenv("COUNCIL_MODELS", "")
+        
+        # Stage 2 review topology: all_pairs | round_robin | judge | tournament.
+        # round_robin has each member review the next K members; judge and
+        # tournament use REVIEW_JUDGE_MODEL (default: the chairman)
+        self.review_topology = os.getenv("REVIEW_TOPOLOGY", "all_pairs")
+        self.review_round_robin_k = int(os.getenv("REVIEW_ROUND_ROBIN_K", "2"))
+        self.review_judge_model = os.getenv("REVIEW_JUDGE_MODEL", "")
+        # Ask reviewers for provider JSON mode (response_format=json_object);
+        # models whose provider rejects it fall back to plain prompting
+        self.review_json_mode = os.getenv("REVIEW_JSON_MODE", "true").lower() == "true"
+        
+        # Per-query routing: pick members and the chairman from
+        # ROUTING_CANDIDATES (default: the council plus the chairman) by query
+        # difficulty and live latency, error and cost statistics. Objective is
+        # latency | cost; SLOs of 0 are unbounded. MODEL_COSTS prices models
+        # in dollars per million tokens as JSON:
+        # {"model-name": {"prompt": 0.6, "completion": 2.5}}
+        self.routing_enabled = os.getenv("ROUTING_ENABLED", "false").lower() == "true"
+        self.routing_candidates = os.getenv("ROUTING_CANDIDATES", "")
+        self.routing_objective = os.getenv("ROUTING_OBJECTIVE", "latency")
+        self.routing_latency_slo = float(os.getenv("ROUTING_LATENCY_SLO", "0"))
+        self.routing_cost_slo = float(os.getenv("ROUTING_COST_SLO", "0"))
+        self.routing_simple_members = int(os.getenv("ROUTING_SIMPLE_MEMBERS", "2"))
+        self.routing_standard_members = int(os.getenv("ROUTING_STANDARD_MEMBERS", "3"))
+        self.routing_simple_score = float(os.getenv("ROUTING_SIMPLE_SCORE", "0.2"))
+        self.routing_hard_score = float(os.getenv("ROUTING_HARD_SCORE", "0.5"))
+        self.routing_max_error_rate = float(os.getenv("ROUTING_MAX_ERROR_RATE", "0.2"))
+        self.routing_min_samples = int(os.getenv("ROUTING_MIN_SAMPLES", "5"))
+        self.model_costs = os.getenv("MODEL_COSTS", "")
+        
+        # HTTP transport (shared connection pool for all upstream calls)
+        self.http2_enabled = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+        self.http_max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+        self.http_keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.llm_request_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+        
+        # Per-model rate limits shared by all requests (0 = unlimited).
+        # MODEL_LIMITS overrides them per model as JSON:
+        # {"model-name": {"rpm": 30, "tpm": 60000, "concurrency": 4}}
+        self.rate_limit_rpm = float(os.getenv("RATE_LIMIT_RPM", "0"))
+        self.rate_limit_tpm = float(os.getenv("RATE_LIMIT_TPM", "0"))
+        self.model_max_concurrency = int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))
+        self.model_limits = os.getenv("MODEL_LIMITS", "")
+        
+        # Retries, circuit breaking and hedged requests
+        self.llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.llm_backoff_base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+        self.llm_backoff_max = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+        self.circuit_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.circuit_reset_seconds = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        self.hedge_enabled = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_max_fraction = float(os.getenv("HEDGE_MAX_FRACTION", "0.1"))
+        
+        # Deadlines (seconds) for a single model call and for a whole fan-out stage
+        self.model_timeout = float(os.getenv("MODEL_TIMEOUT", "60"))
+        self.stage_1_timeout = float(os.getenv("STAGE_1_TIMEOUT", "75"))
+        self.stage_2_timeout = float(os.getenv("STAGE_2_TIMEOUT", "75"))
+        
+        # Stage 1/2 scheduling: start each review as soon as the answers it
+        # ranks are in, and optionally stop Stage 1 after a quorum of k
+        # successful answers (0 = wait for every member)
+        self.early_start_reviews = os.getenv("EARLY_START_REVIEWS", "true").lower() == "true"
+        self.stage_1_quorum = int(os.getenv("STAGE_1_QUORUM", "0"))
+        
+        # Adaptive early exit: when every successful Stage 1 answer is at least
+        # EARLY_EXIT_THRESHOLD similar to every other, skip the reviews
+        # (EARLY_EXIT_SKIP=review) or return the most representative answer
+        # without a chairman call (EARLY_EXIT_SKIP=all)
+        self.early_exit_enabled = os.getenv("EARLY_EXIT_ENABLED", "false").lower() == "true"
+        self.early_exit_threshold = float(os.getenv("EARLY_EXIT_THRESHOLD", "0.85"))
+        self.early_exit_skip = os.getenv("EARLY_EXIT_SKIP", "all")  # all | review
+        self.early_exit_min_answers = int(os.getenv("EARLY_EXIT_MIN_ANSWERS", "2"))
+        
+        # Speculative synthesis: the chairman drafts from the Stage 1 answers
+        # while the reviews run; the draft is kept when the answer it leans on
+        # is among the reviewers' top SPECULATIVE_ACCEPT_TOP, else revised
+        self.speculative_synthesis = os.getenv("SPECULATIVE_SYNTHESIS", "false").lower() == "true"
+        self.speculative_accept_top = int(os.getenv("SPECULATIVE_ACCEPT_TOP", "1"))
+        
+        # Token budgets for the answers embedded in review and chairman prompts.
+        # Answers over their share are compressed (summarize | truncate);
+        # a budget of 0 disables it for that prompt
+        self.prompt_budget_enabled = os.getenv("PROMPT_BUDGET_ENABLED", "true").lower() == "true"
+        self.prompt_budget_mode = os.getenv("PROMPT_BUDGET_MODE", "summarize")
+        self.review_prompt_token_budget = int(os.getenv("REVIEW_PROMPT_TOKEN_BUDGET", "3000"))
+        self.chairman_prompt_token_budget = int(os.getenv("CHAIRMAN_PROMPT_TOKEN_BUDGET", "4000"))
+        self.chairman_reasoning_token_budget = int(os.getenv("CHAIRMAN_REASONING_TOKEN_BUDGET", "1000"))
+        
+        # How Stage 2 reaches the chairman: "scoreboard" (aggregated ranks plus
+        # one reviewer note per answer) or "full" (every ranking and reasoning)
+        self.chairman_review_format = os.getenv("CHAIRMAN_REVIEW_FORMAT", "scoreboard")
+        
+        # Response cache (in-memory LRU in front of an optional persistent backend)
+        self.cache_enabled = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+        self.cache_ttl_seconds = float(os.getenv("CACHE_TTL_SECONDS", "86400"))
+        self.cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+        self.cache_backend = os.getenv("CACHE_BACKEND", "sqlite")  # sqlite | none
+        self.cache_sqlite_path = os.getenv("CACHE_SQLITE_PATH", "llm_cache.db")
+        
+        # Single-flight: identical council queries and model calls arriving
+        # while one is running share it instead of starting their own
+        self.single_flight_enabled = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+        
+        # Semantic cache for paraphrased queries (whole pipeline results).
+        # Reworded questions score around 0.6-0.9; different questions are
+        # kept apart by their query terms, not by the threshold
+        self.semantic_cache_enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+        self.semantic_cache_threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.6"))
+        self.semantic_cache_max_entries = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+        self.semantic_cache_dim = int(os.getenv("SEMANTIC_CACHE_DIM", "256"))
+        self.semantic_cache_ttl_seconds = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+        
+        # Run history: every result and raw model output in SQLite, written
+        # in batches off the request path
+        self.run_store_enabled = os.getenv("RUN_STORE_ENABLED", "true").lower() == "true"
+        self.run_store_path = os.getenv("RUN_STORE_PATH", "council_runs.db")
+        self.run_store_batch_size = int(os.getenv("RUN_STORE_BATCH_SIZE", "50"))
+        self.run_store_flush_interval = float(os.getenv("RUN_STORE_FLUSH_INTERVAL", "0.5"))
+        
+        # Conversations: follow-up questions carry the last
+        # CONVERSATION_RECENT_TURNS turns verbatim; once
+        # CONVERSATION_SUMMARY_BATCH more have piled up they are folded into a
+        # running summary in the background (0 = never fold, send every turn)
+        self.conversation_store_path = os.getenv("CONVERSATION_STORE_PATH", "council_conversations.db")
+        self.conversation_recent_turns = int(os.getenv("CONVERSATION_RECENT_TURNS", "4"))
+        self.conversation_summary_batch = int(os.getenv("CONVERSATION_SUMMARY_BATCH", "4"))
+        self.conversation_summary_model = os.getenv("CONVERSATION_SUMMARY_MODEL", "")
+        self.conversation_summary_tokens = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "400"))
+        
+        # Worker processes and the state they share. WORKERS > 1 needs a shared
+        # STATE_BACKEND (local | sqlite) so rate limits, in-flight deduplication
+        # and metrics span every worker; concurrency slots and in-flight claims
+        # are leased for STATE_LEASE_SECONDS in case a worker dies holding them
+        self.workers = int(os.getenv("WORKERS", "1"))
+        self.state_backend = os.getenv("STATE_BACKEND", "local")
+        self.state_sqlite_path = os.getenv("STATE_SQLITE_PATH", "council_state.db")
+        self.state_poll_interval = float(os.getenv("STATE_POLL_INTERVAL", "0.05"))
+        self.state_sync_interval = float(os.getenv("STATE_SYNC_INTERVAL", "5"))
+        self.state_lease_seconds = float(os.getenv("STATE_LEASE_SECONDS", "300"))
+        
+        # Token accounting and budgets. Callers are told apart by their
+        # X-API-Key header. API_KEYS names keys as JSON {"key": "tenant"}
+        # and then rejects every other key; without it each key is tracked
+        # under a fingerprint. Requests without a key count as "anonymous".
+        # Budgets are in tokens (0 = unlimited) and TENANT_BUDGETS overrides
+        # them per tenant as JSON:
+        # {"tenant": {"daily_tokens": 500000, "request_tokens": 20000}}.
+        # Past BUDGET_DEGRADE_AT of the daily budget, or when a full run would
+        # not fit in what is left, runs skip the reviews (then the synthesis).
+        self.api_keys = os.getenv("API_KEYS", "")
+        self.tenant_daily_token_budget = int(os.getenv("TENANT_DAILY_TOKEN_BUDGET", "0"))
+        self.request_token_budget = int(os.getenv("REQUEST_TOKEN_BUDGET", "0"))
+        self.tenant_budgets = os.getenv("TENANT_BUDGETS", "")
+        self.budget_degrade_at = float(os.getenv("BUDGET_DEGRADE_AT", "0.9"))
+        self.usage_history_days = int(os.getenv("USAGE_HISTORY_DAYS", "7"))
+        # GET /usage shows callers their own tenant; this key sees every tenant
+        self.usage_admin_key = os.getenv("USAGE_ADMIN_KEY", "")
+        
+        # Background jobs (POST /jobs): worker tasks per process, queued jobs
+        # accepted before submissions get 503, and how long results are kept
+        self.job_workers = int(os.getenv("JOB_WORKERS", "4"))
+        self.job_max_queue = int(os.getenv("JOB_MAX_QUEUE", "100"))
+        self.job_ttl_seconds = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+        
+        # Batch runs
+        self.batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+        self.batch_max_queries = int(os.getenv("BATCH_MAX_QUERIES", "100"))
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -35,7 +213,16 @@ class Settings:
     @property
     def council_models(self) -> List[str]:
         """Get all council member models"""
+        if self.council_models_override:
+            return [model.strip() for model in self.council_models_override.split(",") if model.strip()]
         return [self.model_1, self.model_2, self.model_3]
+    
+    @property
+    def routing_candidates_list(self) -> List[str]:
+        """Models the router may pick from"""
+        if self.routing_candidates:
+            return [model.strip() for model in self.routing_candidates.split(",") if model.strip()]
+        return list(dict.fromkeys(self.council_models + [self.chairman_model]))
 
 
 # Global settings instance
@@ -0,0 +1,50 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from app.models import CallTiming, ConversationHistory
+
+if TYPE_CHECKING:
+    from app.usage import RunBudget
+
+
+@dataclass
+class RunContext:
+    """Per-run options shared by the pipeline and the LLM client"""
+    bypass_cache: bool = False
+    calls: List[CallTiming] = field(default_factory=list)
+    prompt_budget: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # Raw Stage 2 replies before parsing, kept for the run store
+    review_outputs: List[Dict[str, Any]] = field(default_factory=list)
+    # Earlier turns when the query continues a conversation
+    history: Optional[ConversationHistory] = None
+    # Council picked by the router for this run; None means the configured one
+    members: Optional[List[str]] = None
+    chairman: Optional[str] = None
+    # Token budget of a run admitted through the API; None is unmetered
+    budget: Optional["RunBudget"] = None
+
+
+# Set by the pipeline for the duration of a run; tasks spawned inside the run
+# inherit it, so LLMClient can read run options without extra parameters
+_current_run: ContextVar[Optional[RunContext]] = ContextVar("current_run", default=None)
+
+
+def get_run_context() -> RunContext:
+    """Get the context of the run in progress, or defaults outside of a run"""
+    return _current_run.get() or RunContext()
+
+
+def set_run_context(run_context: RunContext):
+    """
+    Make run_context current for the calling task
+    
+    Returns:
+        Token to pass to reset_run_context when the run ends
+    """
+    return _current_run.set(run_context)
+
+
+def reset_run_context(token):
+    """Restore the context that was current before set_run_context"""
+    _current_run.reset(token)
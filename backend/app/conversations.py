@@ -0,0 +1,305 @@
+"""
+Server-side conversations
+
+A conversation is a sequence of council turns kept in SQLite. A follow-up
+question goes to the council together with the conversation so far: the
+most recent turns verbatim and everything older as a running summary.
+Older turns are folded into the summary a batch at a time, in the
+background once a turn has been stored, so between folds each turn's
+messages only extend the previous turn's and the provider's prompt cache
+can reuse the shared prefix. The next turn of a conversation waits for a
+fold still in progress in its worker.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.context import RunContext, reset_run_context, set_run_context
+from app.llm_client import llm_client
+from app.models import ConversationHistory, ConversationTurn
+from app.usage import ANONYMOUS, RunBudget
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    turns INTEGER NOT NULL DEFAULT 0,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_turns INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS conversation_turns (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    run_id TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+"""
+
+
+class ConversationNotFound(Exception):
+    """Raised when a query names a conversation that does not exist"""
+
+
+class ConversationStore:
+    """
+    SQLite conversations with incremental summarization
+    
+    Turns from the summarized_turns-th on are sent verbatim. Once
+    recent_turns + summary_batch of them have piled up, all but the last
+    recent_turns are folded into the summary; a summary_batch of 0 never
+    folds, so every turn is resent in full.
+    """
+    
+    def __init__(self, path: str, recent_turns: int, summary_batch: int):
+        self.path = path
+        self.recent_turns = recent_turns
+        self.summary_batch = summary_batch
+        self.folds = 0
+        self.fold_failures = 0
+        self.fold_seconds = 0.0
+        self.fold_tokens = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._folding: Dict[str, asyncio.Task] = {}
+    
+    async def start(self):
+        """Open the database"""
+        if self._conn is not None:
+            return
+        # Workers of a multi-process deployment share the file; wait out their writes
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        logger.info(f"Conversation store opened at {self.path}")
+    
+    async def close(self):
+        """Wait for folds in progress and close the database"""
+        if self._conn is None:
+            return
+        if self._folding:
+            await asyncio.wait(list(self._folding.values()))
+        with self._lock:
+            self._conn.close()
+        self._conn = None
+    
+    def _execute(self, sql: str, params: Tuple = ()) -> List[tuple]:
+        if self._conn is None:
+            raise RuntimeError("Conversation store is not open")
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(sql, params).fetchall()
+    
+    async def create(self) -> Dict[str, Any]:
+        """
+        Start a conversation
+        
+        Returns:
+            Dict with the new conversation_id
+        """
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO conversations (id, created_at, updated_at) VALUES (?, ?, ?)",
+            (conversation_id, now, now)
+        )
+        return {"conversation_id": conversation_id, "created_at": now, "turns": []}
+    
+    async def exists(self, conversation_id: str) -> bool:
+        rows = await asyncio.to_thread(self._execute, "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,))
+        return bool(rows)
+    
+    async def history(self, conversation_id: str) -> Optional[ConversationHistory]:
+        """
+        Context to send with the conversation's next question
+        
+        Waits for a fold of this conversation still running in this worker,
+        so the turn is built on the newest summary.
+        
+        Returns:
+            ConversationHistory, or None if the conversation does not exist
+        """
+        fold = self._folding.get(conversation_id)
+        if fold is not None:
+            # wait() does not cancel the fold when this caller is cancelled
+            await asyncio.wait({fold})
+        return await asyncio.to_thread(self._load, conversation_id)
+    
+    def _load(self, conversation_id: str) -> Optional[ConversationHistory]:
+        rows = self._execute(
+            "SELECT turns, summary, summarized_turns FROM conversations WHERE id = ?",
+            (conversation_id,)
+        )
+        if not rows:
+            return None
+        total, summary, summarized = rows[0]
+        turns = self._execute(
+            "SELECT query, answer, run_id FROM conversation_turns "
+            "WHERE conversation_id = ? AND seq >= ? ORDER BY seq",
+            (conversation_id, summarized)
+        )
+        return ConversationHistory(
+            conversation_id=conversation_id,
+            summary=summary,
+            turns=[ConversationTurn(query=query, answer=answer, run_id=run_id) for query, answer, run_id in turns],
+            total_turns=total
+        )
+    
+    async def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Every turn of a conversation and its current summary
+        
+        Returns:
+            Conversation dict, or None if unknown
+        """
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT created_at, updated_at, summary, summarized_turns FROM conversations WHERE id = ?",
+            (conversation_id,)
+        )
+        if not rows:
+            return None
+        created_at, updated_at, summary, summarized = rows[0]
+        turns = await asyncio.to_thread(
+            self._execute,
+            "SELECT query, answer, run_id FROM conversation_turns WHERE conversation_id = ? ORDER BY seq",
+            (conversation_id,)
+        )
+        return {
+            "conversation_id": conversation_id,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "summary": summary,
+            "summarized_turns": summarized,
+            "turns": [
+                ConversationTurn(query=query, answer=answer, run_id=run_id).to_dict()
+                for query, answer, run_id in turns
+            ]
+        }
+    
+    async def delete(self, conversation_id: str) -> bool:
+        """
+        Drop a conversation and its turns
+        
+        Returns:
+            False if it did not exist
+        """
+        def delete() -> bool:
+            with self._lock:
+                with self._conn:
+                    self._conn.execute("DELETE FROM conversation_turns WHERE conversation_id = ?", (conversation_id,))
+                    return self._conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,)).rowcount > 0
+        
+        return await asyncio.to_thread(delete)
+    
+    async def add_turn(self, conversation_id: str, turn: ConversationTurn, tenant: str = ANONYMOUS) -> Optional[int]:
+        """
+        Append a completed turn and fold older turns in the background if due
+        
+        Args:
+            conversation_id: Conversation the question was asked in
+            turn: The question and the council's final answer
+            tenant: Tenant who asked it, charged for the summary call of a fold
+        
+        Returns:
+            Number of turns in the conversation, or None if it was deleted meanwhile
+        """
+        def append() -> Optional[Tuple[int, int]]:
+            now = time.time()
+            with self._lock:
+                with self._conn:
+                    # Sequence number and count move together in one transaction
+                    inserted = self._conn.execute(
+                        "INSERT INTO conversation_turns (conversation_id, seq, query, answer, run_id, created_at) "
+                        "SELECT id, turns, ?, ?, ?, ? FROM conversations WHERE id = ?",
+                        (turn.query, turn.answer, turn.run_id, now, conversation_id)
+                    ).rowcount
+                    if not inserted:
+                        return None
+                    self._conn.execute(
+                        "UPDATE conversations SET turns = turns + 1, updated_at = ? WHERE id = ?",
+                        (now, conversation_id)
+                    )
+                    return self._conn.execute(
+                        "SELECT turns - summarized_turns, turns FROM conversations WHERE id = ?",
+                        (conversation_id,)
+                    ).fetchone()
+        
+        counts = await asyncio.to_thread(append)
+        if counts is None:
+            return None
+        verbatim, total = counts
+        if self._fold_due(verbatim) and conversation_id not in self._folding:
+            task = asyncio.create_task(self._fold(conversation_id, tenant))
+            self._folding[conversation_id] = task
+            task.add_done_callback(lambda _: self._folding.pop(conversation_id, None))
+        return total
+    
+    def _fold_due(self, verbatim: int) -> bool:
+        return self.summary_batch > 0 and verbatim >= self.recent_turns + self.summary_batch
+    
+    async def _fold(self, conversation_id: str, tenant: str):
+        """Summarize all but the most recent turns into the running summary, charged to tenant"""
+        history = await asyncio.to_thread(self._load, conversation_id)
+        if history is None or not self._fold_due(len(history.turns)):
+            return
+        folded = history.turns[:len(history.turns) - self.recent_turns]
+        summarized = history.total_turns - len(history.turns)
+        
+        started = time.monotonic()
+        # Unlimited: the turn that triggered the fold was admitted already
+        run_context = RunContext(budget=RunBudget(tenant=tenant))
+        token = set_run_context(run_context)
+        try:
+            summary = await llm_client.get_conversation_summary(history.summary, folded)
+        except Exception as e:
+            # The turns stay verbatim; the next completed turn tries again
+            self.fold_failures += 1
+            logger.error(f"Failed to summarize conversation {conversation_id}: {str(e)}")
+            return
+        finally:
+            reset_run_context(token)
+        self.fold_seconds += time.monotonic() - started
+        self.fold_tokens += sum(call.prompt_tokens + call.completion_tokens for call in run_context.calls)
+        
+        # Another worker may have folded the same turns meanwhile
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE conversations SET summary = ?, summarized_turns = ? WHERE id = ? AND summarized_turns = ?",
+            (summary.strip(), summarized + len(folded), conversation_id, summarized)
+        )
+        self.folds += 1
+        logger.info(f"Folded {len(folded)} turns of conversation {conversation_id} into its summary")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._conn is not None,
+            "recent_turns": self.recent_turns,
+            "summary_batch": self.summary_batch,
+            "folds": self.folds,
+            "fold_failures": self.fold_failures,
+            "folding": len(self._folding),
+            "fold_seconds": round(self.fold_seconds, 3),
+            "fold_tokens": self.fold_tokens
+        }
+
+
+# Global conversation store; opened by the app on startup
+conversation_store = ConversationStore(
+    path=settings.conversation_store_path,
+    recent_turns=settings.conversation_recent_turns,
+    summary_batch=settings.conversation_summary_batch
+)
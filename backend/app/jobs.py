@@ -0,0 +1,382 @@
+"""
+Background council jobs
+
+POST /jobs queues a council run and returns at once; clients poll
+GET /jobs/{id} for the partial stage results and DELETE it to cancel. Jobs
+run on a fixed pool of worker tasks fed by a bounded queue, so a burst of
+submissions is refused with 503 instead of starting unbounded runs.
+Cancelling a running job cancels its pipeline run, which cancels the
+outstanding upstream calls.
+
+With a shared state backend, job snapshots and cancel requests go through
+it, so any worker process can answer for a job another one runs.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.metrics import registry
+from app.models import JobStatus, Stage
+from app.pipeline import pipeline
+from app.shared_state import StateBackend, in_background, state_backend
+from app.usage import RunBudget
+
+logger = logging.getLogger(__name__)
+
+jobs_finished = registry.counter(
+    "council_jobs_total",
+    "Finished background jobs by final status",
+    ["status"]
+)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+@dataclass
+class Job:
+    """A queued or running council run and what it has produced so far"""
+    id: str
+    query: str
+    bypass_cache: bool = False
+    include_timings: bool = False
+    conversation_id: Optional[str] = None
+    budget: Optional[RunBudget] = None
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage: Optional[str] = None
+    stage_1_responses: List[Dict[str, Any]] = field(default_factory=list)
+    stage_2_reviews: List[Dict[str, Any]] = field(default_factory=list)
+    aggregate: Optional[Dict[str, Any]] = None
+    early_exit: Optional[Dict[str, Any]] = None
+    synthesis: List[str] = field(default_factory=list)  # Chairman tokens streamed so far
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+    
+    def on_event(self, event: str, data: Dict[str, Any]):
+        """Pipeline progress callback; keeps the partial results"""
+        if event == "stage":
+            self.stage = data["stage"]
+        elif event == "stage_1_response":
+            self.stage_1_responses.append(data)
+        elif event == "stage_2_review":
+            self.stage_2_reviews.append(data)
+        elif event == "stage_2_aggregate":
+            self.aggregate = data
+        elif event == "early_exit":
+            self.early_exit = data
+        elif event == "stage_3_token":
+            self.synthesis.append(data["content"])
+    
+    def to_dict(self, position: Optional[int] = None) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "status": self.status.value,
+            "query": self.query,
+            "conversation_id": self.conversation_id,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if position is not None:
+            data["queue_position"] = position
+        if self.status == JobStatus.COMPLETED:
+            data["result"] = self.result
+            return data
+        data["partial"] = {
+            "stage_1_responses": self.stage_1_responses,
+            "stage_2_reviews": self.stage_2_reviews,
+            "aggregate": self.aggregate,
+            "early_exit": self.early_exit,
+            "stage_3_content": "".join(self.synthesis)
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Bounded queue of council jobs drained by a fixed number of worker tasks
+    
+    Finished jobs are kept for ttl seconds so clients can collect them.
+    """
+    
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        ttl: float,
+        backend: Optional[StateBackend] = None
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.backend = backend
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        # Jobs still waiting; cancelled ones stay in the queue until popped but free their slot
+        self._queued = 0
+        self._worker_tasks: List[asyncio.Task] = []
+        self._cancel_watcher: Optional[asyncio.Task] = None
+        self._last_sync: Dict[str, float] = {}
+    
+    async def start(self):
+        """Start the worker pool"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._queued = 0
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.backend is not None:
+            self._cancel_watcher = asyncio.create_task(self._watch_cancellations())
+        logger.info(f"Job workers started ({self.workers} workers, queue of {self.max_queue})")
+    
+    async def stop(self):
+        """Cancel queued and running jobs and stop the workers"""
+        if self._queue is None:
+            return
+        tasks = self._worker_tasks + ([self._cancel_watcher] if self._cancel_watcher else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            if job.status == JobStatus.QUEUED:
+                self._finish(job, JobStatus.CANCELLED, error="Server shutting down")
+        self._queue = None
+        self._queued = 0
+        self._worker_tasks = []
+        self._cancel_watcher = None
+    
+    def submit(
+        self,
+        query: str,
+        bypass_cache: bool = False,
+        include_timings: bool = False,
+        conversation_id: Optional[str] = None,
+        budget: Optional[RunBudget] = None
+    ) -> Job:
+        """
+        Queue a council run
+        
+        Args:
+            query: User's question
+            bypass_cache: Skip cached completions and call every model
+            include_timings: Add a "timings" block to the result
+            conversation_id: Ask the question as the next turn of this conversation
+            budget: Token budget the job was admitted with
+        
+        Returns:
+            The queued Job
+        
+        Raises:
+            JobQueueFull: When max_queue jobs are already waiting
+        """
+        if self._queue is None:
+            raise RuntimeError("Job manager is not running")
+        if self._queued >= self.max_queue:
+            raise JobQueueFull(f"{self.max_queue} jobs are already queued")
+        self._prune()
+        job = Job(
+            id=uuid.uuid4().hex,
+            query=query,
+            bypass_cache=bypass_cache,
+            include_timings=include_timings,
+            conversation_id=conversation_id,
+            budget=budget
+        )
+        self._queue.put_nowait(job)
+        self._queued += 1
+        self._jobs[job.id] = job
+        self._sync(job)
+        return job
+    
+    def position(self, job: Job) -> Optional[int]:
+        """1-based place of a queued job in the queue"""
+        if job.status != JobStatus.QUEUED:
+            return None
+        queued = [other for other in self._jobs.values() if other.status == JobStatus.QUEUED]
+        return queued.index(job) + 1
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Current state of a job
+        
+        Args:
+            job_id: Id returned by submit
+        
+        Returns:
+            Job dict, or None if unknown (or expired)
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict(self.position(job))
+        if self.backend is not None:
+            snapshot = await asyncio.to_thread(self.backend.get, f"job:{job_id}")
+            if snapshot is not None:
+                return json.loads(snapshot)
+        return None
+    
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued or running job
+        
+        A queued job is dropped before it starts; a running job's pipeline
+        run is cancelled together with its upstream calls. A job another
+        worker runs gets a cancel request that worker picks up shortly.
+        
+        Returns:
+            Job dict after the request, or None if unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            data = await self.get(job_id)
+            if data is not None and data["status"] in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+                await asyncio.to_thread(self.backend.put, f"job-cancel:{job_id}", "1", self.ttl)
+                data["cancel_requested"] = True
+            return data
+        
+        if job.status == JobStatus.QUEUED:
+            self._queued -= 1
+            self._finish(job, JobStatus.CANCELLED)
+        elif job.status == JobStatus.RUNNING:
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        return job.to_dict()
+    
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == JobStatus.QUEUED:
+                    self._queued -= 1
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job: Job):
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        self._sync(job)
+        
+        def on_event(event: str, data: Dict[str, Any]):
+            job.on_event(event, data)
+            self._sync(job, throttle=event == "stage_3_token")
+        
+        task = asyncio.create_task(pipeline.run_full_pipeline(
+            job.query,
+            on_event=on_event,
+            bypass_cache=job.bypass_cache,
+            include_timings=job.include_timings,
+            conversation_id=job.conversation_id,
+            budget=job.budget
+        ))
+        self._running[job.id] = task
+        try:
+            # wait() does not raise when the run itself is cancelled
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            # The worker is shutting down
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self._finish(job, JobStatus.CANCELLED, error="Server shutting down")
+            raise
+        finally:
+            self._running.pop(job.id, None)
+        
+        if task.cancelled():
+            logger.info(f"Job {job.id} cancelled")
+            self._finish(job, JobStatus.CANCELLED)
+        elif task.exception() is not None:
+            logger.error(f"Job {job.id} failed: {str(task.exception())}")
+            self._finish(job, JobStatus.FAILED, error=f"Error processing query: {str(task.exception())}")
+        else:
+            job.result = task.result()
+            job.stage = Stage.COMPLETE.value
+            self._finish(job, JobStatus.COMPLETED)
+    
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        if job.budget is not None:
+            # A job cancelled while queued never reached the pipeline, which settles it otherwise
+            job.budget.settle()
+        jobs_finished.inc(status=status.value)
+        self._sync(job)
+        self._last_sync.pop(job.id, None)
+    
+    def _sync(self, job: Job, throttle: bool = False):
+        """Publish the job's state for other workers; token updates at most once a second"""
+        if self.backend is None:
+            return
+        now = time.monotonic()
+        if throttle and now - self._last_sync.get(job.id, 0.0) < 1.0:
+            return
+        self._last_sync[job.id] = now
+        in_background(self.backend.put, f"job:{job.id}", json.dumps(job.to_dict()), self.ttl)
+    
+    async def _watch_cancellations(self):
+        """Pick up cancel requests made through other workers"""
+        while True:
+            await asyncio.sleep(0.5)
+            for job_id in [job.id for job in self._jobs.values() if not job.finished]:
+                try:
+                    requested = await asyncio.to_thread(self.backend.get, f"job-cancel:{job_id}")
+                except Exception as e:
+                    logger.error(f"Failed to check cancel request of job {job_id}: {str(e)}")
+                    continue
+                if requested is not None:
+                    await self.cancel(job_id)
+    
+    def _prune(self):
+        """Forget finished jobs older than the ttl"""
+        cutoff = time.time() - self.ttl
+        for job_id in [job.id for job in self._jobs.values() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+    
+    def stats(self) -> Dict[str, Any]:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "enabled": self._queue is not None,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queued,
+            "jobs": counts
+        }
+
+
+# Global job manager; started by the app on startup
+job_manager = JobManager(
+    workers=settings.job_workers,
+    max_queue=settings.job_max_queue,
+    ttl=settings.job_ttl_seconds,
+    backend=state_backend
+)
+
+registry.gauge_callback(
+    "council_jobs",
+    "Jobs held by this worker by status",
+    ["status"],
+    lambda: [((status,), count) for status, count in job_manager.stats()["jobs"].items()]
+)
@@ -1,28 +1,145 @@
 import os
-from typing import List, Dict, Any
-from openai import OpenAI
+import asyncio
+import contextlib
+import json
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, TypeVar
+import httpx
+import openai
+from openai import AsyncOpenAI
 from app.config import settings
+from app.aggregation import format_scoreboard
+from app.cache import response_cache
+from app.context import get_run_context
+from app.metrics import cache_lookups, llm_call_duration, llm_calls, llm_queue_wait, llm_retries, llm_tokens
+from app.models import CallTiming, ConversationTurn, ResponseStatus
+from app.prompt_budget import fit_texts, record_budget
+from app.rate_limiter import rate_limiter
+from app.resilience import model_health, hedged_call, is_retryable, backoff_delay, CircuitOpenError
+from app.routing import model_router
+from app.single_flight import completion_flights
+from app.tokens import estimate_tokens, estimate_message_tokens
+from app.usage import ANONYMOUS, usage_ledger
 import logging
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens a provider reports as served from its prefix cache"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def _rejects_json_mode(error: openai.BadRequestError) -> bool:
+    """Whether a 400 is about response_format rather than the request itself"""
+    if getattr(error, "param", None) == "response_format":
+        return True
+    message = str(error).lower()
+    return any(hint in message for hint in ("response_format", "json_object", "json mode"))
+
 
 class LLMClient:
     """Client for interacting with HuggingFace Router LLMs"""
     
     def __init__(self):
-        """Initialize the OpenAI client with HuggingFace router"""
-        self.client = OpenAI(
-            base_url=settings.hf_base_url,
-            api_key=settings.hf_token or os.environ.get("HF_TOKEN", "")
+        """Create the client lazily; the transport is opened in start()"""
+        self.client: Optional[AsyncOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Models whose provider rejected response_format; reviews fall back to prompting
+        self._json_mode_unsupported: set = set()
+    
+    def _ensure_client(self) -> AsyncOpenAI:
+        """
+        Build the async OpenAI client on top of a pooled HTTP transport
+        
+        Returns:
+            AsyncOpenAI: Client bound to the shared connection pool
+        """
+        if self.client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=settings.http2_enabled,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive,
+                    keepalive_expiry=settings.http_keepalive_expiry
+                ),
+                timeout=httpx.Timeout(settings.llm_request_timeout, connect=10.0)
+            )
+            self.client = AsyncOpenAI(
+                base_url=settings.hf_base_url,
+                api_key=settings.hf_token or os.environ.get("HF_TOKEN", ""),
+                http_client=self._http_client,
+                max_retries=0  # retries are handled by _call_with_retries
+            )
+        return self.client
+    
+    async def start(self):
+        """Open the shared HTTP connection pool"""
+        self._ensure_client()
+        logger.info(
+            f"LLM transport ready (http2={settings.http2_enabled}, "
+            f"max_connections={settings.http_max_connections})"
         )
     
+    async def close(self):
+        """Close the shared HTTP connection pool"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self._http_client = None
+            logger.info("LLM transport closed")
+    
+    async def _cached(self, cache_key: str, timing: CallTiming) -> Optional[str]:
+        """Look up a completion unless the current run bypasses the cache"""
+        if get_run_context().bypass_cache:
+            return None
+        cached = await response_cache.get(cache_key)
+        cache_lookups.inc(cache="response", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            logger.info(f"Cache hit for {timing.model}")
+            timing.cache_hit = True
+        return cached
+    
+    def _record_call(self, timing: CallTiming, started: float):
+        """
+        Finish a call's timing, attach it to the current run and update metrics
+        
+        Args:
+            timing: Timing collected while the call ran
+            started: time.monotonic() when the call began
+        """
+        timing.latency = time.monotonic() - started
+        run_context = get_run_context()
+        run_context.calls.append(timing)
+        usage_ledger.record(timing, run_context.budget.tenant if run_context.budget is not None else ANONYMOUS)
+        
+        outcome = timing.status
+        if timing.cache_hit:
+            outcome = "cache_hit"
+        elif timing.coalesced and timing.status == ResponseStatus.OK.value:
+            outcome = "coalesced"
+        llm_calls.inc(model=timing.model, stage=timing.stage, outcome=outcome)
+        if timing.cache_hit or timing.coalesced:
+            # No upstream tokens or latency of its own; the leading call counts them
+            return
+        model_router.observe(timing)
+        llm_call_duration.observe(timing.latency, model=timing.model, stage=timing.stage)
+        llm_tokens.inc(timing.prompt_tokens, model=timing.model, stage=timing.stage, type="prompt")
+        llm_tokens.inc(timing.completion_tokens, model=timing.model, stage=timing.stage, type="completion")
+    
     async def get_completion(
         self, 
         model: str, 
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        stage: str = "",
+        response_format: Optional[Dict[str, str]] = None
     ) -> str:
         """
         Get completion from a specific model
@@ -32,28 +149,318 @@ class LLMClient:
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            stage: Pipeline stage label for metrics and timings
+            response_format: Optional provider output format, e.g. {"type": "json_object"}
             
         Returns:
             str: The model's response content
         """
+        started = time.monotonic()
+        timing = CallTiming(model=model, stage=stage)
+        cache_key = response_cache.make_key(model, messages, temperature, max_tokens)
+        cached = await self._cached(cache_key, timing)
+        if cached is not None:
+            self._record_call(timing, started)
+            return cached
+        
         try:
-            logger.info(f"Requesting completion from {model}")
+            fetch = lambda _: self._fetch_completion(
+                model, messages, temperature, max_tokens, timing, response_format, cache_key
+            )
+            if not settings.single_flight_enabled:
+                return await fetch(None)
             
-            completion = self.client.chat.completions.create(
+            # Bypassing runs must not join a call that consulted the cache, and a
+            # joined call is not charged, so only calls of one tenant are shared
+            run_context = get_run_context()
+            tenant = run_context.budget.tenant if run_context.budget is not None else ANONYMOUS
+            flight_key = f"{cache_key}:{json.dumps(response_format, sort_keys=True)}:{run_context.bypass_cache}:{tenant}"
+            response_content, shared = await completion_flights.do(flight_key, fetch)
+            if shared:
+                logger.info(f"Joined in-flight completion from {model}")
+                timing.coalesced = True
+            return response_content
+            
+        except asyncio.CancelledError:
+            # Cancelled by a model or stage deadline
+            timing.status = ResponseStatus.TIMEOUT.value
+            raise
+        except Exception as e:
+            logger.error(f"Error getting completion from {model}: {str(e)}")
+            timing.status = ResponseStatus.ERROR.value
+            raise
+        finally:
+            self._record_call(timing, started)
+    
+    async def _fetch_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        timing: CallTiming,
+        response_format: Optional[Dict[str, str]],
+        cache_key: str
+    ) -> str:
+        """
+        Get a completion upstream, with retries and hedging, and cache it
+        
+        Returns:
+            str: The model's response content
+        """
+        logger.info(f"Requesting completion from {model}")
+        health = model_health.get(model)
+        
+        def attempt() -> Awaitable[str]:
+            delay = health.hedge_delay()
+            if delay is None:
+                return self._request_completion(model, messages, temperature, max_tokens, timing, response_format)
+            return hedged_call(
+                lambda: self._request_completion(model, messages, temperature, max_tokens, timing, response_format),
+                delay,
+                health
+            )
+        
+        response_content = await self._call_with_retries(model, attempt, timing)
+        logger.info(f"Received response from {model} ({len(response_content)} chars)")
+        
+        await response_cache.set(cache_key, response_content)
+        return response_content
+    
+    async def _request_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        timing: CallTiming,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> str:
+        """
+        Make a single rate-limited upstream call
+        
+        Queue wait and token usage are written to timing.
+        
+        Returns:
+            str: The model's response content
+        """
+        client = self._ensure_client()
+        prompt_tokens = estimate_message_tokens(messages)
+        async with rate_limiter.slot(model, prompt_tokens + max_tokens) as ticket:
+            timing.queue_wait += ticket.wait_time
+            llm_queue_wait.observe(ticket.wait_time, model=model)
+            started = time.monotonic()
+            extra = {"response_format": response_format} if response_format else {}
+            completion = await client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                **extra
             )
+            model_health.get(model).latency.record(time.monotonic() - started)
+        
+        response_content = completion.choices[0].message.content
+        if completion.usage is not None:
+            timing.prompt_tokens = completion.usage.prompt_tokens
+            timing.completion_tokens = completion.usage.completion_tokens
+            timing.cached_prompt_tokens = _cached_prompt_tokens(completion.usage)
+        else:
+            timing.prompt_tokens = prompt_tokens
+            timing.completion_tokens = estimate_tokens(response_content)
+            timing.usage_estimated = True
+        ticket.report_usage(timing.prompt_tokens + timing.completion_tokens)
+        return response_content
+    
+    async def _call_with_retries(
+        self,
+        model: str,
+        attempt: Callable[[], Awaitable[T]],
+        timing: Optional[CallTiming] = None
+    ) -> T:
+        """
+        Run attempt with jittered exponential backoff behind the model's circuit breaker
+        
+        Args:
+            model: Model identifier
+            attempt: Zero-argument coroutine factory for one try
+            timing: Optional call timing whose retry count is updated
             
-            response_content = completion.choices[0].message.content
-            logger.info(f"Received response from {model} ({len(response_content)} chars)")
+        Returns:
+            The result of the first successful try
+        """
+        health = model_health.get(model)
+        
+        for attempt_no in range(settings.llm_max_retries + 1):
+            if not health.breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {model}; failing fast")
             
-            return response_content
+            health.calls += 1
+            try:
+                result = await attempt()
+            except asyncio.CancelledError:
+                health.breaker.abandon()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The model answered; the request itself was rejected
+                    health.breaker.record_success()
+                    raise
+                health.breaker.record_failure()
+                if attempt_no == settings.llm_max_retries:
+                    raise
+                
+                delay = backoff_delay(attempt_no, e)
+                health.retries += 1
+                llm_retries.inc(model=model)
+                if timing is not None:
+                    timing.retries += 1
+                logger.warning(
+                    f"Retrying {model} in {delay:.2f}s "
+                    f"(attempt {attempt_no + 1}/{settings.llm_max_retries}): {str(e)}"
+                )
+                await asyncio.sleep(delay)
+            else:
+                health.breaker.record_success()
+                return result
+    
+    async def stream_completion(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        stage: str = ""
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from a specific model token by token
+        
+        Args:
+            model: Model identifier
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            stage: Pipeline stage label for metrics and timings
+            
+        Yields:
+            str: Content deltas as the provider emits them
+        """
+        started = time.monotonic()
+        timing = CallTiming(model=model, stage=stage)
+        cache_key = response_cache.make_key(model, messages, temperature, max_tokens)
+        cached = await self._cached(cache_key, timing)
+        if cached is not None:
+            self._record_call(timing, started)
+            yield cached
+            return
+        
+        prompt_tokens = estimate_message_tokens(messages)
+        parts = []
+        try:
+            logger.info(f"Requesting streamed completion from {model}")
             
+            # Only opening the stream is retried; a stream that breaks
+            # after tokens were sent is reported as an error
+            stream, ticket, slot = await self._call_with_retries(
+                model,
+                lambda: self._open_stream(model, messages, temperature, max_tokens, prompt_tokens, timing),
+                timing
+            )
+            async with slot:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                
+                # Streamed chunks carry no usage block
+                self._estimate_stream_usage(timing, prompt_tokens, parts)
+                ticket.report_usage(timing.prompt_tokens + timing.completion_tokens)
+            
+            logger.info(f"Finished streamed response from {model}")
+            await response_cache.set(cache_key, "".join(parts))
+            
+        except asyncio.CancelledError:
+            # Cancelled by a model or stage deadline
+            timing.status = ResponseStatus.TIMEOUT.value
+            raise
         except Exception as e:
-            logger.error(f"Error getting completion from {model}: {str(e)}")
+            logger.error(f"Error streaming completion from {model}: {str(e)}")
+            timing.status = ResponseStatus.ERROR.value
             raise
+        finally:
+            # A stream cut short has still used the tokens sent so far
+            if parts and not timing.usage_estimated:
+                self._estimate_stream_usage(timing, prompt_tokens, parts)
+            self._record_call(timing, started)
+    
+    async def _open_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        prompt_tokens: int,
+        timing: CallTiming
+    ):
+        """
+        Take a rate-limit slot and open a stream under it
+        
+        The slot is given back if opening fails, so it is not held while
+        _call_with_retries backs off.
+        
+        Returns:
+            Tuple of (stream, LimitTicket, slot); the caller holds the slot
+            while reading the stream and exits it afterwards
+        """
+        client = self._ensure_client()
+        slot = contextlib.AsyncExitStack()
+        ticket = await slot.enter_async_context(rate_limiter.slot(model, prompt_tokens + max_tokens))
+        try:
+            timing.queue_wait += ticket.wait_time
+            llm_queue_wait.observe(ticket.wait_time, model=model)
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        except BaseException:
+            await slot.aclose()
+            raise
+        return stream, ticket, slot
+    
+    def _estimate_stream_usage(self, timing: CallTiming, prompt_tokens: int, parts: List[str]):
+        timing.prompt_tokens = prompt_tokens
+        timing.completion_tokens = estimate_tokens("".join(parts))
+        timing.usage_estimated = True
+    
+    def _with_history(self, system: str, user: str) -> List[Dict[str, str]]:
+        """
+        System prompt, the run's earlier conversation turns, then the new message
+        
+        Fixed instructions come first and the turns only grow at the end
+        until the next summary fold, so consecutive turns of a conversation
+        share a long message prefix that provider prompt caches can reuse.
+        
+        Args:
+            system: Fixed system prompt of the call
+            user: The new user message
+        
+        Returns:
+            List of message dicts
+        """
+        history = get_run_context().history
+        if history is None:
+            return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        return [
+            {"role": "system", "content": system + history.system_context()},
+            *history.messages(),
+            {"role": "user", "content": user}
+        ]
     
     async def get_initial_response(self, model: str, query: str) -> str:
         """
@@ -62,22 +469,16 @@ class LLMClient:
         Args:
             model: Model identifier
             query: User's question
-            
+        
         Returns:
             str: Model's response
         """
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a helpful AI assistant. Provide clear, accurate, and insightful responses to user questions."
-            },
-            {
-                "role": "user",
-                "content": query
-            }
-        ]
+        messages = self._with_history(
+            "You are a helpful AI assistant. Provide clear, accurate, and insightful responses to user questions.",
+            query
+        )
         
-        return await self.get_completion(model, messages)
+        return await self.get_completion(model, messages, stage="stage_1")
     
     async def get_review_rankings(
         self, 
@@ -96,11 +497,22 @@ class LLMClient:
         Returns:
             str: Model's ranking response
         """
+        # Keep the pasted answers within the review prompt's token budget
+        contents, stats = fit_texts(
+            [resp['content'] for resp in anonymized_responses],
+            settings.review_prompt_token_budget
+        )
+        record_budget("stage_2", stats)
+        
         responses_text = "\n\n".join([
-            f"Response {resp['id']}:\n{resp['content']}"
-            for resp in anonymized_responses
+            f"Response {resp['id']}:\n{content}"
+            for resp, content in zip(anonymized_responses, contents)
         ])
         
+        # Reviewers see what a follow-up refers to, not the earlier answers
+        history = get_run_context().history
+        context = f"Conversation so far:\n{history.brief()}\n\n" if history is not None else ""
+        
         messages = [
             {
                 "role": "system",
@@ -125,17 +537,34 @@ Be objective and critical. Provide specific reasoning for each ranking."""
             },
             {
                 "role": "user",
-                "content": f"Original Query: {query}\n\nResponses to evaluate:\n\n{responses_text}\n\nPlease provide your ranking in JSON format."
+                "content": f"{context}Original Query: {query}\n\nResponses to evaluate:\n\n{responses_text}\n\nPlease provide your ranking in JSON format."
             }
         ]
         
-        return await self.get_completion(model, messages, temperature=0.3)
+        if settings.review_json_mode and model not in self._json_mode_unsupported:
+            try:
+                return await self.get_completion(
+                    model, messages, temperature=0.3, stage="stage_2",
+                    response_format={"type": "json_object"}
+                )
+            except openai.BadRequestError as e:
+                # Not every provider behind the router supports JSON mode;
+                # any other bad request would fail without it too
+                if not _rejects_json_mode(e):
+                    raise
+                logger.warning(f"{model} rejected JSON mode, prompting for JSON instead: {e}")
+                self._json_mode_unsupported.add(model)
+        
+        return await self.get_completion(model, messages, temperature=0.3, stage="stage_2")
     
     async def get_chairman_synthesis(
         self, 
         query: str, 
         responses: List[Dict[str, Any]], 
-        reviews: List[Dict[str, Any]]
+        reviews: List[Dict[str, Any]],
+        on_token: Optional[Callable[[str], None]] = None,
+        aggregate: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None
     ) -> str:
         """
         Get chairman's final synthesized response
@@ -144,30 +573,49 @@ Be objective and critical. Provide specific reasoning for each ranking."""
             query: Original user query
             responses: All LLM responses with metadata
             reviews: All review rankings
+            on_token: Optional callback; when set the synthesis is streamed and
+                each content delta is passed to it as it arrives
+            aggregate: Aggregated rankings; with the scoreboard review format
+                they replace the individual rankings in the prompt
+            model: Chairman model; defaults to settings.chairman_model
             
         Returns:
             str: Chairman's synthesized response
         """
+        # Keep answers and review reasoning within the chairman's token budgets
+        answers, answer_stats = fit_texts(
+            [resp['response'] for resp in responses],
+            settings.chairman_prompt_token_budget
+        )
+        record_budget("stage_3", answer_stats)
+        
         # Format responses
         responses_text = "\n\n".join([
-            f"Model {resp['model_id']} ({resp['model_name']}):\n{resp['response']}"
-            for resp in responses
+            f"Model {resp['model_id']} ({resp['model_name']}):\n{answer}"
+            for resp, answer in zip(responses, answers)
         ])
         
         # Format reviews
-        reviews_text = "\n\n".join([
-            f"Review by {review['reviewer_model']}:\n" + 
-            "\n".join([
-                f"  - Ranked {r['response_id']} as #{r['rank']}: {r['reasoning']}"
-                for r in review['rankings']
+        if aggregate is not None and settings.chairman_review_format == "scoreboard":
+            reviews_text = self._review_scoreboard(reviews, aggregate)
+        else:
+            reasonings, reasoning_stats = fit_texts(
+                [r['reasoning'] for review in reviews for r in review['rankings']],
+                settings.chairman_reasoning_token_budget
+            )
+            record_budget("stage_3", reasoning_stats)
+            reasoning_iter = iter(reasonings)
+            reviews_text = "\n\n".join([
+                f"Review by {review['reviewer_model']}:\n" + 
+                "\n".join([
+                    f"  - Ranked {r['response_id']} as #{r['rank']}: {next(reasoning_iter)}"
+                    for r in review['rankings']
+                ])
+                for review in reviews
             ])
-            for review in reviews
-        ])
         
-        messages = [
-            {
-                "role": "system",
-                "content": """You are the Chairman of the LLM Council. Your role is to synthesize multiple AI responses and their peer reviews into a single, comprehensive, and accurate final answer.
+        messages = self._with_history(
+            """You are the Chairman of the LLM Council. Your role is to synthesize multiple AI responses and their peer reviews into a single, comprehensive, and accurate final answer.
 
 Consider:
 1. Points of agreement across responses
@@ -175,11 +623,8 @@ Consider:
 3. The peer review rankings and reasoning
 4. Accuracy and correctness of information
 
-Provide a clear, well-organized final response that represents the best collective wisdom of the council. Do not mention the individual models or the review process - simply provide the best possible answer to the user's question."""
-            },
-            {
-                "role": "user",
-                "content": f"""Original Query: {query}
+Provide a clear, well-organized final response that represents the best collective wisdom of the council. Do not mention the individual models or the review process - simply provide the best possible answer to the user's question.""",
+            f"""Original Query: {query}
 
 Individual Responses:
 {responses_text}
@@ -188,10 +633,161 @@ Peer Reviews:
 {reviews_text}
 
 Please provide your final synthesized response to the user's query."""
+        )
+        
+        model = model or settings.chairman_model
+        if on_token is None:
+            return await self.get_completion(
+                model=model, messages=messages, max_tokens=3000, stage="stage_3"
+            )
+        
+        parts = []
+        async for delta in self.stream_completion(
+            model=model, messages=messages, max_tokens=3000, stage="stage_3"
+        ):
+            parts.append(delta)
+            on_token(delta)
+        return "".join(parts)
+    
+    async def get_chairman_revision(
+        self,
+        query: str,
+        draft: str,
+        responses: List[Dict[str, Any]],
+        reviews: List[Dict[str, Any]],
+        aggregate: Dict[str, Any],
+        on_token: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Revise a speculative draft once the peer reviews are in
+        
+        The prompt carries the draft, the review scoreboard and only the
+        answers the reviewers ranked best, so it is much smaller than a full
+        synthesis prompt.
+        
+        Args:
+            query: Original user query
+            draft: Chairman's draft written from the answers alone
+            responses: Successful responses, as for get_chairman_synthesis
+            reviews: All review rankings
+            aggregate: RankAggregate.to_dict() output
+            on_token: Optional callback receiving each streamed content delta
+            model: Chairman model; defaults to settings.chairman_model
+        
+        Returns:
+            str: The revised final response
+        """
+        top_ids = [
+            score['response_id']
+            for score in sorted(aggregate['scores'], key=lambda s: s['consensus_rank'])[:settings.speculative_accept_top]
+        ]
+        top = [resp for resp in responses if resp['model_id'] in top_ids]
+        answers, answer_stats = fit_texts([resp['response'] for resp in top], settings.chairman_prompt_token_budget)
+        record_budget("stage_3", answer_stats)
+        top_text = "\n\n".join(
+            f"Model {resp['model_id']} ({resp['model_name']}):\n{answer}" for resp, answer in zip(top, answers)
+        )
+        
+        messages = self._with_history(
+            """You are the Chairman of the LLM Council. You drafted a final answer from the council's responses before their peer reviews came in. The reviewers ranked other responses above the one your draft relied on most.
+
+Revise the draft: correct anything the reviews show to be wrong, bring in what the top-ranked responses do better, and keep what is already right. Do not mention the individual models, the draft or the review process - reply with the final answer only.""",
+            f"""Original Query: {query}
+
+Your Draft:
+{draft}
+
+Peer Reviews:
+{self._review_scoreboard(reviews, aggregate)}
+
+Top-Ranked Responses:
+{top_text}
+
+Please provide the revised final response to the user's query."""
+        )
+        
+        model = model or settings.chairman_model
+        if on_token is None:
+            return await self.get_completion(
+                model=model, messages=messages, max_tokens=3000, stage="stage_3"
+            )
+        
+        parts = []
+        async for delta in self.stream_completion(
+            model=model, messages=messages, max_tokens=3000, stage="stage_3"
+        ):
+            parts.append(delta)
+            on_token(delta)
+        return "".join(parts)
+    
+    async def get_conversation_summary(
+        self,
+        summary: str,
+        turns: List[ConversationTurn],
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Fold turns into a conversation's running summary
+        
+        Args:
+            summary: Summary so far (empty before the first fold)
+            turns: Oldest turns not yet in the summary
+            model: Summarizing model; defaults to CONVERSATION_SUMMARY_MODEL or the chairman
+        
+        Returns:
+            str: The updated summary
+        """
+        turns_text = "\n\n".join(f"User: {turn.query}\nAssistant: {turn.answer}" for turn in turns)
+        messages = [
+            {
+                "role": "system",
+                "content": "You maintain a running summary of a conversation between a user and an assistant. "
+                           "Keep every fact, decision, definition and open question a follow-up could refer to. "
+                           "Drop pleasantries and repetition. Reply with the summary only."
+            },
+            {
+                "role": "user",
+                "content": f"Current summary:\n{summary or '(none yet)'}\n\nNew turns:\n{turns_text}\n\n"
+                           "Return the updated summary."
             }
         ]
+        model = model or settings.conversation_summary_model or settings.chairman_model
+        return await self.get_completion(
+            model, messages, temperature=0.3, max_tokens=settings.conversation_summary_tokens, stage="summary"
+        )
+    
+    def _review_scoreboard(self, reviews: List[Dict[str, Any]], aggregate: Dict[str, Any]) -> str:
+        """
+        Aggregated ranks plus one reviewer note per answer
+        
+        Each answer's note is the reasoning of the review that ranked it best,
+        so the chairman still sees why an answer stood out without every
+        reviewer's reasoning for every answer.
+        
+        Args:
+            reviews: All review rankings
+            aggregate: RankAggregate.to_dict() output
         
-        return await self.get_completion(model=settings.chairman_model, messages=messages, max_tokens=3000)
+        Returns:
+            str: Scoreboard text for the chairman prompt
+        """
+        best: Dict[str, Dict[str, Any]] = {}
+        for review in reviews:
+            for r in review['rankings']:
+                if r['reasoning'] and (r['response_id'] not in best or r['rank'] < best[r['response_id']]['rank']):
+                    best[r['response_id']] = r
+        
+        ids = [s['response_id'] for s in aggregate['scores'] if s['response_id'] in best]
+        notes, stats = fit_texts([best[i]['reasoning'] for i in ids], settings.chairman_reasoning_token_budget)
+        record_budget("stage_3", stats)
+        
+        text = format_scoreboard(aggregate)
+        if notes:
+            text += "\n\nReviewer notes:\n" + "\n".join(
+                f"  - Response {i}: {note}" for i, note in zip(ids, notes)
+            )
+        return text
 
 
 # Global client instance
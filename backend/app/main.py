@@ -1,11 +1,32 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import hmac
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from app.config import settings
-from app.models import QueryRequest, HealthResponse
+from app.models import QueryRequest, HealthResponse, JobStatus
 from app.pipeline import pipeline
+from app.llm_client import llm_client
+from app.cache import response_cache
+from app.semantic_cache import semantic_cache
+from app.single_flight import completion_flights, pipeline_flights
+from app.batch import BatchItem, BatchRunner
+from app.rate_limiter import rate_limiter
+from app.resilience import model_health
+from app.routing import model_router
+from app.speculation import speculation_stats
+from app.usage import BudgetExceeded, RunBudget, UnknownApiKey, usage_ledger
+from app.metrics import registry
+from app.topology import TOPOLOGIES, get_topology
+from app.run_store import run_store
+from app.serialization import CompressionMiddleware, CouncilJSONResponse, dumps
+from app.jobs import JobQueueFull, job_manager
+from app.conversations import ConversationNotFound, conversation_store
+from app.shared_state import WORKER_ID, metrics_sync, state_backend
 
 # Configure logging
 logging.basicConfig(
@@ -21,8 +42,24 @@ async def lifespan(app: FastAPI):
     logger.info("Starting LLM Council API...")
     logger.info(f"Configured models: {settings.council_models}")
     logger.info(f"Chairman model: {settings.chairman_model}")
+    await llm_client.start()
+    if settings.run_store_enabled:
+        await run_store.start()
+    await conversation_store.start()
+    metrics_sync.start(registry)
+    await job_manager.start()
+    if state_backend is not None:
+        logger.info(f"Sharing state through {type(state_backend).__name__} as worker {WORKER_ID}")
     yield
     logger.info("Shutting down LLM Council API...")
+    await job_manager.stop()
+    await metrics_sync.stop()
+    await conversation_store.close()
+    await run_store.close()
+    await llm_client.close()
+    response_cache.close()
+    if state_backend is not None:
+        state_backend.close()
 
 
 # Create FastAPI app
@@ -30,7 +67,8 @@ app = FastAPI(
     title="LLM Council API",
     description="Multi-LLM consensus system with cross-review and synthesis",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=CouncilJSONResponse
 )
 
 # Configure CORS
@@ -42,6 +80,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -64,6 +105,157 @@ async def health_check():
     return health.to_dict()
 
 
+@app.get("/council", tags=["Health"])
+async def council_info():
+    """Council members, review topology and the expected Stage 2 calls of each topology"""
+    size = len(pipeline.models)
+    return {
+        "members": pipeline.models,
+        "chairman": settings.chairman_model,
+        "review_topology": pipeline.topology.name,
+        "expected_review_cost": {
+            name: get_topology(name).expected_cost(size) for name in TOPOLOGIES
+        }
+    }
+
+
+@app.get("/limits", tags=["Health"])
+async def limit_stats():
+    """Per-model rate limits, queue depth and queue wait times"""
+    return rate_limiter.stats()
+
+
+@app.get("/resilience", tags=["Health"])
+async def resilience_stats():
+    """Per-model circuit breaker state, retries, hedges and latency percentiles"""
+    return model_health.stats()
+
+
+@app.get("/routing", tags=["Health"])
+async def routing_stats():
+    """Routing settings and each candidate's p95 latency, error rate and cost per call"""
+    return model_router.stats()
+
+
+@app.get("/speculation", tags=["Health"])
+async def speculation_report():
+    """How often speculative chairman drafts were accepted, revised or cancelled, and the latency saved"""
+    return speculation_stats.stats()
+
+
+@app.get("/usage", tags=["Health"])
+async def usage_report(request: Request, tenant: Optional[str] = None):
+    """
+    Tokens and cost per day and tenant, per model, and the token budgets
+    
+    Callers see only the tenant of their X-API-Key; USAGE_ADMIN_KEY sees
+    every tenant and the per-model totals.
+    
+    Args:
+        tenant: Only this tenant's usage and budgets
+    """
+    api_key = request.headers.get("x-api-key") or ""
+    if settings.usage_admin_key and hmac.compare_digest(api_key.encode(), settings.usage_admin_key.encode()):
+        return CouncilJSONResponse(usage_ledger.report(tenant))
+    
+    own = tenant_of(request)
+    if tenant is not None and tenant != own:
+        raise HTTPException(status_code=403, detail="Usage of other tenants needs the admin key")
+    return CouncilJSONResponse(usage_ledger.report(own, include_models=False))
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Stage and model-call latencies, queue wait, tokens, retries and cache hits in Prometheus format"""
+    return PlainTextResponse(await metrics_sync.render(registry), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats", tags=["Cache"])
+async def cache_stats():
+    """Response cache and semantic cache hit/miss counters, and in-flight deduplication"""
+    return {
+        **response_cache.stats(),
+        "semantic": semantic_cache.stats(),
+        "single_flight": {
+            "enabled": settings.single_flight_enabled,
+            "pipeline": pipeline_flights.stats(),
+            "completion": completion_flights.stats()
+        }
+    }
+
+
+@app.delete("/cache", tags=["Cache"])
+async def clear_cache():
+    """Drop every cached completion"""
+    response_cache.clear()
+    semantic_cache.clear()
+    return {"cleared": True}
+
+
+async def parse_query_request(request: Request) -> QueryRequest:
+    """
+    Parse and validate the JSON body of a query request
+    
+    Args:
+        request: HTTP request containing JSON with 'query' field
+    
+    Returns:
+        QueryRequest: The validated request
+    """
+    body = await request.json()
+    
+    query_req = QueryRequest.from_dict(body)
+    is_valid, error_msg = query_req.validate()
+    
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    logger.info(f"Received query: {query_req.query[:100]}...")
+    
+    if not settings.hf_token:
+        raise HTTPException(
+            status_code=500,
+            detail="HuggingFace token not configured. Please set HF_TOKEN environment variable."
+        )
+    
+    # Checked up front so a stream fails with 404 instead of an error event
+    if query_req.conversation_id is not None and not await conversation_store.exists(query_req.conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    return query_req
+
+
+def tenant_of(request: Request) -> str:
+    """
+    Tenant of the request's X-API-Key
+    
+    Raises:
+        HTTPException: 401 when API_KEYS is set and does not name the key
+    """
+    try:
+        return usage_ledger.tenant_for(request.headers.get("x-api-key"))
+    except UnknownApiKey as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+async def admit(request: Request) -> RunBudget:
+    """
+    Admit a run for the tenant of the request's X-API-Key
+    
+    The pipeline settles the budget when the run ends; callers that do not
+    start one must settle it themselves.
+    
+    Returns:
+        RunBudget: The run's token budget
+    """
+    tenant = tenant_of(request)
+    try:
+        return await usage_ledger.admit(tenant)
+    except BudgetExceeded as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
 @app.post("/query", tags=["Query"])
 async def process_query(request: Request):
     """
@@ -76,38 +268,31 @@ async def process_query(request: Request):
     
     Args:
         request: HTTP request containing JSON with 'query' field
-        
+    
     Returns:
         Dict with all stages' results
     """
     try:
-        # Parse request body
-        body = await request.json()
-        
-        # Create and validate QueryRequest
-        query_req = QueryRequest.from_dict(body)
-        is_valid, error_msg = query_req.validate()
-        
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        logger.info(f"Received query: {query_req.query[:100]}...")
-        
-        if not settings.hf_token:
-            raise HTTPException(
-                status_code=500,
-                detail="HuggingFace token not configured. Please set HF_TOKEN environment variable."
-            )
+        query_req = await parse_query_request(request)
+        budget = await admit(request)
         
         # Run the pipeline
-        result = await pipeline.run_full_pipeline(query_req.query)
+        result = await pipeline.run_full_pipeline(
+            query_req.query,
+            bypass_cache=query_req.bypass_cache,
+            include_timings=query_req.include_timings,
+            conversation_id=query_req.conversation_id,
+            budget=budget
+        )
         
         logger.info(f"Pipeline complete in {result['processing_time']}s")
         
-        return result
-        
+        return CouncilJSONResponse(result)
+    
     except HTTPException:
         raise
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail="Conversation not found")
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -116,11 +301,326 @@ async def process_query(request: Request):
         )
 
 
+@app.post("/query/stream", tags=["Query"])
+async def stream_query(request: Request):
+    """
+    Process a user query and stream progress as Server-Sent Events
+    
+    Each Stage 1 response and Stage 2 review is sent as soon as it is ready,
+    and the chairman synthesis is streamed token by token. The final
+    "complete" event carries the same payload as POST /query.
+    
+    Args:
+        request: HTTP request containing JSON with 'query' field
+    
+    Returns:
+        StreamingResponse with a text/event-stream body
+    """
+    try:
+        query_req = await parse_query_request(request)
+        budget = await admit(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing query: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Invalid request: {str(e)}")
+    
+    async def event_source():
+        try:
+            async for event, data in pipeline.stream_full_pipeline(
+                query_req.query,
+                bypass_cache=query_req.bypass_cache,
+                include_timings=query_req.include_timings,
+                conversation_id=query_req.conversation_id,
+                budget=budget
+            ):
+                yield b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+        finally:
+            # Also when the stream fails, which skips the background task
+            budget.settle()
+    
+    # The generator never starts when the client leaves before the body is sent
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        },
+        background=BackgroundTask(budget.settle)
+    )
+
+
+@app.post("/jobs", tags=["Jobs"], status_code=202)
+async def submit_job(request: Request):
+    """
+    Queue a council run and return at once
+    
+    Body: same as POST /query. Poll GET /jobs/{job_id} for progress.
+    
+    Returns:
+        The queued job, with its id and queue position
+    """
+    query_req = await parse_query_request(request)
+    budget = await admit(request)
+    try:
+        job = job_manager.submit(
+            query_req.query,
+            query_req.bypass_cache,
+            query_req.include_timings,
+            query_req.conversation_id,
+            budget
+        )
+    except JobQueueFull as e:
+        budget.settle()
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {str(e)}", headers={"Retry-After": "5"})
+    logger.info(f"Queued job {job.id}")
+    return CouncilJSONResponse(
+        job.to_dict(job_manager.position(job)),
+        status_code=202,
+        headers={"Location": f"/jobs/{job.id}"}
+    )
+
+
+@app.get("/jobs", tags=["Jobs"])
+async def job_stats():
+    """Worker pool size, queue depth and jobs held by this worker by status"""
+    return job_manager.stats()
+
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str):
+    """
+    Status of a job with the stage results produced so far
+    
+    Returns:
+        Job dict; "partial" holds Stage 1 answers, reviews, the aggregate and
+        the synthesis streamed so far, "result" the full result once completed
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return CouncilJSONResponse(job)
+
+
+@app.delete("/jobs/{job_id}", tags=["Jobs"])
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job, stopping its outstanding model calls"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    return CouncilJSONResponse(await job_manager.cancel(job_id))
+
+
+@app.post("/conversations", tags=["Conversations"], status_code=201)
+async def create_conversation():
+    """
+    Start a server-side conversation
+    
+    Pass the returned conversation_id with POST /query, /query/stream or
+    /jobs to ask follow-up questions; the council then sees the earlier
+    turns, older ones as a running summary.
+    
+    Returns:
+        Dict with the new conversation_id
+    """
+    conversation = await conversation_store.create()
+    return CouncilJSONResponse(
+        conversation,
+        status_code=201,
+        headers={"Location": f"/conversations/{conversation['conversation_id']}"}
+    )
+
+
+@app.get("/conversations/{conversation_id}", tags=["Conversations"])
+async def get_conversation(conversation_id: str):
+    """Every turn of a conversation, its running summary and how many turns it covers"""
+    conversation = await conversation_store.get(conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return CouncilJSONResponse(conversation)
+
+
+@app.delete("/conversations/{conversation_id}", tags=["Conversations"])
+async def delete_conversation(conversation_id: str):
+    """Delete a conversation and its turns"""
+    if not await conversation_store.delete(conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"deleted": True}
+
+
+def require_run_store():
+    """Fail with 503 when run history is turned off"""
+    if not run_store.stats()["enabled"]:
+        raise HTTPException(status_code=503, detail="Run store is disabled. Set RUN_STORE_ENABLED=true.")
+
+
+@app.get("/runs", tags=["History"])
+async def list_runs(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    query: Optional[str] = None,
+    model: Optional[str] = None
+):
+    """
+    Stored runs, newest first
+    
+    Args:
+        limit: Runs per page (1-100)
+        cursor: next_cursor from the previous page
+        query: Only runs of this query (case and punctuation are ignored)
+        model: Only runs in which this model answered, reviewed or chaired
+    
+    Returns:
+        Dict with run summaries and the cursor of the next page
+    """
+    require_run_store()
+    try:
+        return CouncilJSONResponse(await run_store.list_runs(max(1, min(limit, 100)), cursor, query, model))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/runs/{run_id}", tags=["History"])
+async def get_run(run_id: str, outputs: bool = True):
+    """Full stored result of a run, with the raw output of every model call"""
+    require_run_store()
+    run = await run_store.get_run(run_id, include_outputs=outputs)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return CouncilJSONResponse(run)
+
+
+@app.post("/runs/{run_id}/replay", tags=["History"])
+async def replay_run(run_id: str, request: Request):
+    """
+    Re-run selected stages of a stored run, reusing its stored earlier stages
+    
+    Body: {"stages": ["stage_3"] | ["stage_2", "stage_3"] (default ["stage_3"]),
+           "chairman_model": str (optional), "bypass_cache": bool (optional)}
+    
+    Returns:
+        The new result, stored as a run linked to the original
+    """
+    require_run_store()
+    body = await request.json()
+    stages = body.get("stages") or ["stage_3"]
+    # Checked for strings first: unhashable items would break the set below
+    if (
+        not isinstance(stages, list)
+        or not all(isinstance(stage, str) for stage in stages)
+        or not set(stages) <= {"stage_2", "stage_3"}
+    ):
+        raise HTTPException(status_code=400, detail='stages may contain "stage_2" and "stage_3"')
+    
+    stored = await run_store.get_run(run_id, include_outputs=False)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    budget = await admit(request)
+    
+    try:
+        result = await pipeline.replay(
+            stored,
+            stages,
+            chairman_model=body.get("chairman_model"),
+            bypass_cache=bool(body.get("bypass_cache", False)),
+            budget=budget
+        )
+    finally:
+        budget.settle()
+    logger.info(f"Replayed {', '.join(result['replay']['stages'])} of run {run_id} in {result['processing_time']}s")
+    return CouncilJSONResponse(result)
+
+
+@app.post("/batch", tags=["Query"])
+async def process_batch(request: Request):
+    """
+    Run several queries through the pipeline with bounded concurrency
+    
+    Body: {"queries": [str | {"id": str, "query": str}, ...],
+           "concurrency": int (optional), "bypass_cache": bool (optional)}
+    
+    For thousands of questions use the CLI instead: python -m app.batch
+    
+    Returns:
+        Dict with per-query results in input order and a throughput report
+    """
+    body = await request.json()
+    raw_queries = body.get("queries") or []
+    
+    if not raw_queries:
+        raise HTTPException(status_code=400, detail="queries cannot be empty")
+    if len(raw_queries) > settings.batch_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_queries} queries per batch request"
+        )
+    if not settings.hf_token:
+        raise HTTPException(
+            status_code=500,
+            detail="HuggingFace token not configured. Please set HF_TOKEN environment variable."
+        )
+    
+    concurrency = body.get("concurrency", settings.batch_concurrency)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be a positive integer")
+    
+    items = []
+    for idx, raw in enumerate(raw_queries):
+        if isinstance(raw, str):
+            raw = {"query": raw}
+        if not isinstance(raw, dict):
+            raise HTTPException(status_code=400, detail=f"Query {idx}: must be a string or an object")
+        query_req = QueryRequest.from_dict(raw)
+        is_valid, error_msg = query_req.validate()
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=f"Query {idx}: {error_msg}")
+        items.append(BatchItem(id=str(raw.get("id", idx)), query=query_req.query))
+    
+    # Results are matched to their items by id
+    seen = set()
+    for item in items:
+        if item.id in seen:
+            raise HTTPException(status_code=400, detail=f"Duplicate query id: {item.id}")
+        seen.add(item.id)
+    
+    results = {}
+    runner = BatchRunner(
+        concurrency=min(concurrency, settings.batch_concurrency),
+        bypass_cache=bool(body.get("bypass_cache", False)),
+        tenant=tenant_of(request)
+    )
+    report = await runner.run(items, on_result=lambda record: results.__setitem__(record["id"], record))
+    
+    logger.info(f"Batch of {len(items)} complete in {report.wall_time:.2f}s")
+    
+    return CouncilJSONResponse({
+        "results": [results[item.id] for item in items],
+        "report": report
+    })
+
+
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=True
-    )
\ No newline at end of file
+    
+    if settings.workers > 1:
+        # Production mode: one process per worker, no reloader
+        if settings.state_backend == "local":
+            logger.warning("WORKERS > 1 needs shared state; using STATE_BACKEND=sqlite")
+            os.environ["STATE_BACKEND"] = "sqlite"
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=settings.workers
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=True
+        )
\ No newline at end of file
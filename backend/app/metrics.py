@@ -0,0 +1,271 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets (seconds) sized for LLM calls: sub-second cache hits up to
+# multi-minute chairman syntheses
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _add(total: Any, value: Any) -> Any:
+    if total is None:
+        return value
+    if isinstance(total, list):
+        return [a + b for a, b in zip(total, value)]
+    return total + value
+
+
+class Metric(ABC):
+    """Base class for a named metric with a fixed set of label names"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+    
+    @abstractmethod
+    def snapshot(self) -> Dict[LabelValues, Any]:
+        """Current value of every label set"""
+    
+    @abstractmethod
+    def samples(self, values: Dict[LabelValues, Any]) -> List[str]:
+        """Exposition lines for the given label sets and values"""
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+    
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+    
+    def samples(self, values: Dict[LabelValues, float]) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}
+    
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # One slot per bucket, then +Inf, sum
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+    
+    def snapshot(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+    
+    def samples(self, values: Dict[LabelValues, List[float]]) -> List[str]:
+        lines = []
+        for key, state in sorted(values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class GaugeCallback(Metric):
+    """Gauge whose values are read from a callback at scrape time"""
+    
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[LabelValues, float]]]
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+    
+    def snapshot(self) -> Dict[LabelValues, float]:
+        return {tuple(key): float(value) for key, value in self.callback()}
+    
+    def samples(self, values: Dict[LabelValues, float]) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {float(value)}"
+            for key, value in values.items()
+        ]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics: List[Metric] = []
+    
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[LabelValues, float]]]
+    ) -> GaugeCallback:
+        return self.register(GaugeCallback(name, documentation, labelnames, callback))
+    
+    def snapshot(self) -> Dict[str, List[list]]:
+        """Values of every metric as JSON-serializable [labels, value] pairs"""
+        return {
+            metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for metric in self._metrics
+        }
+    
+    def render(self, others: Sequence[Dict[str, List[list]]] = ()) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+        
+        Args:
+            others: snapshot() output of other worker processes, added to this
+                process's values (counters, histograms and gauges all sum)
+        """
+        lines = []
+        for metric in self._metrics:
+            values = metric.snapshot()
+            for other in others:
+                for key, value in other.get(metric.name, []):
+                    key = tuple(key)
+                    values[key] = _add(values.get(key), value)
+            lines.extend(metric.header())
+            lines.extend(metric.samples(values))
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics recorded by the pipeline and LLM client
+registry = MetricsRegistry()
+
+pipeline_duration = registry.histogram(
+    "council_pipeline_duration_seconds",
+    "Wall time of a full council run"
+)
+stage_duration = registry.histogram(
+    "council_stage_duration_seconds",
+    "Wall time of each pipeline stage",
+    ["stage"]
+)
+llm_call_duration = registry.histogram(
+    "council_llm_call_duration_seconds",
+    "Latency of upstream model calls, including retries and queueing",
+    ["model", "stage"]
+)
+llm_queue_wait = registry.histogram(
+    "council_llm_queue_wait_seconds",
+    "Time spent waiting for a rate-limit or concurrency slot",
+    ["model"]
+)
+llm_calls = registry.counter(
+    "council_llm_calls_total",
+    "Model calls by outcome (ok, error, timeout, cache_hit, coalesced)",
+    ["model", "stage", "outcome"]
+)
+llm_tokens = registry.counter(
+    "council_llm_tokens_total",
+    "Tokens spent on upstream calls",
+    ["model", "stage", "type"]
+)
+llm_retries = registry.counter(
+    "council_llm_retries_total",
+    "Retried upstream calls",
+    ["model"]
+)
+cache_lookups = registry.counter(
+    "council_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+)
+prompt_budget_tokens = registry.counter(
+    "council_prompt_budget_tokens_total",
+    "Tokens of answers and reasoning embedded in review/chairman prompts, before and after budgeting",
+    ["stage", "kind"]
+)
+ranking_parses = registry.counter(
+    "council_ranking_parse_total",
+    "Review replies by the parser strategy that recovered their rankings (or failed)",
+    ["strategy"]
+)
+pipeline_paths = registry.counter(
+    "council_pipeline_path_total",
+    "Pipeline runs by path: full, or an early exit when Stage 1 answers agreed",
+    ["path"]
+)
+single_flight_calls = registry.counter(
+    "council_single_flight_total",
+    "Callers of identical in-flight work: leaders started it, followers joined it, remote followers got it from another worker",
+    ["level", "role"]
+)
@@ -11,34 +11,87 @@ class Stage(str, Enum):
     COMPLETE = "complete"
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryRequest:
     """User query request"""
     query: str
+    bypass_cache: bool = False
+    include_timings: bool = False
+    conversation_id: Optional[str] = None  # Continue this conversation
     
     @classmethod
     def from_dict(cls, data: dict):
-        return cls(query=data.get("query", ""))
+        return cls(
+            query=data.get("query", ""),
+            bypass_cache=bool(data.get("bypass_cache", False)),
+            include_timings=bool(data.get("include_timings", False)),
+            conversation_id=data.get("conversation_id") or None
+        )
     
     def validate(self) -> tuple[bool, Optional[str]]:
         """Validate the request"""
         if not self.query or not self.query.strip():
             return False, "Query cannot be empty"
+        if self.conversation_id is not None and not isinstance(self.conversation_id, str):
+            return False, "conversation_id must be a string"
         return True, None
 
 
-@dataclass
+class ResponseStatus(str, Enum):
+    """Outcome of a single model call"""
+    OK = "ok"
+    ERROR = "error"
+    TIMEOUT = "timeout"
+    DROPPED = "dropped"  # Still running when the Stage 1 quorum was reached
+
+
+class PipelinePath(str, Enum):
+    """Which stages a run went through"""
+    FULL = "full"
+    SKIP_REVIEW = "skip_review"  # Answers agreed or budget short; chairman without reviews
+    DIRECT = "direct_answer"  # Answers agreed or budget short; most representative answer returned
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a submitted council job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass(frozen=True, slots=True)
 class LLMResponse:
     """Individual LLM response"""
     model_name: str
     response: str
     model_id: str
+    status: str = ResponseStatus.OK.value
+    
+    @property
+    def is_ok(self) -> bool:
+        return self.status == ResponseStatus.OK.value
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            model_name=data["model_name"],
+            response=data["response"],
+            model_id=data["model_id"],
+            status=data.get("status", ResponseStatus.OK.value)
+        )
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "model_name": self.model_name,
+            "response": self.response,
+            "model_id": self.model_id,
+            "status": self.status
+        }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RankingEntry:
     """Single ranking entry from an LLM"""
     response_id: str
@@ -46,15 +99,25 @@ class RankingEntry:
     reasoning: str
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {"response_id": self.response_id, "rank": self.rank, "reasoning": self.reasoning}
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ReviewResponse:
     """LLM's review of other responses"""
     reviewer_model: str
     rankings: List[RankingEntry]
     
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            reviewer_model=data["reviewer_model"],
+            rankings=[
+                RankingEntry(response_id=r["response_id"], rank=r["rank"], reasoning=r.get("reasoning", ""))
+                for r in data["rankings"]
+            ]
+        )
+    
     def to_dict(self) -> dict:
         return {
             "reviewer_model": self.reviewer_model,
@@ -62,17 +125,93 @@ class ReviewResponse:
         }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class AggregateScore:
+    """Aggregated standing of one Stage 1 answer across all reviews"""
+    response_id: str
+    model_name: str
+    consensus_rank: int  # Position in the Kemeny consensus order
+    borda: float  # Mean normalized Borda points, 1.0 = always ranked first
+    copeland: int  # Pairwise majority wins minus losses
+    bradley_terry: float  # Strength; strengths of all answers sum to 1
+    mean_rank: float
+    reviews: int  # Reviews that ranked this answer
+    
+    def to_dict(self) -> dict:
+        return {
+            "response_id": self.response_id,
+            "model_name": self.model_name,
+            "consensus_rank": self.consensus_rank,
+            "borda": self.borda,
+            "copeland": self.copeland,
+            "bradley_terry": self.bradley_terry,
+            "mean_rank": self.mean_rank,
+            "reviews": self.reviews
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class RankAggregate:
+    """Consensus of the Stage 2 reviews"""
+    scores: List[AggregateScore]
+    # Mean pairwise Kendall tau between reviewers (1 = identical rankings);
+    # None with fewer than two overlapping reviews
+    agreement: Optional[float]
+    reviewers: int
+    
+    def to_dict(self) -> dict:
+        return {
+            "scores": [s.to_dict() for s in self.scores],
+            "agreement": self.agreement,
+            "reviewers": self.reviewers
+        }
+
+
+@dataclass(frozen=True, slots=True)
 class FinalResponse:
     """Chairman's final synthesized response"""
     content: str
     chairman_model: str
+    status: str = ResponseStatus.OK.value
+    
+    def to_dict(self) -> dict:
+        return {"content": self.content, "chairman_model": self.chairman_model, "status": self.status}
+
+
+@dataclass(slots=True)
+class CallTiming:
+    """Latency, queueing and token usage of one model call"""
+    model: str
+    stage: str
+    latency: float = 0.0
+    queue_wait: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    cache_hit: bool = False
+    coalesced: bool = False  # Served by an identical call already in flight
+    cached_prompt_tokens: int = 0  # Prompt tokens the provider served from its prefix cache
+    usage_estimated: bool = False  # Token counts are local estimates, not the provider's
+    status: str = ResponseStatus.OK.value
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "model": self.model,
+            "stage": self.stage,
+            "latency": round(self.latency, 3),
+            "queue_wait": round(self.queue_wait, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "retries": self.retries,
+            "cache_hit": self.cache_hit,
+            "coalesced": self.coalesced,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "usage_estimated": self.usage_estimated,
+            "status": self.status
+        }
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PipelineResponse:
     """Complete pipeline response"""
     query: str
@@ -80,18 +219,87 @@ class PipelineResponse:
     stage_2_reviews: List[ReviewResponse]
     stage_3_final: FinalResponse
     processing_time: float
+    stage_timings: Dict[str, float] = field(default_factory=dict)
+    review_cost: Dict[str, Any] = field(default_factory=dict)
+    prompt_budget: Dict[str, Any] = field(default_factory=dict)
+    aggregate: Optional[RankAggregate] = None
+    path: str = PipelinePath.FULL.value
+    stage_1_agreement: Optional[float] = None
+    timings: Optional[Dict[str, Any]] = None
+    routing: Optional[Dict[str, Any]] = None
+    speculation: Optional[Dict[str, Any]] = None
     
     def to_dict(self) -> dict:
-        return {
+        data = {
             "query": self.query,
             "stage_1_responses": [r.to_dict() for r in self.stage_1_responses],
             "stage_2_reviews": [r.to_dict() for r in self.stage_2_reviews],
             "stage_3_final": self.stage_3_final.to_dict(),
-            "processing_time": self.processing_time
+            "processing_time": self.processing_time,
+            "stage_timings": self.stage_timings,
+            "review_cost": self.review_cost,
+            "prompt_budget": self.prompt_budget,
+            "aggregate": self.aggregate.to_dict() if self.aggregate is not None else None,
+            "path": self.path,
+            "stage_1_agreement": self.stage_1_agreement
         }
+        if self.timings is not None:
+            data["timings"] = self.timings
+        if self.routing is not None:
+            data["routing"] = self.routing
+        if self.speculation is not None:
+            data["speculation"] = self.speculation
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class ConversationTurn:
+    """One question of a conversation and the council's final answer"""
+    query: str
+    answer: str
+    run_id: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        return {"query": self.query, "answer": self.answer, "run_id": self.run_id}
+
+
+@dataclass(frozen=True, slots=True)
+class ConversationHistory:
+    """
+    Earlier turns sent along with a follow-up question
+    
+    Turns older than the recent window are folded into summary; the recent
+    ones are sent verbatim.
+    """
+    conversation_id: str
+    summary: str = ""
+    turns: List[ConversationTurn] = field(default_factory=list)
+    total_turns: int = 0
+    
+    def system_context(self) -> str:
+        """Text appended to a system prompt; empty before the first fold"""
+        if not self.summary:
+            return ""
+        return f"\n\nSummary of the earlier conversation:\n{self.summary}"
+    
+    def messages(self) -> List[Dict[str, str]]:
+        """Recent turns as alternating user/assistant messages"""
+        messages = []
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.query})
+            messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+    
+    def brief(self) -> str:
+        """Summary and recent questions, for prompts that do not need the answers"""
+        lines = []
+        if self.summary:
+            lines.append(f"Summary: {self.summary}")
+        lines.extend(f"Earlier question: {turn.query}" for turn in self.turns)
+        return "\n".join(lines)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HealthResponse:
     """Health check response"""
     status: str
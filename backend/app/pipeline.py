@@ -1,161 +1,571 @@
 import asyncio
 import json
 import logging
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Awaitable, Tuple, Optional, Callable, AsyncIterator
+from app.agreement import AgreementDetector
+from app.aggregation import aggregate_rankings
 from app.config import settings
 from app.llm_client import llm_client
-from app.models import LLMResponse, ReviewResponse, RankingEntry, FinalResponse
+from app.context import RunContext, get_run_context, set_run_context, reset_run_context
+from app.conversations import ConversationNotFound, conversation_store
+from app.metrics import cache_lookups, pipeline_duration, pipeline_paths, ranking_parses, stage_duration
+from app.prompt_budget import budget_report
+from app.ranking_parser import parse_rankings
+from app.routing import model_router
+from app.run_store import run_outputs, run_store
+from app.semantic_cache import semantic_cache
+from app.single_flight import pipeline_flights
+from app.speculation import SpeculativeDraft, speculation_stats
+from app.topology import ReviewAssignment, anonymous_id, get_topology
+from app.usage import ANONYMOUS, RunBudget, run_usage
+from app.models import (
+    LLMResponse, ReviewResponse, RankingEntry, FinalResponse, PipelineResponse,
+    PipelinePath, RankAggregate, ResponseStatus, Stage, ConversationHistory, ConversationTurn
+)
 
 logger = logging.getLogger(__name__)
 
+# Progress callback: receives an event name and a JSON-serializable payload
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
 
 class LLMCouncilPipeline:
     """3-stage pipeline for LLM Council processing"""
     
     def __init__(self):
         self.models = settings.council_models
+        self.topology = get_topology()
+    
+    def _emit(self, on_event: Optional[EventCallback], event: str, data: Dict[str, Any]):
+        """Forward a progress event to the caller, if it asked for them"""
+        if on_event is not None:
+            on_event(event, data)
+    
+    def _members(self) -> List[str]:
+        """Council of the current run: the router's pick, or the configured members"""
+        return get_run_context().members or self.models
+    
+    def _task_outcome(self, task: asyncio.Task) -> Tuple[str, Any]:
+        """
+        Classify a finished (or cancelled) model call
+        
+        Returns:
+            (status, result or exception); cancelled calls count as timeouts
+        """
+        if task.cancelled():
+            return ResponseStatus.TIMEOUT.value, asyncio.TimeoutError()
+        if isinstance(task.exception(), asyncio.TimeoutError):
+            return ResponseStatus.TIMEOUT.value, task.exception()
+        if task.exception() is not None:
+            return ResponseStatus.ERROR.value, task.exception()
+        return ResponseStatus.OK.value, task.result()
+    
+    def _start_call(self, coro: Awaitable) -> asyncio.Task:
+        """Start a model call as a task under the per-call deadline"""
+        return asyncio.create_task(asyncio.wait_for(coro, settings.model_timeout))
+    
+    async def _gather_with_deadline(
+        self,
+        coros: Dict[str, Awaitable],
+        stage_timeout: float,
+        on_done: Optional[Callable[[str, str, Any], None]] = None
+    ) -> Dict[str, Tuple[str, Any]]:
+        """
+        Run coroutines concurrently with a per-call and a per-stage deadline
+        
+        Args:
+            coros: Coroutines keyed by model name
+            stage_timeout: Seconds after which unfinished calls are cancelled
+            on_done: Optional callback invoked with (key, status, result) as
+                soon as each call finishes, times out or fails
+        
+        Returns:
+            Dict mapping each key to (status, result or exception)
+        """
+        tasks = {self._start_call(coro): key for key, coro in coros.items()}
+        outcomes = {}
+        
+        def record(task: asyncio.Task):
+            key = tasks[task]
+            outcomes[key] = self._task_outcome(task)
+            if on_done is not None:
+                on_done(key, *outcomes[key])
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + stage_timeout
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    record(task)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        for task in pending:
+            record(task)
+        
+        return {key: outcomes[key] for key in coros}
     
-    async def stage_1_initial_responses(self, query: str) -> List[LLMResponse]:
+    async def stage_1_initial_responses(
+        self,
+        query: str,
+        on_event: Optional[EventCallback] = None
+    ) -> List[LLMResponse]:
         """
         Stage 1: Get initial responses from all LLMs in parallel
         
+        Models that miss their deadline are returned with a "timeout" status
+        and are left out of the later stages.
+        
         Args:
             query: User's question
-            
+            on_event: Optional callback receiving a "stage_1_response" event
+                as soon as each model finishes
+        
         Returns:
             List of LLMResponse objects
         """
         logger.info("Stage 1: Getting initial responses from all models")
         
-        # Create tasks for parallel execution
-        tasks = []
-        for idx, model in enumerate(self.models):
-            task = llm_client.get_initial_response(model, query)
-            tasks.append((model, idx, task))
+        members = self._members()
+        model_ids = {model: anonymous_id(idx) for idx, model in enumerate(members)}  # A, B, C, ...
+        responses_by_model = {}
         
-        # Wait for all responses
-        responses = []
-        for model, idx, task in tasks:
-            try:
-                response_text = await task
-                responses.append(LLMResponse(
-                    model_name=model,
-                    response=response_text,
-                    model_id=chr(65 + idx)  # A, B, C
-                ))
-            except Exception as e:
-                logger.error(f"Error getting response from {model}: {str(e)}")
-                # Add error response
-                responses.append(LLMResponse(
-                    model_name=model,
-                    response=f"Error: Failed to get response from this model. {str(e)}",
-                    model_id=chr(65 + idx)
-                ))
-        
-        logger.info(f"Stage 1 complete: Received {len(responses)} responses")
+        def collect(model: str, status: str, result: Any):
+            response = self._initial_response(model, model_ids[model], status, result)
+            responses_by_model[model] = response
+            self._emit(on_event, "stage_1_response", response.to_dict())
+        
+        await self._gather_with_deadline(
+            {model: llm_client.get_initial_response(model, query) for model in members},
+            settings.stage_1_timeout,
+            on_done=collect
+        )
+        
+        responses = [responses_by_model[model] for model in members]
+        
+        ok_count = sum(1 for resp in responses if resp.is_ok)
+        logger.info(f"Stage 1 complete: {ok_count}/{len(responses)} responses succeeded")
         return responses
     
+    def _initial_response(self, model: str, model_id: str, status: str, result: Any) -> LLMResponse:
+        """
+        Turn the outcome of a Stage 1 call into an LLMResponse
+        
+        Args:
+            model: Model that was asked
+            model_id: Anonymous id (A, B, C, ...) shown to reviewers
+            status: ResponseStatus value of the call
+            result: Response text, or the exception for failed calls
+        
+        Returns:
+            LLMResponse with an error message as the text for failed calls
+        """
+        if status == ResponseStatus.OK.value:
+            response_text = result
+        elif status == ResponseStatus.TIMEOUT.value:
+            logger.warning(f"Response from {model} timed out")
+            response_text = "Error: This model did not respond before the deadline."
+        elif status == ResponseStatus.DROPPED.value:
+            logger.info(f"Dropped response from {model}: quorum already reached")
+            response_text = "Error: This model was dropped after the quorum of answers was reached."
+        else:
+            logger.error(f"Error getting response from {model}: {str(result)}")
+            response_text = f"Error: Failed to get response from this model. {str(result)}"
+        
+        return LLMResponse(
+            model_name=model,
+            response=response_text,
+            model_id=model_id,
+            status=status
+        )
+    
     async def stage_2_cross_review(
         self, 
         query: str, 
-        initial_responses: List[LLMResponse]
+        initial_responses: List[LLMResponse],
+        on_event: Optional[EventCallback] = None
     ) -> List[ReviewResponse]:
         """
-        Stage 2: Each LLM reviews and ranks other LLMs' responses
+        Stage 2: Review and rank the Stage 1 responses
+        
+        Who reviews which responses is decided by the configured review
+        topology (see app/topology.py). Only successful responses are
+        reviewed, and members whose Stage 1 call failed do not review. Reviews
+        run concurrently under the stage deadline; multi-round topologies run
+        one round after another within it.
         
         Args:
             query: Original user query
             initial_responses: List of initial responses from stage 1
-            
+            on_event: Optional callback receiving a "stage_2_review" event as
+                soon as each review is parsed
+        
         Returns:
             List of ReviewResponse objects
         """
-        logger.info("Stage 2: Cross-review and ranking")
+        logger.info(f"Stage 2: Cross-review and ranking ({self.topology.name})")
         
-        reviews = []
+        responses = {resp.model_name: resp for resp in initial_responses}
+        finished: Dict[str, Optional[ReviewResponse]] = {}
+        started: List[str] = []
         
-        for reviewer_idx, reviewer_model in enumerate(self.models):
-            try:
-                # Create anonymized list excluding the reviewer's own response
-                anonymized = []
-                for resp in initial_responses:
-                    # Skip the reviewer's own response
-                    if resp.model_name == reviewer_model:
-                        continue
-                    
-                    anonymized.append({
-                        "id": resp.model_id,
-                        "content": resp.response
-                    })
-                
-                if len(anonymized) < 2:
-                    logger.warning(f"Not enough responses for {reviewer_model} to review")
-                    continue
-                
-                # Get review
-                review_text = await llm_client.get_review_rankings(
-                    reviewer_model, 
-                    query, 
-                    anonymized
-                )
-                
-                # Parse JSON response
-                rankings = self._parse_ranking_response(review_text)
-                
-                if rankings:
-                    reviews.append(ReviewResponse(
-                        reviewer_model=reviewer_model,
-                        rankings=rankings
-                    ))
-                else:
-                    logger.warning(f"Could not parse rankings from {reviewer_model}")
-                
-            except Exception as e:
-                logger.error(f"Error during review by {reviewer_model}: {str(e)}")
+        reviewers: Dict[str, str] = {}
+        expected_ids: Dict[str, List[str]] = {}
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.stage_2_timeout
+        
+        def collect(key: str, status: str, result: Any):
+            review = self._review_response(reviewers[key], status, result, expected_ids[key])
+            finished[key] = review
+            if review is not None:
+                self._emit(on_event, "stage_2_review", review.to_dict())
+        
+        # One round for static topologies; more for multi-round ones
+        while True:
+            ready = self._ready_reviews(list(responses), responses, finished, started)
+            remaining = deadline - loop.time()
+            if not ready or remaining <= 0:
+                break
+            
+            reviewers.update({assignment.key: assignment.reviewer for assignment, _ in ready})
+            expected_ids.update({
+                assignment.key: [resp["id"] for resp in anonymized] for assignment, anonymized in ready
+            })
+            await self._gather_with_deadline(
+                {
+                    assignment.key: llm_client.get_review_rankings(assignment.reviewer, query, anonymized)
+                    for assignment, anonymized in ready
+                },
+                remaining,
+                on_done=collect
+            )
+        
+        reviews = [finished[key] for key in started if finished.get(key) is not None]
         
         logger.info(f"Stage 2 complete: Received {len(reviews)} reviews")
         return reviews
     
-    def _parse_ranking_response(self, response_text: str) -> List[RankingEntry]:
+    def _ready_reviews(
+        self,
+        members: List[str],
+        responses: Dict[str, LLMResponse],
+        finished: Dict[str, Optional[ReviewResponse]],
+        started: List[str]
+    ) -> List[Tuple[ReviewAssignment, List[Dict[str, str]]]]:
+        """
+        Review calls whose inputs are all available and that have not started
+        
+        Assignments that can never run (their member reviewer failed, or too
+        few of their answers succeeded) are marked started and finished with
+        no review, so multi-round topologies can move on.
+        
+        Args:
+            members: Council members the topology plans reviews for
+            responses: Settled Stage 1 responses by model
+            finished: Finished review calls by assignment key, updated in place
+            started: Keys of review calls already started, updated in place
+        
+        Returns:
+            List of (assignment, anonymized responses) to start now
+        """
+        ready = []
+        for assignment in self.topology.assignments(members, responses, finished):
+            if assignment.key in started:
+                continue
+            if any(model not in responses for model in assignment.reviewees):
+                continue
+            
+            own = responses.get(assignment.reviewer)
+            if assignment.member_review and own is not None and not own.is_ok:
+                anonymized = None
+            else:
+                anonymized = self._review_inputs(
+                    assignment.reviewer,
+                    [responses[model] for model in assignment.reviewees]
+                )
+            
+            started.append(assignment.key)
+            if anonymized is None:
+                finished[assignment.key] = None
+                continue
+            ready.append((assignment, anonymized))
+        return ready
+    
+    def _review_inputs(
+        self,
+        reviewer_model: str,
+        reviewees: List[LLMResponse]
+    ) -> Optional[List[Dict[str, str]]]:
+        """
+        Anonymized responses for a reviewer to rank
+        
+        Args:
+            reviewer_model: Model doing the reviewing
+            reviewees: Stage 1 responses assigned to this reviewer
+        
+        Returns:
+            The successful responses keyed by their anonymous ids, or None
+            when there are fewer than two to compare
+        """
+        anonymized = [
+            {"id": resp.model_id, "content": resp.response}
+            for resp in reviewees
+            if resp.is_ok
+        ]
+        
+        if len(anonymized) < 2:
+            logger.warning(f"Not enough responses for {reviewer_model} to review")
+            return None
+        return anonymized
+    
+    def _review_response(
+        self,
+        reviewer_model: str,
+        status: str,
+        result: Any,
+        expected_ids: Optional[List[str]] = None
+    ) -> Optional[ReviewResponse]:
+        """
+        Turn the outcome of a review call into a ReviewResponse
+        
+        Rankings of ids outside expected_ids (the answers the reviewer was
+        shown) are discarded.
+        
+        Returns:
+            The parsed review, or None if the call failed or the rankings
+            could not be parsed
+        """
+        get_run_context().review_outputs.append({
+            "stage": "stage_2",
+            "model": reviewer_model,
+            "status": status,
+            "output": result if status == ResponseStatus.OK.value else str(result)
+        })
+        
+        if status == ResponseStatus.TIMEOUT.value:
+            logger.warning(f"Review by {reviewer_model} timed out")
+            return None
+        if status == ResponseStatus.ERROR.value:
+            logger.error(f"Error during review by {reviewer_model}: {str(result)}")
+            return None
+        
+        # Parse JSON response
+        rankings = self._parse_ranking_response(result, expected_ids)
+        if not rankings:
+            logger.warning(f"Could not parse rankings from {reviewer_model}")
+            return None
+        
+        return ReviewResponse(
+            reviewer_model=reviewer_model,
+            rankings=rankings
+        )
+    
+    def _parse_ranking_response(
+        self,
+        response_text: str,
+        expected_ids: Optional[List[str]] = None
+    ) -> List[RankingEntry]:
         """
         Parse JSON ranking response from LLM
         
         Args:
             response_text: Raw response from LLM
-            
+            expected_ids: Anonymous ids the reviewer was shown
+        
         Returns:
             List of RankingEntry objects or empty list if parsing fails
         """
+        result = parse_rankings(response_text, expected_ids)
+        ranking_parses.inc(strategy=result.strategy)
+        if result.strategy not in ("direct", "failed"):
+            logger.info(f"Recovered rankings with the {result.strategy} parser")
+        return result.rankings
+    
+    async def stage_1_and_2_dataflow(
+        self,
+        query: str,
+        on_event: Optional[EventCallback] = None,
+        early_start: bool = True,
+        quorum: int = 0,
+        hold_reviews: Optional[Callable[[List[LLMResponse], bool], bool]] = None,
+        on_stage_1_done: Optional[Callable[[List[LLMResponse]], None]] = None
+    ) -> Tuple[List[LLMResponse], List[ReviewResponse], Dict[str, float]]:
+        """
+        Stages 1 and 2 scheduled as a dataflow graph instead of two barriers
+        
+        A review only needs the answers the review topology assigns to it, so
+        with early_start each review is started the moment those answers have
+        settled, while the reviewer's own answer (often the slowest one) may
+        still be running. If that answer then fails, the review is cancelled
+        or discarded so the result matches the sequential stages.
+        
+        With a quorum of k, Stage 1 stops as soon as k answers succeeded and
+        the remaining calls are cancelled and marked "dropped".
+        
+        hold_reviews lets the caller keep reviews from starting: it is called
+        with the settled responses and whether Stage 1 is complete, and no
+        review starts while it returns True. If it still returns True once
+        Stage 1 is complete, Stage 2 is skipped.
+        
+        Args:
+            query: User's question
+            on_event: Optional progress callback, see stream_full_pipeline
+            early_start: Start reviews before every Stage 1 answer is in
+            quorum: Successful answers to wait for; 0 waits for every model
+            hold_reviews: Optional predicate holding reviews back, see above
+            on_stage_1_done: Optional callback receiving the Stage 1
+                responses once every answer has settled
+        
+        Returns:
+            (Stage 1 responses, reviews, stage timings)
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        stage_1_deadline = start + settings.stage_1_timeout
+        stage_2_deadline = None
+        stage_1_done_at = None
+        first_review_at = None
+        
+        members = self._members()
+        model_ids = {model: anonymous_id(idx) for idx, model in enumerate(members)}
+        responses: Dict[str, LLMResponse] = {}
+        finished: Dict[str, Optional[ReviewResponse]] = {}
+        started: List[str] = []
+        answer_tasks = {
+            self._start_call(llm_client.get_initial_response(model, query)): model
+            for model in members
+        }
+        scheduled: Dict[str, ReviewAssignment] = {}
+        review_tasks: Dict[asyncio.Task, ReviewAssignment] = {}
+        abandoned: List[asyncio.Task] = []
+        
+        def is_dropped(assignment: ReviewAssignment) -> bool:
+            own = responses.get(assignment.reviewer)
+            return assignment.member_review and own is not None and not own.is_ok
+        
+        def settle(model: str, status: str, result: Any):
+            response = self._initial_response(model, model_ids[model], status, result)
+            responses[model] = response
+            self._emit(on_event, "stage_1_response", response.to_dict())
+            if response.is_ok:
+                return
+            # Failed members do not review: drop reviews they started early
+            for key, assignment in scheduled.items():
+                if is_dropped(assignment):
+                    finished[key] = None
+            for task, assignment in review_tasks.items():
+                if is_dropped(assignment):
+                    task.cancel()
+        
+        def drop_pending(status: str):
+            for task, model in list(answer_tasks.items()):
+                task.cancel()
+                abandoned.append(task)
+                del answer_tasks[task]
+                settle(model, status, asyncio.TimeoutError())
+        
+        def start_ready_reviews():
+            nonlocal first_review_at
+            for assignment, anonymized in self._ready_reviews(members, responses, finished, started):
+                if first_review_at is None:
+                    first_review_at = loop.time()
+                    self._emit(on_event, "stage", {"stage": Stage.REVIEW.value})
+                task = self._start_call(
+                    llm_client.get_review_rankings(assignment.reviewer, query, anonymized)
+                )
+                review_tasks[task] = assignment
+                scheduled[assignment.key] = assignment
+        
         try:
-            # Try to find JSON in the response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx == -1 or end_idx == 0:
-                return []
-            
-            json_text = response_text[start_idx:end_idx]
-            data = json.loads(json_text)
-            
-            rankings = []
-            for ranking_data in data.get('rankings', []):
-                rankings.append(RankingEntry(
-                    response_id=ranking_data['response_id'],
-                    rank=ranking_data['rank'],
-                    reasoning=ranking_data['reasoning']
-                ))
-            
-            return rankings
-            
-        except Exception as e:
-            logger.error(f"Error parsing ranking response: {str(e)}")
-            return []
+            while answer_tasks or review_tasks:
+                deadline = stage_1_deadline if answer_tasks else stage_2_deadline
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    if not answer_tasks:
+                        break
+                    drop_pending(ResponseStatus.TIMEOUT.value)
+                else:
+                    done, _ = await asyncio.wait(
+                        set(answer_tasks) | set(review_tasks),
+                        timeout=remaining,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task in answer_tasks:
+                            settle(answer_tasks.pop(task), *self._task_outcome(task))
+                            continue
+                        assignment = review_tasks.pop(task)
+                        if is_dropped(assignment):
+                            finished[assignment.key] = None
+                            continue
+                        review = self._review_response(
+                            assignment.reviewer,
+                            *self._task_outcome(task),
+                            [responses[model].model_id for model in assignment.reviewees]
+                        )
+                        finished[assignment.key] = review
+                        if review is not None:
+                            self._emit(on_event, "stage_2_review", review.to_dict())
+                
+                if quorum and answer_tasks:
+                    if sum(1 for resp in responses.values() if resp.is_ok) >= quorum:
+                        drop_pending(ResponseStatus.DROPPED.value)
+                
+                if not answer_tasks and stage_1_done_at is None:
+                    stage_1_done_at = loop.time()
+                    stage_2_deadline = stage_1_done_at + settings.stage_2_timeout
+                    ok_count = sum(1 for resp in responses.values() if resp.is_ok)
+                    logger.info(f"Stage 1 complete: {ok_count}/{len(members)} responses succeeded")
+                    if on_stage_1_done is not None:
+                        on_stage_1_done([responses[model] for model in members])
+                
+                if early_start or not answer_tasks:
+                    held = hold_reviews is not None and hold_reviews(list(responses.values()), not answer_tasks)
+                    if not held:
+                        start_ready_reviews()
+        finally:
+            pending = abandoned + list(answer_tasks) + list(review_tasks)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        if review_tasks:
+            logger.warning(f"{len(review_tasks)} reviews missed the Stage 2 deadline")
+        
+        end = loop.time()
+        if stage_1_done_at is None:
+            stage_1_done_at = end
+        timings = {
+            "stage_1": round(stage_1_done_at - start, 3),
+            # Time Stage 2 added after the last Stage 1 answer
+            "stage_2": round(end - stage_1_done_at, 3)
+        }
+        if first_review_at is not None and first_review_at < stage_1_done_at:
+            timings["stage_2_overlap"] = round(stage_1_done_at - first_review_at, 3)
+        
+        ordered_reviews = [finished[key] for key in started if finished.get(key) is not None]
+        logger.info(f"Stage 2 complete: Received {len(ordered_reviews)} reviews")
+        return [responses[model] for model in members], ordered_reviews, timings
     
     async def stage_3_chairman_synthesis(
         self,
         query: str,
         initial_responses: List[LLMResponse],
-        reviews: List[ReviewResponse]
+        reviews: List[ReviewResponse],
+        on_event: Optional[EventCallback] = None,
+        aggregate: Optional[RankAggregate] = None,
+        chairman_model: Optional[str] = None
     ) -> FinalResponse:
         """
         Stage 3: Chairman synthesizes all responses and reviews
@@ -164,93 +574,670 @@ class LLMCouncilPipeline:
             query: Original user query
             initial_responses: All initial responses
             reviews: All review rankings
-            
+            on_event: Optional callback; when set the synthesis is streamed and
+                every content delta is sent as a "stage_3_token" event
+            aggregate: Aggregated review rankings for the chairman's scoreboard
+            chairman_model: Model to synthesize with; defaults to the run's
+                routed chairman, then settings.chairman_model
+        
         Returns:
             FinalResponse object
         """
         logger.info("Stage 3: Chairman synthesis")
+        chairman_model = chairman_model or get_run_context().chairman or settings.chairman_model
         
-        # Prepare data for chairman
-        responses_data = [
-            {
-                "model_id": resp.model_id,
-                "model_name": resp.model_name,
-                "response": resp.response
-            }
-            for resp in initial_responses
-        ]
+        # Timed-out and failed models are not shown to the chairman
+        successful = [resp for resp in initial_responses if resp.is_ok]
+        responses_data = self._chairman_responses(successful)
         
-        reviews_data = [
-            {
-                "reviewer_model": review.reviewer_model,
-                "rankings": [
-                    {
-                        "response_id": r.response_id,
-                        "rank": r.rank,
-                        "reasoning": r.reasoning
-                    }
-                    for r in review.rankings
-                ]
-            }
-            for review in reviews
-        ]
+        if not responses_data:
+            logger.warning("Stage 3 skipped: no successful responses to synthesize")
+            return FinalResponse(
+                content="Error during synthesis. No responses available.",
+                chairman_model=chairman_model,
+                status=ResponseStatus.ERROR.value
+            )
+        
+        reviews_data = [review.to_dict() for review in reviews]
         
         # Get chairman's synthesis
         try:
+            on_token = None
+            if on_event is not None:
+                on_token = lambda delta: on_event("stage_3_token", {"content": delta})
+            
             final_content = await llm_client.get_chairman_synthesis(
                 query,
                 responses_data,
-                reviews_data
+                reviews_data,
+                on_token=on_token,
+                aggregate=aggregate.to_dict() if aggregate is not None else None,
+                model=chairman_model
             )
             
             return FinalResponse(
                 content=final_content,
-                chairman_model=settings.chairman_model
+                chairman_model=chairman_model
             )
-            
+        
         except Exception as e:
             logger.error(f"Error during chairman synthesis: {str(e)}")
             # Fallback: return first response
             return FinalResponse(
-                content=f"Error during synthesis. Fallback response:\n\n{initial_responses[0].response if initial_responses else 'No responses available.'}",
-                chairman_model=settings.chairman_model
+                content=f"Error during synthesis. Fallback response:\n\n{successful[0].response if successful else 'No responses available.'}",
+                chairman_model=chairman_model,
+                status=ResponseStatus.ERROR.value
+            )
+    
+    def _chairman_responses(self, successful: List[LLMResponse]) -> List[Dict[str, str]]:
+        """Stage 1 answers as the chairman prompts take them"""
+        return [
+            {
+                "model_id": resp.model_id,
+                "model_name": resp.model_name,
+                "response": resp.response
+            }
+            for resp in successful
+        ]
+    
+    def _start_draft(self, query: str, responses: List[LLMResponse]) -> Optional[SpeculativeDraft]:
+        """Start a chairman draft from the Stage 1 answers alone, before any review is in"""
+        successful = [resp for resp in responses if resp.is_ok]
+        if not successful:
+            return None
+        chairman_model = get_run_context().chairman or settings.chairman_model
+        logger.info("Stage 3: Speculative chairman draft started")
+        return SpeculativeDraft.start(
+            llm_client.get_chairman_synthesis(query, self._chairman_responses(successful), [], model=chairman_model),
+            chairman_model
+        )
+    
+    async def _speculative_synthesis(
+        self,
+        query: str,
+        initial_responses: List[LLMResponse],
+        reviews: List[ReviewResponse],
+        on_event: Optional[EventCallback],
+        aggregate: Optional[RankAggregate],
+        draft: SpeculativeDraft
+    ) -> Tuple[FinalResponse, Dict[str, Any]]:
+        """
+        Stage 3 from a speculative draft: accept it or revise it against the reviews
+        
+        A failed draft falls back to the normal synthesis; a failed revision
+        returns the draft.
+        
+        Args:
+            query: Original user query
+            initial_responses: All initial responses
+            reviews: All review rankings
+            on_event: Optional callback receiving "stage_3_token" events
+            aggregate: Aggregated review rankings
+            draft: Draft started by _start_draft
+        
+        Returns:
+            (FinalResponse, speculation block for the result)
+        """
+        reviews_in = time.monotonic()
+        try:
+            content = await draft.task
+        except Exception as e:
+            logger.warning(f"Speculative draft failed, synthesizing normally: {str(e)}")
+            speculation_stats.record("failed")
+            final = await self.stage_3_chairman_synthesis(
+                query, initial_responses, reviews, on_event, aggregate, chairman_model=draft.chairman_model
             )
+            return final, {"outcome": "failed"}
+        waited = time.monotonic() - reviews_in
+        
+        accepted, details = draft.check(content, initial_responses, aggregate)
+        outcome = "accepted"
+        if accepted:
+            logger.info("Stage 3: Speculative draft accepted")
+            self._emit(on_event, "stage_3_token", {"content": content})
+        else:
+            logger.info(f"Stage 3: Revising speculative draft (leaned on {details['draft_leaned_on']})")
+            on_token = None
+            if on_event is not None:
+                on_token = lambda delta: on_event("stage_3_token", {"content": delta})
+            try:
+                content = await llm_client.get_chairman_revision(
+                    query,
+                    content,
+                    self._chairman_responses([resp for resp in initial_responses if resp.is_ok]),
+                    [review.to_dict() for review in reviews],
+                    aggregate.to_dict(),
+                    on_token=on_token,
+                    model=draft.chairman_model
+                )
+                outcome = "revised"
+            except Exception as e:
+                logger.error(f"Error revising speculative draft, keeping the draft: {str(e)}")
+                outcome = "revision_failed"
+                self._emit(on_event, "stage_3_token", {"content": content})
+        
+        # A normal synthesis would have started now and taken about as long as the draft
+        saved = draft.latency - (time.monotonic() - reviews_in)
+        speculation_stats.record(outcome, saved)
+        return FinalResponse(content=content, chairman_model=draft.chairman_model), {
+            "outcome": outcome,
+            "draft_latency": round(draft.latency, 3),
+            "waited_for_draft": round(waited, 3),
+            "saved_seconds": round(saved, 3),
+            **details
+        }
     
-    async def run_full_pipeline(self, query: str) -> Dict[str, Any]:
+    async def run_full_pipeline(
+        self,
+        query: str,
+        on_event: Optional[EventCallback] = None,
+        bypass_cache: bool = False,
+        include_timings: bool = False,
+        conversation_id: Optional[str] = None,
+        budget: Optional[RunBudget] = None
+    ) -> Dict[str, Any]:
         """
         Run the complete 3-stage pipeline
         
         Args:
             query: User's question
-            
+            on_event: Optional progress callback, see stream_full_pipeline
+            bypass_cache: Skip cached completions and call every model
+            include_timings: Add a "timings" block with per-call latency,
+                queue wait, token usage, retries and cache hits
+            conversation_id: Ask the question as the next turn of this
+                conversation; the earlier turns go to the council with it
+            budget: Token budget from usage_ledger.admit; the run is charged
+                to its tenant and may take a cheaper path to stay within it
+        
         Returns:
             Dict containing all stages' results
+        
+        Raises:
+            ConversationNotFound: When conversation_id does not exist
+        """
+        try:
+            return await self._run_full_pipeline(query, on_event, bypass_cache, include_timings, conversation_id, budget)
+        finally:
+            if budget is not None:
+                # Every call has been charged by now; drop the admission reservation
+                budget.settle()
+    
+    async def _run_full_pipeline(
+        self,
+        query: str,
+        on_event: Optional[EventCallback],
+        bypass_cache: bool,
+        include_timings: bool,
+        conversation_id: Optional[str],
+        budget: Optional[RunBudget]
+    ) -> Dict[str, Any]:
+        """run_full_pipeline, leaving the budget's reservation to the caller"""
+        history = None
+        if conversation_id is not None:
+            history = await conversation_store.history(conversation_id)
+            if history is None:
+                raise ConversationNotFound(conversation_id)
+        
+        # A follow-up's answer depends on the conversation, not just the question
+        use_semantic_cache = settings.semantic_cache_enabled and not bypass_cache and history is None
+        if use_semantic_cache:
+            cached = self._semantic_lookup(query)
+            if cached is not None:
+                return {**cached, "usage": run_usage([], budget)}
+        
+        run = lambda emit: self._run_and_record(
+            query, emit, bypass_cache, include_timings, use_semantic_cache, history, budget
+        )
+        # A budget may send the run down a cheaper path, which no other caller asked for
+        if not settings.single_flight_enabled or (budget is not None and budget.may_degrade):
+            return await run(on_event)
+        
+        # Identical queries of one tenant arriving while this one runs share it, events included
+        turn = history.total_turns if history is not None else None
+        tenant = budget.tenant if budget is not None else None
+        flight_key = json.dumps([query.strip(), bypass_cache, include_timings, conversation_id, turn, tenant])
+        result, shared = await pipeline_flights.do(flight_key, run, on_event)
+        if shared:
+            logger.info(f"Joined in-flight council run {result['run_id']} for: {query[:100]}")
+            # The leading run was charged; joining it is free
+            return {**result, "coalesced": True, "usage": run_usage([], budget)}
+        return result
+    
+    async def _run_and_record(
+        self,
+        query: str,
+        on_event: Optional[EventCallback],
+        bypass_cache: bool,
+        include_timings: bool,
+        use_semantic_cache: bool,
+        history: Optional[ConversationHistory] = None,
+        budget: Optional[RunBudget] = None
+    ) -> Dict[str, Any]:
+        """Run the stages under a fresh run context, then store and cache the result"""
+        run_context = RunContext(bypass_cache=bypass_cache, history=history, budget=budget)
+        token = set_run_context(run_context)
+        try:
+            result = await self._run_stages(query, on_event, include_timings)
+        finally:
+            reset_run_context(token)
+        
+        result["usage"] = run_usage(run_context.calls, budget)
+        result["run_id"] = run_store.record(result, run_outputs(result, run_context.review_outputs))
+        
+        if history is not None:
+            result["conversation"] = await self._record_turn(history, query, result, budget)
+        
+        # Only cache runs that produced a real synthesis; a path one tenant's
+        # budget forced must not be served to tenants that can afford the full run
+        degraded = budget is not None and budget.path is not None
+        if use_semantic_cache and not degraded and result["stage_3_final"]["status"] == ResponseStatus.OK.value:
+            semantic_cache.store(query, result)
+        
+        return result
+    
+    async def _record_turn(
+        self,
+        history: ConversationHistory,
+        query: str,
+        result: Dict[str, Any],
+        budget: Optional[RunBudget]
+    ) -> Dict[str, Any]:
+        """
+        Append a run to its conversation
+        
+        A failed synthesis is not stored, so the next question does not
+        build on the fallback text. A summary the turn triggers is charged
+        to the run's tenant.
+        
+        Returns:
+            Dict with the conversation id and its turn count
+        """
+        final = result["stage_3_final"]
+        turns = history.total_turns
+        if final["status"] == ResponseStatus.OK.value:
+            stored = await conversation_store.add_turn(
+                history.conversation_id,
+                ConversationTurn(query=query, answer=final["content"], run_id=result["run_id"]),
+                tenant=budget.tenant if budget is not None else ANONYMOUS
+            )
+            turns = stored if stored is not None else turns
+        return {
+            "conversation_id": history.conversation_id,
+            "turns": turns,
+            "summarized": bool(history.summary),
+            "context_turns": len(history.turns)
+        }
+    
+    def _semantic_lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a stored result for a paraphrase of query, if one is cached
+        
+        Args:
+            query: User's question
+        
+        Returns:
+            Copy of the cached result annotated with the match, or None
         """
-        import time
         start_time = time.time()
+        match = semantic_cache.lookup(query)
+        cache_lookups.inc(cache="semantic", result="hit" if match is not None else "miss")
+        if match is None:
+            return None
         
-        # Stage 1: Initial responses
-        stage_1_responses = await self.stage_1_initial_responses(query)
+        cached, similarity, matched_query = match
+        logger.info(f"Semantic cache hit (similarity {similarity:.3f}) for: {matched_query[:100]}")
+        return {
+            **cached,
+            "query": query,
+            "processing_time": round(time.time() - start_time, 2),
+            "semantic_match": {
+                "matched_query": matched_query,
+                "similarity": round(similarity, 4)
+            }
+        }
+    
+    async def _run_stages(
+        self,
+        query: str,
+        on_event: Optional[EventCallback],
+        include_timings: bool = False
+    ) -> Dict[str, Any]:
+        """Run the three stages in order under the current run context"""
+        start_time = time.time()
+        stage_timings = {}
         
-        # Stage 2: Cross-review
-        stage_2_reviews = await self.stage_2_cross_review(query, stage_1_responses)
+        routing = None
+        if settings.routing_enabled:
+            routing = model_router.route(query)
+            run_context = get_run_context()
+            run_context.members = routing.members
+            run_context.chairman = routing.chairman
+            self._emit(on_event, "routing", routing.to_dict())
         
-        # Stage 3: Chairman synthesis
-        stage_3_final = await self.stage_3_chairman_synthesis(
-            query, 
-            stage_1_responses, 
-            stage_2_reviews
-        )
+        # Token budget: a run expected not to fit takes a cheaper path up front
+        budget = get_run_context().budget
+        forced_path = None
+        if budget is not None:
+            chairman = get_run_context().chairman or settings.chairman_model
+            forced_path = budget.plan(self._members(), chairman, self.topology)
+            if forced_path is not None:
+                self._emit(on_event, "budget", budget.to_dict())
+        
+        # Stages 1 and 2: Initial responses and cross-review, overlapped
+        detector = None
+        hold_reviews = None
+        if forced_path is not None:
+            # Holding reviews until Stage 1 is complete skips them
+            hold_reviews = lambda responses, done: True
+        elif settings.early_exit_enabled:
+            detector = AgreementDetector(settings.early_exit_threshold, settings.early_exit_min_answers)
+            # Reviews wait while the answers in so far still agree
+            hold_reviews = lambda responses, done: detector.update(responses) and (not done or detector.agreed)
+        
+        # Speculative synthesis: a chairman draft starts once Stage 1 is done
+        draft: Optional[SpeculativeDraft] = None
+        speculation = None
+        on_stage_1_done = None
+        if settings.speculative_synthesis and forced_path != PipelinePath.DIRECT:
+            def on_stage_1_done(responses: List[LLMResponse]):
+                nonlocal draft
+                draft = self._start_draft(query, responses)
+        
+        try:
+            self._emit(on_event, "stage", {"stage": Stage.INITIAL.value})
+            stage_1_responses, stage_2_reviews, dataflow_timings = await self.stage_1_and_2_dataflow(
+                query,
+                on_event,
+                early_start=settings.early_start_reviews,
+                quorum=settings.stage_1_quorum,
+                hold_reviews=hold_reviews,
+                on_stage_1_done=on_stage_1_done
+            )
+            stage_timings.update(dataflow_timings)
+            stage_duration.observe(dataflow_timings["stage_1"], stage="stage_1")
+            
+            path = PipelinePath.FULL
+            if detector is not None and detector.agreed:
+                path = PipelinePath.DIRECT if settings.early_exit_skip == "all" else PipelinePath.SKIP_REVIEW
+                logger.info(f"Stage 1 answers agree ({detector.score:.3f}); taking the {path.value} path")
+                self._emit(on_event, "early_exit", {"path": path.value, "agreement": round(detector.score, 4)})
+            elif forced_path is not None:
+                path = forced_path
+            else:
+                stage_duration.observe(dataflow_timings["stage_2"], stage="stage_2")
+            if path != PipelinePath.DIRECT and budget is not None and not budget.allows_synthesis():
+                path = PipelinePath.DIRECT
+                self._emit(on_event, "budget", budget.to_dict())
+            pipeline_paths.inc(path=path.value)
+            
+            aggregate = aggregate_rankings(stage_2_reviews, stage_1_responses)
+            if aggregate is not None:
+                self._emit(on_event, "stage_2_aggregate", aggregate.to_dict())
+            
+            # Stage 3: Chairman synthesis, or the most representative answer
+            self._emit(on_event, "stage", {"stage": Stage.SYNTHESIS.value})
+            stage_start = time.time()
+            representative = self._most_representative(stage_1_responses, detector) if path == PipelinePath.DIRECT else None
+            if representative is not None:
+                stage_3_final = self._direct_answer(stage_1_responses, representative, on_event)
+                if draft is not None:
+                    await draft.cancel()
+                    speculation_stats.record("cancelled")
+                    speculation = {"outcome": "cancelled"}
+            elif draft is not None:
+                stage_3_final, speculation = await self._speculative_synthesis(
+                    query,
+                    stage_1_responses,
+                    stage_2_reviews,
+                    on_event,
+                    aggregate,
+                    draft
+                )
+                stage_duration.observe(time.time() - stage_start, stage="stage_3")
+            else:
+                stage_3_final = await self.stage_3_chairman_synthesis(
+                    query, 
+                    stage_1_responses, 
+                    stage_2_reviews,
+                    on_event,
+                    aggregate
+                )
+                stage_duration.observe(time.time() - stage_start, stage="stage_3")
+            stage_timings["stage_3"] = round(time.time() - stage_start, 3)
+        finally:
+            # Also reached when the run is cancelled or fails mid-way
+            if draft is not None:
+                await draft.cancel()
         
         processing_time = time.time() - start_time
+        pipeline_duration.observe(processing_time)
+        
+        return PipelineResponse(
+            query=query,
+            stage_1_responses=stage_1_responses,
+            stage_2_reviews=stage_2_reviews,
+            stage_3_final=stage_3_final,
+            processing_time=round(processing_time, 2),
+            stage_timings=stage_timings,
+            review_cost=self._review_cost(),
+            prompt_budget=budget_report(get_run_context().prompt_budget),
+            aggregate=aggregate,
+            path=path.value,
+            stage_1_agreement=round(detector.score, 4) if detector is not None and detector.score is not None else None,
+            timings=self._timings(stage_timings) if include_timings else None,
+            routing=routing.to_dict() if routing is not None else None,
+            speculation=speculation
+        ).to_dict()
+    
+    async def replay(
+        self,
+        stored: Dict[str, Any],
+        stages: List[str],
+        chairman_model: Optional[str] = None,
+        bypass_cache: bool = False,
+        budget: Optional[RunBudget] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-run selected stages of a stored run, reusing its earlier stages
+        
+        Stage 1 answers always come from the stored run. Replaying stage_2
+        reviews them again (under the current topology) and therefore also
+        re-runs stage_3; replaying only stage_3 keeps the stored reviews, e.g.
+        to try another chairman model. The replay is stored as a new run
+        linked to the original.
+        
+        Args:
+            stored: Run loaded from the run store
+            stages: Stages to re-run: "stage_2" and/or "stage_3"
+            chairman_model: Chairman for the new synthesis; defaults to settings
+            bypass_cache: Skip cached completions and call every model
+            budget: Token budget to charge; the requested stages always run
+        
+        Returns:
+            Dict shaped like run_full_pipeline's result, with a "replay" block
+        """
+        stages = sorted(set(stages) | {"stage_3"})
+        query = stored["query"]
+        responses = [LLMResponse.from_dict(resp) for resp in stored["stage_1_responses"]]
+        reviews = [ReviewResponse.from_dict(review) for review in stored["stage_2_reviews"]]
+        
+        run_context = RunContext(bypass_cache=bypass_cache, budget=budget)
+        token = set_run_context(run_context)
+        try:
+            start_time = time.time()
+            stage_timings = {}
+            if "stage_2" in stages:
+                reviews = await self.stage_2_cross_review(query, responses)
+                stage_timings["stage_2"] = round(time.time() - start_time, 3)
+            aggregate = aggregate_rankings(reviews, responses)
+            
+            stage_start = time.time()
+            stage_3_final = await self.stage_3_chairman_synthesis(
+                query, responses, reviews, aggregate=aggregate, chairman_model=chairman_model
+            )
+            stage_timings["stage_3"] = round(time.time() - stage_start, 3)
+            
+            path = stored.get("path", PipelinePath.FULL.value)
+            if "stage_2" in stages:
+                path = PipelinePath.FULL.value
+            elif path == PipelinePath.DIRECT.value:
+                path = PipelinePath.SKIP_REVIEW.value
+            
+            result = PipelineResponse(
+                query=query,
+                stage_1_responses=responses,
+                stage_2_reviews=reviews,
+                stage_3_final=stage_3_final,
+                processing_time=round(time.time() - start_time, 2),
+                stage_timings=stage_timings,
+                review_cost=self._review_cost() if "stage_2" in stages else stored.get("review_cost", {}),
+                prompt_budget=budget_report(run_context.prompt_budget),
+                aggregate=aggregate,
+                path=path,
+                stage_1_agreement=stored.get("stage_1_agreement")
+            ).to_dict()
+        finally:
+            reset_run_context(token)
+        
+        result["usage"] = run_usage(run_context.calls, budget)
+        result["run_id"] = run_store.record(
+            result,
+            run_outputs(result, run_context.review_outputs),
+            parent_id=stored["run_id"],
+            replayed_stages=stages
+        )
+        result["replay"] = {"source_run": stored["run_id"], "stages": stages}
+        return result
+    
+    def _most_representative(self, responses: List[LLMResponse], detector: Optional[AgreementDetector]) -> Optional[str]:
+        """Member for a direct answer; without an agreeing detector, the medoid of the successful answers"""
+        if detector is None or not detector.agreed:
+            detector = AgreementDetector(threshold=0.0)
+            detector.update(responses)
+        return detector.most_representative()
+    
+    def _direct_answer(
+        self,
+        responses: List[LLMResponse],
+        model: str,
+        on_event: Optional[EventCallback]
+    ) -> FinalResponse:
+        """
+        Final answer for an early exit: the chosen member's Stage 1 answer
         
+        Args:
+            responses: Stage 1 responses
+            model: Member whose answer is most representative
+            on_event: Optional callback; the answer is sent as one "stage_3_token"
+        
+        Returns:
+            FinalResponse attributed to that member instead of the chairman
+        """
+        chosen = next(resp for resp in responses if resp.model_name == model)
+        self._emit(on_event, "stage_3_token", {"content": chosen.response})
+        return FinalResponse(content=chosen.response, chairman_model=chosen.model_name)
+    
+    def _review_cost(self) -> Dict[str, Any]:
+        """Calls and tokens Stage 2 spent under the current review topology"""
+        calls = [call for call in get_run_context().calls if call.stage == "stage_2"]
         return {
-            "query": query,
-            "stage_1_responses": [resp.to_dict() for resp in stage_1_responses],
-            "stage_2_reviews": [review.to_dict() for review in stage_2_reviews],
-            "stage_3_final": stage_3_final.to_dict(),
-            "processing_time": round(processing_time, 2)
+            "topology": self.topology.name,
+            "members": len(self._members()),
+            "calls": len(calls),
+            "prompt_tokens": sum(call.prompt_tokens for call in calls),
+            "completion_tokens": sum(call.completion_tokens for call in calls)
         }
+    
+    def _timings(self, stage_timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Summarize the model calls recorded in the current run context
+        
+        Args:
+            stage_timings: Wall time of each stage
+        
+        Returns:
+            Dict with stage wall times, every call and run totals
+        """
+        calls = get_run_context().calls
+        return {
+            "stages": stage_timings,
+            "calls": [call.to_dict() for call in calls],
+            "totals": {
+                "calls": len(calls),
+                "cache_hits": sum(1 for call in calls if call.cache_hit),
+                "retries": sum(call.retries for call in calls),
+                "queue_wait": round(sum(call.queue_wait for call in calls), 3),
+                "prompt_tokens": sum(call.prompt_tokens for call in calls),
+                "cached_prompt_tokens": sum(call.cached_prompt_tokens for call in calls),
+                "completion_tokens": sum(call.completion_tokens for call in calls)
+            }
+        }
+    
+    async def stream_full_pipeline(
+        self,
+        query: str,
+        bypass_cache: bool = False,
+        include_timings: bool = False,
+        conversation_id: Optional[str] = None,
+        budget: Optional[RunBudget] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run the pipeline and yield progress events as they happen
+        
+        Events, in order of appearance:
+            routing: the RoutingDecision when ROUTING_ENABLED is set
+            budget: the run's budget when it forced a cheaper path
+            stage: {"stage": "initial" | "review" | "synthesis"} when a stage starts
+            stage_1_response: one LLMResponse as soon as that model finishes
+            stage_2_review: one ReviewResponse as soon as it is parsed
+            stage_2_aggregate: the RankAggregate once every review is in
+            early_exit: {"path", "agreement"} when the Stage 1 answers agreed
+            stage_3_token: {"content": delta} for each streamed chairman token
+            complete: the full pipeline result, same shape as run_full_pipeline
+            error: {"detail": message} if the run failed
+        
+        Args:
+            query: User's question
+            bypass_cache: Skip cached completions and call every model
+            include_timings: Add a "timings" block to the complete event
+            conversation_id: Ask the question as the next turn of this conversation
+            budget: Token budget from usage_ledger.admit
+        
+        Yields:
+            Tuples of (event name, payload)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def run():
+            try:
+                result = await self.run_full_pipeline(
+                    query,
+                    on_event=lambda event, data: queue.put_nowait((event, data)),
+                    bypass_cache=bypass_cache,
+                    include_timings=include_timings,
+                    conversation_id=conversation_id,
+                    budget=budget
+                )
+                queue.put_nowait(("complete", result))
+            except Exception as e:
+                logger.error(f"Error in streamed pipeline: {str(e)}", exc_info=True)
+                queue.put_nowait(("error", {"detail": f"Error processing query: {str(e)}"}))
+            finally:
+                queue.put_nowait(None)
+        
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            # Client went away: stop spending upstream tokens
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
 
 
 # Global pipeline instance
@@ -0,0 +1,241 @@
+"""
+Token budgets for the answers pasted into review and chairman prompts
+
+Each prompt gets a total budget that is split across the answers it embeds.
+Short answers keep their full text and their unused share goes to the
+longer ones. An answer still over its share is compressed on the CPU:
+extractive summarization keeps its most representative sentences in their
+original order, or plain truncation keeps its beginning. Measure the
+shrink on real answers with python -m benchmarks.prompt_budget.
+"""
+
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+from app.context import get_run_context
+from app.metrics import prompt_budget_tokens
+from app.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Marks text left out of a compressed answer
+OMISSION = "[...]"
+
+_CODE_BLOCK = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[*_`-])|\n+")
+_WORD = re.compile(r"[a-z0-9]+")
+_TOKEN_SPAN = re.compile(r"\w+|[^\w\s]")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can could do does for from had has have how i if in "
+    "into is it its may might more most no not of on or our so such than that the their them "
+    "then there these they this those to was we were what when where which while who will "
+    "with would you your".split()
+)
+
+
+def allocate_budgets(lengths: List[int], total: int) -> List[int]:
+    """
+    Split a token budget across texts, water-filling from the shortest
+    
+    Args:
+        lengths: Token count of each text
+        total: Tokens available for all of them
+    
+    Returns:
+        Budget per text; texts that fit keep their full length
+    """
+    budgets = [0] * len(lengths)
+    remaining = total
+    order = sorted(range(len(lengths)), key=lambda idx: lengths[idx])
+    for position, idx in enumerate(order):
+        share = remaining // (len(order) - position)
+        budgets[idx] = min(lengths[idx], share)
+        remaining -= budgets[idx]
+    return budgets
+
+
+def _segments(text: str) -> List[str]:
+    """Split text into sentences and lines, keeping code blocks whole"""
+    segments = []
+    position = 0
+    for block in _CODE_BLOCK.finditer(text):
+        segments.extend(_sentences(text[position:block.start()]))
+        segments.append(block.group(0))
+        position = block.end()
+    segments.extend(_sentences(text[position:]))
+    return segments
+
+
+def _sentences(text: str) -> List[str]:
+    return [part.strip() for part in _SENTENCE_END.split(text) if part and part.strip()]
+
+
+def truncate(text: str, budget: int) -> str:
+    """
+    Keep the beginning of text up to budget tokens
+    
+    Args:
+        text: Text to shorten
+        budget: Maximum tokens to keep
+    
+    Returns:
+        The cut text followed by an omission marker
+    """
+    used = estimate_tokens(OMISSION)
+    end = 0
+    for piece in _TOKEN_SPAN.finditer(text):
+        used += 1 + len(piece.group(0)) // 6
+        if used > budget:
+            break
+        end = piece.end()
+    return f"{text[:end].rstrip()} {OMISSION}"
+
+
+def summarize(text: str, budget: int) -> str:
+    """
+    Extractive summary of text within budget tokens
+    
+    Sentences are scored by the document frequency of their content words
+    (so sentences on the answer's main topics win), with a bonus for the
+    opening sentence and for headings and list items, which carry structure.
+    The best sentences that fit are kept in their original order, repeats
+    are dropped and gaps are marked.
+    
+    Args:
+        text: Text to shorten
+        budget: Maximum tokens to keep
+    
+    Returns:
+        The summary, or a truncation if text has no sentence structure
+    """
+    segments = _segments(text)
+    if len(segments) < 2:
+        return truncate(text, budget)
+    
+    words = [[w for w in _WORD.findall(segment.lower()) if w not in _STOPWORDS] for segment in segments]
+    frequencies = Counter(w for segment_words in words for w in set(segment_words))
+    costs = [estimate_tokens(segment) for segment in segments]
+    
+    scores = []
+    for idx, segment_words in enumerate(words):
+        unique = set(segment_words)
+        score = sum(frequencies[w] for w in unique) / (len(unique) + 4)
+        if idx == 0:
+            score *= 1.5
+        if segments[idx].lstrip().startswith(("#", "-", "*", "1.")):
+            score *= 1.2
+        scores.append(score)
+    
+    # Each kept sentence may open a gap, so reserve room for one marker per
+    # sentence plus the trailing one; repeated sentences are kept only once
+    marker = estimate_tokens(OMISSION)
+    available = budget - marker
+    kept = set()
+    seen = set()
+    used = 0
+    for idx in sorted(range(len(segments)), key=lambda i: scores[i], reverse=True):
+        signature = frozenset(words[idx]) or segments[idx]
+        if signature in seen or used + costs[idx] + marker > available:
+            continue
+        kept.add(idx)
+        seen.add(signature)
+        used += costs[idx] + marker
+    
+    if not kept:
+        return truncate(text, budget)
+    
+    parts = []
+    previous = -1
+    for idx in sorted(kept):
+        if idx != previous + 1:
+            parts.append(OMISSION)
+        parts.append(segments[idx])
+        previous = idx
+    if previous != len(segments) - 1:
+        parts.append(OMISSION)
+    return "\n".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def fit_text(text: str, budget: int, mode: str = "summarize") -> str:
+    """
+    Shorten text to budget tokens if it is longer
+    
+    Results are memoized because every reviewer sees the same answers.
+    
+    Args:
+        text: Text to fit
+        budget: Maximum tokens
+        mode: "summarize" (extractive) or "truncate"
+    
+    Returns:
+        text itself if it fits, otherwise its compressed form
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    if mode == "truncate":
+        return truncate(text, budget)
+    return summarize(text, budget)
+
+
+def fit_texts(texts: List[str], total_budget: int) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Fit several texts that share one prompt into a total token budget
+    
+    Args:
+        texts: Texts embedded in the same prompt
+        total_budget: Tokens available for all of them; 0 disables budgeting
+    
+    Returns:
+        (fitted texts, stats with original_tokens, budgeted_tokens and
+        texts_compressed)
+    """
+    lengths = [estimate_tokens(text) for text in texts]
+    if not settings.prompt_budget_enabled or total_budget <= 0 or sum(lengths) <= total_budget:
+        fitted = list(texts)
+    else:
+        budgets = allocate_budgets(lengths, total_budget)
+        fitted = [
+            fit_text(text, budget, settings.prompt_budget_mode)
+            for text, budget in zip(texts, budgets)
+        ]
+    
+    stats = {
+        "original_tokens": sum(lengths),
+        "budgeted_tokens": sum(estimate_tokens(text) for text in fitted),
+        "texts_compressed": sum(1 for before, after in zip(texts, fitted) if before != after)
+    }
+    return fitted, stats
+
+
+def record_budget(stage: str, stats: Dict[str, int]):
+    """
+    Add one prompt's budgeting stats to the current run and to the metrics
+    
+    Args:
+        stage: Pipeline stage label ("stage_2", "stage_3")
+        stats: Stats returned by fit_texts
+    """
+    totals = get_run_context().prompt_budget.setdefault(
+        stage, {"original_tokens": 0, "budgeted_tokens": 0, "texts_compressed": 0}
+    )
+    for key, value in stats.items():
+        totals[key] += value
+    prompt_budget_tokens.inc(stats["original_tokens"], stage=stage, kind="original")
+    prompt_budget_tokens.inc(stats["budgeted_tokens"], stage=stage, kind="budgeted")
+
+
+def budget_report(prompt_budget: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, Any]]:
+    """Per-stage budgeting totals with the share of embedded tokens saved"""
+    report = {}
+    for stage, totals in sorted(prompt_budget.items()):
+        original = totals["original_tokens"]
+        saved = original - totals["budgeted_tokens"]
+        report[stage] = {**totals, "saved_pct": round(100 * saved / original, 1) if original else 0.0}
+    return report
+
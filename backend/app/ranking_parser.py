@@ -0,0 +1,300 @@
+"""
+Tolerant parser for the JSON rankings returned by reviewers
+
+Strategies are tried from cheapest and strictest to most forgiving:
+
+1. direct      - the whole reply is JSON (JSON mode, or a well-behaved model)
+2. fenced      - a ```json fenced block
+3. balanced    - the first balanced {...} or [...] that parses, found with a
+                 single string-aware scan (stray braces in prose are skipped)
+4. repaired    - the same candidates after fixing common defects: smart quotes,
+                 comments, trailing commas, single quotes, Python literals,
+                 unquoted keys and unclosed brackets from a cut-off reply
+5. regex       - "Response X ... rank N" / "1. Response X" style prose
+
+Every candidate is validated against the RankingEntry schema, and ids that
+were not shown to the reviewer are dropped, before it is accepted.
+python -m benchmarks.ranking_parser measures parse rates and throughput
+on a generated fuzz corpus.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Sequence
+
+from app.models import RankingEntry
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_LINE_COMMENT = re.compile(r"(?m)^\s*//.*$|(?<=[,{\[])\s*//[^\n]*")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_UNQUOTED_KEY = re.compile(r"([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:")
+_PY_LITERALS = re.compile(r"\b(True|False|None)\b")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_RESPONSE_ID = re.compile(r"^(?:response|model|answer)?\s*([A-Z]{1,2})\b", re.IGNORECASE)
+_RANK_NUMBER = re.compile(r"\d+")
+
+# "Response B ... rank 1", "Response B: #1", "Response B - 1st"
+_REGEX_ID_THEN_RANK = re.compile(
+    r"Response\s+([A-Z]{1,2})\b[^\n]{0,80}?(?:rank(?:ed)?(?:\s+as)?|#|position|place)\s*:?\s*#?(\d+)",
+    re.IGNORECASE
+)
+# "1. Response B", "Rank 1: Response B", "#1 - Response B", "1st: Response B"
+_REGEX_RANK_THEN_ID = re.compile(
+    r"(?:^|\n)\s*(?:\*\*)?(?:rank(?:ed)?\s*)?#?(\d+)(?:st|nd|rd|th)?\s*(?:\*\*)?\s*[.):\-]\s*"
+    r"(?:\*\*)?(?:Response\s+)?([A-Z]{1,2})\b",
+    re.IGNORECASE
+)
+
+STRATEGIES = ("direct", "fenced", "balanced", "repaired", "regex")
+
+_PY_REPLACEMENTS = {"True": "true", "False": "false", "None": "null"}
+
+
+@dataclass
+class ParseResult:
+    """Rankings and the strategy that produced them ("failed" if none did)"""
+    rankings: List[RankingEntry] = field(default_factory=list)
+    strategy: str = "failed"
+    
+    @property
+    def ok(self) -> bool:
+        return bool(self.rankings)
+
+
+def _balanced_candidates(text: str) -> Iterator[str]:
+    """
+    Yield balanced {...} / [...] substrings in order of appearance
+    
+    One pass with a bracket stack that ignores brackets inside JSON strings.
+    An object or array still open at the end of the text (a reply cut off by
+    max_tokens) is yielded last, so repair can try to close it.
+    """
+    stack: List[str] = []
+    start = -1
+    in_string = False
+    escaped = False
+    pairs = {"}": "{", "]": "["}
+    
+    for idx, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"' and stack:
+            in_string = True
+        elif char in "{[":
+            if not stack:
+                start = idx
+            stack.append(char)
+        elif char in "}]":
+            if not stack or stack[-1] != pairs[char]:
+                # Stray closer in prose: forget the current candidate
+                stack.clear()
+                continue
+            stack.pop()
+            if not stack:
+                yield text[start:idx + 1]
+    
+    if stack:
+        yield text[start:]
+
+
+def _close_brackets(text: str) -> str:
+    """
+    Append the closers a truncated JSON document is missing
+    
+    A reply cut off inside a string is first cut back to the end of its last
+    complete object or array, since the partial value is useless anyway.
+    """
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    last_complete = 0
+    for idx, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+            last_complete = idx + 1
+    
+    if in_string:
+        if not last_complete:
+            return text
+        return _close_brackets(text[:last_complete])
+    # Drop a dangling separator or key left by the cut
+    body = re.sub(r'(,\s*"[^"]*"\s*:?|,|:)\s*$', "", text.rstrip())
+    return body + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the defects LLMs commonly put in JSON
+    
+    Args:
+        text: Almost-JSON text
+    
+    Returns:
+        Text that has a much better chance of passing json.loads
+    """
+    text = text.translate(_SMART_QUOTES)
+    text = _LINE_COMMENT.sub("", text)
+    if '"' not in text and "'" in text:
+        text = text.replace("'", '"')
+    elif "'" in text:
+        # Single-quoted keys and values next to JSON punctuation
+        text = re.sub(r"(?<=[{\[,:])\s*'([^'\n]*)'", r' "\1"', text)
+        text = re.sub(r"'([^'\n]*)'(?=\s*:)", r'"\1"', text)
+    text = _PY_LITERALS.sub(lambda m: _PY_REPLACEMENTS[m.group(1)], text)
+    text = _UNQUOTED_KEY.sub(r'\1"\2":', text)
+    text = _close_brackets(text)
+    return _TRAILING_COMMA.sub(r"\1", text)
+
+
+def _normalize_id(value: Any) -> Optional[str]:
+    if not isinstance(value, (str, int)):
+        return None
+    match = _RESPONSE_ID.match(str(value).strip())
+    return match.group(1).upper() if match else None
+
+
+def _normalize_rank(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = _RANK_NUMBER.search(value)
+        return int(match.group(0)) if match else None
+    return None
+
+
+def validate_rankings(data: Any, expected_ids: Optional[Sequence[str]] = None) -> List[RankingEntry]:
+    """
+    Validate parsed JSON against the RankingEntry schema
+    
+    Accepts {"rankings": [...]}, a bare list of entries, or an object with a
+    single list value. Ids like "Response B" are normalized to "B", numeric
+    strings are accepted as ranks and a missing rank falls back to the
+    entry's position.
+    
+    Args:
+        data: Output of json.loads
+        expected_ids: Ids shown to the reviewer; others are dropped
+    
+    Returns:
+        Entries sorted by rank, or an empty list if nothing valid remains
+    """
+    if isinstance(data, dict):
+        entries = data.get("rankings")
+        if entries is None:
+            lists = [value for value in data.values() if isinstance(value, list)]
+            entries = lists[0] if len(lists) == 1 else None
+    else:
+        entries = data
+    if not isinstance(entries, list):
+        return []
+    
+    allowed = set(expected_ids) if expected_ids else None
+    rankings = []
+    seen = set()
+    for position, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            continue
+        response_id = _normalize_id(entry.get("response_id", entry.get("id", entry.get("response"))))
+        rank = _normalize_rank(entry.get("rank", position))
+        if response_id is None or rank is None or response_id in seen:
+            continue
+        if allowed is not None and response_id not in allowed:
+            continue
+        reasoning = entry.get("reasoning", entry.get("reason", ""))
+        seen.add(response_id)
+        rankings.append(RankingEntry(
+            response_id=response_id,
+            rank=rank,
+            reasoning=reasoning if isinstance(reasoning, str) else json.dumps(reasoning)
+        ))
+    return sorted(rankings, key=lambda entry: entry.rank)
+
+
+def _try_json(text: str, expected_ids: Optional[Sequence[str]]) -> List[RankingEntry]:
+    try:
+        return validate_rankings(json.loads(text), expected_ids)
+    except (json.JSONDecodeError, RecursionError):
+        return []
+
+
+def _regex_rankings(text: str, expected_ids: Optional[Sequence[str]]) -> List[RankingEntry]:
+    allowed = set(expected_ids) if expected_ids else None
+    found = {}
+    for response_id, rank in _REGEX_ID_THEN_RANK.findall(text):
+        found.setdefault(response_id.upper(), int(rank))
+    if not found:
+        for rank, response_id in _REGEX_RANK_THEN_ID.findall(text):
+            found.setdefault(response_id.upper(), int(rank))
+    
+    rankings = [
+        RankingEntry(response_id=response_id, rank=rank, reasoning="")
+        for response_id, rank in found.items()
+        if allowed is None or response_id in allowed
+    ]
+    # A single id is not a ranking
+    return sorted(rankings, key=lambda entry: entry.rank) if len(rankings) > 1 else []
+
+
+def parse_rankings(text: str, expected_ids: Optional[Sequence[str]] = None) -> ParseResult:
+    """
+    Extract rankings from a reviewer's reply
+    
+    Args:
+        text: Raw reply
+        expected_ids: Anonymous ids the reviewer was shown, if known
+    
+    Returns:
+        ParseResult with the rankings and the strategy that found them
+    """
+    if not text:
+        return ParseResult()
+    
+    stripped = text.strip()
+    if stripped[:1] in "{[":
+        rankings = _try_json(stripped, expected_ids)
+        if rankings:
+            return ParseResult(rankings, "direct")
+    
+    fenced = [block.strip() for block in _FENCE.findall(text) if block.strip()]
+    for block in fenced:
+        rankings = _try_json(block, expected_ids)
+        if rankings:
+            return ParseResult(rankings, "fenced")
+    
+    candidates = list(_balanced_candidates(text))
+    for candidate in candidates:
+        rankings = _try_json(candidate, expected_ids)
+        if rankings:
+            return ParseResult(rankings, "balanced")
+    
+    for candidate in fenced + candidates:
+        rankings = _try_json(repair_json(candidate), expected_ids)
+        if rankings:
+            return ParseResult(rankings, "repaired")
+    
+    rankings = _regex_rankings(text, expected_ids)
+    if rankings:
+        return ParseResult(rankings, "regex")
+    return ParseResult()
+
@@ -0,0 +1,260 @@
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.config import settings
+from app.metrics import registry
+from app.shared_state import SharedSemaphore, SharedTokenBucket, StateBackend, state_backend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelLimits:
+    """Limits for one model; 0 disables a limit"""
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    concurrency: int = 0
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity per minute
+    
+    Waiters are served one at a time in arrival order (asyncio.Lock is FIFO),
+    so a large request cannot be starved by a stream of small ones.
+    """
+    
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = capacity_per_minute
+        self.rate = capacity_per_minute / 60.0
+        self.tokens = capacity_per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, amount: float):
+        """
+        Wait until amount tokens are available and take them
+        
+        Args:
+            amount: Tokens to take; capped at the bucket capacity so a single
+                oversized request still goes through eventually
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+    
+    def adjust(self, amount: float):
+        """Take (positive) or give back (negative) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LimitTicket:
+    """Handed to the caller while it holds a model's concurrency slot"""
+    
+    def __init__(self, limiter: "ModelLimiter", estimated_tokens: int, wait_time: float):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.wait_time = wait_time
+    
+    def report_usage(self, actual_tokens: int):
+        """
+        Reconcile the tokens-per-minute bucket with the provider's usage
+        
+        Args:
+            actual_tokens: Prompt plus completion tokens actually spent
+        """
+        if self.limiter.tokens_bucket is not None:
+            self.limiter.tokens_bucket.adjust(actual_tokens - self.estimated_tokens)
+
+
+class ModelLimiter:
+    """
+    Requests/min and tokens/min buckets plus a concurrency semaphore for one model
+    
+    With a shared state backend the buckets and the semaphore count every
+    worker's calls, so the limits hold for the deployment, not per process.
+    """
+    
+    def __init__(self, model: str, limits: ModelLimits, backend: Optional[StateBackend] = None):
+        self.model = model
+        self.limits = limits
+        self.requests_bucket = self._bucket("rpm", limits.requests_per_minute, backend)
+        self.tokens_bucket = self._bucket("tpm", limits.tokens_per_minute, backend)
+        self.semaphore = None
+        if limits.concurrency > 0:
+            self.semaphore = (
+                SharedSemaphore(backend, f"{model}:slots", limits.concurrency, settings.state_lease_seconds)
+                if backend is not None else asyncio.Semaphore(limits.concurrency)
+            )
+        
+        self.calls = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def _bucket(self, kind: str, capacity_per_minute: float, backend: Optional[StateBackend]):
+        if capacity_per_minute <= 0:
+            return None
+        if backend is not None:
+            return SharedTokenBucket(backend, f"{self.model}:{kind}", capacity_per_minute)
+        return TokenBucket(capacity_per_minute)
+    
+    @contextlib.asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator[LimitTicket]:
+        """
+        Queue for the rate buckets and a concurrency slot, then hold the slot
+        
+        Args:
+            estimated_tokens: Expected prompt plus completion tokens
+        
+        Yields:
+            LimitTicket with the time spent queueing
+        """
+        start = time.monotonic()
+        holder = None
+        self.waiting += 1
+        try:
+            if self.requests_bucket is not None:
+                await self.requests_bucket.acquire(1)
+            if self.tokens_bucket is not None:
+                await self.tokens_bucket.acquire(estimated_tokens)
+            if self.semaphore is not None:
+                holder = await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        
+        wait_time = time.monotonic() - start
+        self.calls += 1
+        self.total_wait += wait_time
+        self.max_wait = max(self.max_wait, wait_time)
+        if wait_time > 1.0:
+            logger.info(f"Waited {wait_time:.2f}s for a {self.model} slot")
+        
+        self.in_flight += 1
+        try:
+            yield LimitTicket(self, estimated_tokens, wait_time)
+        finally:
+            self.in_flight -= 1
+            # A shared slot is released by the holder id it was taken as
+            if isinstance(self.semaphore, SharedSemaphore):
+                self.semaphore.release(holder)
+            elif self.semaphore is not None:
+                self.semaphore.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Limits, queue depth and wait times"""
+        return {
+            "requests_per_minute": self.limits.requests_per_minute,
+            "tokens_per_minute": self.limits.tokens_per_minute,
+            "concurrency": self.limits.concurrency,
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "mean_wait_seconds": round(self.total_wait / self.calls, 3) if self.calls else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3)
+        }
+
+
+class RateLimiterRegistry:
+    """Per-model limiters shared by every request in the process (and every worker, given a backend)"""
+    
+    def __init__(
+        self,
+        default_limits: ModelLimits,
+        overrides: Optional[Dict[str, ModelLimits]] = None,
+        backend: Optional[StateBackend] = None
+    ):
+        self.default_limits = default_limits
+        self.overrides = overrides or {}
+        self.backend = backend
+        self._limiters: Dict[str, ModelLimiter] = {}
+    
+    def get(self, model: str) -> ModelLimiter:
+        """Get (or create) the limiter for a model"""
+        if model not in self._limiters:
+            limits = self.overrides.get(model, self.default_limits)
+            self._limiters[model] = ModelLimiter(model, limits, self.backend)
+        return self._limiters[model]
+    
+    def slot(self, model: str, estimated_tokens: int):
+        """Shortcut for get(model).slot(estimated_tokens)"""
+        return self.get(model).slot(estimated_tokens)
+    
+    def set_default_concurrency(self, concurrency: int):
+        """Change the concurrency cap of models without an override"""
+        self.default_limits = replace(self.default_limits, concurrency=concurrency)
+        self._limiters = {
+            model: limiter for model, limiter in self._limiters.items()
+            if model in self.overrides
+        }
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Stats of every limiter created so far"""
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
+
+
+def load_model_limits() -> Dict[str, ModelLimits]:
+    """
+    Parse per-model overrides from settings.model_limits
+    
+    The value is a JSON object such as
+    {"moonshotai/Kimi-K2-Instruct-0905:groq": {"rpm": 30, "tpm": 60000, "concurrency": 4}}
+    
+    Returns:
+        Dict mapping model name to its ModelLimits
+    """
+    if not settings.model_limits:
+        return {}
+    overrides = {}
+    for model, limits in json.loads(settings.model_limits).items():
+        overrides[model] = ModelLimits(
+            requests_per_minute=float(limits.get("rpm", settings.rate_limit_rpm)),
+            tokens_per_minute=float(limits.get("tpm", settings.rate_limit_tpm)),
+            concurrency=int(limits.get("concurrency", settings.model_max_concurrency))
+        )
+    return overrides
+
+
+# Global limiter registry, with limiters for the configured council up front
+rate_limiter = RateLimiterRegistry(
+    ModelLimits(
+        requests_per_minute=settings.rate_limit_rpm,
+        tokens_per_minute=settings.rate_limit_tpm,
+        concurrency=settings.model_max_concurrency
+    ),
+    load_model_limits(),
+    state_backend
+)
+for _model in settings.council_models + [settings.chairman_model]:
+    rate_limiter.get(_model)
+
+registry.gauge_callback(
+    "council_llm_in_flight",
+    "Model calls currently holding a concurrency slot",
+    ["model"],
+    lambda: [((model,), limiter.in_flight) for model, limiter in rate_limiter._limiters.items()]
+)
+registry.gauge_callback(
+    "council_llm_waiting",
+    "Model calls queued for a rate-limit or concurrency slot",
+    ["model"],
+    lambda: [((model,), limiter.waiting) for model, limiter in rate_limiter._limiters.items()]
+)
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import openai
+import numpy as np
+
+from app.config import settings
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit, server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit breaker is open"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether an upstream error is transient and worth retrying
+    
+    Args:
+        error: Exception raised by the OpenAI client
+    
+    Returns:
+        bool: True for timeouts, connection errors, 429s and 5xx responses
+    """
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """
+    Delay before the next retry, with full jitter
+    
+    A Retry-After header on the error response takes precedence.
+    
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+        error: The error that caused the retry
+    
+    Returns:
+        float: Seconds to wait
+    """
+    if isinstance(error, openai.APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.llm_backoff_max)
+            except ValueError:
+                pass
+    ceiling = min(settings.llm_backoff_max, settings.llm_backoff_base * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker
+    
+    After failure_threshold consecutive transient failures the circuit opens
+    and calls fail fast. Once reset_timeout has passed a single probe call is
+    let through; its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, model: str, failure_threshold: int, reset_timeout: float):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+    
+    def allow(self) -> bool:
+        """Whether a call may go to the model right now"""
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self.probe_in_flight = False
+        # Half-open: exactly one probe at a time
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+    
+    def record_success(self):
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit for {self.model} closed")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+    
+    def abandon(self):
+        """Forget a call that was cancelled before it succeeded or failed"""
+        self.probe_in_flight = False
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"Circuit for {self.model} opened after {self.consecutive_failures} failures")
+                self.times_opened += 1
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one model"""
+    
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile, or None until enough samples exist"""
+        if len(self.samples) < settings.hedge_min_samples:
+            return None
+        return float(np.percentile(self.samples, pct))
+
+
+class ModelHealth:
+    """Circuit breaker, latency window and hedging counters for one model"""
+    
+    def __init__(self, model: str):
+        self.breaker = CircuitBreaker(
+            model,
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_seconds
+        )
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+    
+    def hedge_delay(self) -> Optional[float]:
+        """
+        How long to wait before firing a hedged duplicate, if at all
+        
+        Returns:
+            The model's p95 latency, or None when hedging is disabled, there is
+            too little history, the model is unhealthy or the hedge budget
+            (HEDGE_MAX_FRACTION of calls) is spent
+        """
+        if not settings.hedge_enabled or self.breaker.state != CircuitState.CLOSED:
+            return None
+        if self.hedges >= settings.hedge_max_fraction * max(self.calls, 1):
+            return None
+        return self.latency.percentile(95)
+    
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            **self.breaker.stats(),
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None
+        }
+
+
+class HealthRegistry:
+    """ModelHealth per model, shared by all requests"""
+    
+    def __init__(self):
+        self._models: Dict[str, ModelHealth] = {}
+    
+    def get(self, model: str) -> ModelHealth:
+        if model not in self._models:
+            self._models[model] = ModelHealth(model)
+        return self._models[model]
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {model: health.stats() for model, health in self._models.items()}
+
+
+async def hedged_call(
+    call: Callable[[], Awaitable[Any]],
+    delay: float,
+    health: ModelHealth
+) -> Any:
+    """
+    Run call, and fire a duplicate if it has not finished after delay seconds
+    
+    Whichever attempt succeeds first wins and the other is cancelled. If one
+    attempt fails the other is still awaited.
+    
+    Args:
+        call: Zero-argument coroutine factory for one attempt
+        delay: Seconds to wait before hedging
+        health: Counters to update
+    
+    Returns:
+        The result of the winning attempt
+    """
+    primary = asyncio.create_task(call())
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return primary.result()
+        
+        health.hedges += 1
+        logger.info(f"Hedging call to {health.breaker.model} after {delay:.2f}s")
+        hedge = asyncio.create_task(call())
+        tasks.add(hedge)
+        
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        health.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+# Global health registry
+model_health = HealthRegistry()
+
+registry.gauge_callback(
+    "council_circuit_open",
+    "1 while a model's circuit breaker is open or half-open",
+    ["model"],
+    lambda: [
+        ((model,), 0 if health.breaker.state == CircuitState.CLOSED else 1)
+        for model, health in model_health._models.items()
+    ]
+)
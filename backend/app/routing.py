@@ -0,0 +1,391 @@
+"""
+Per-query routing of council members and the chairman
+
+Instead of sending every query to the same configured council, the router
+picks the members and the chairman of each run from ROUTING_CANDIDATES:
+
+1. A local classifier scores how demanding the query looks (subject matter
+   that is hard at any length, such as proofs, algorithms and distributed
+   systems; reasoning and comparison cues; code; math; several questions;
+   length) and puts it in the simple, standard or hard tier.
+2. Rolling per-model statistics, fed by every upstream call, give each
+   candidate's p95 latency per stage, its error rate and its average token
+   usage; MODEL_COSTS turns tokens into dollars. Latency predictions are
+   scaled by the calls currently queued for the model's rate limits.
+3. Hard queries keep the configured council and chairman and only swap out
+   models that are failing, so quality is not traded for speed where it
+   matters. Simple and standard queries get ROUTING_SIMPLE_MEMBERS or
+   ROUTING_STANDARD_MEMBERS healthy candidates, best first by
+   ROUTING_OBJECTIVE (latency or cost), within ROUTING_LATENCY_SLO and
+   ROUTING_COST_SLO.
+
+Candidates with too few samples count as fast and cheap, so models new to
+the pool get traffic and build up statistics.
+"""
+
+import json
+import logging
+import re
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.metrics import registry
+from app.models import CallTiming, ResponseStatus
+from app.rate_limiter import rate_limiter
+from app.resilience import CircuitState, model_health
+from app.tokens import estimate_tokens
+from app.topology import ReviewTopology, get_topology
+
+logger = logging.getLogger(__name__)
+
+routing_decisions = registry.counter(
+    "council_routing_decisions_total",
+    "Routed queries by difficulty tier",
+    ["tier"]
+)
+routing_selections = registry.counter(
+    "council_routing_selected_total",
+    "Models picked by the router, by role (member or chairman)",
+    ["model", "role"]
+)
+
+_REASONING = re.compile(
+    r"\b(why|explain|compare|contrast|prove|derive|analy[sz]e|design|evaluate|trade-?offs?|"
+    r"step[- ]by[- ]step|implement|optimi[sz]e|debug|justify|critique|pros and cons)\b",
+    re.IGNORECASE
+)
+# Subject matter that makes a question hard however short it is ("Is P equal
+# to NP?"); weighted above length, which only says how much was written
+_HARD = re.compile(
+    r"\b(proofs?|prove|rigorous(?:ly)?|formal(?:ly)?|theorems?|lemmas?|conjectures?|"
+    r"infinitely|primes?|irrational|NP|P\s*(?:=|vs\.?|versus)\s*NP|asymptotic(?:ally)?|"
+    r"algorithms?|complexity|big[- ]O|invariants?|correctness|"
+    r"consensus|byzantine|distributed|linearizab\w*|concurren(?:t|cy)|race conditions?|"
+    r"deadlocks?|fault[- ]toleran\w*|cryptograph\w*|quantum)\b",
+    re.IGNORECASE
+)
+_CODE = re.compile(r"```|\b(def|class|function|return|SELECT|#include)\b|[{};]\s*$", re.MULTILINE)
+_MATH = re.compile(r"[=^∑∫√]|\d\s*[-+*/]\s*\d")
+
+# Prompt and completion tokens assumed for a call before a model has history
+_DEFAULT_TOKENS = {
+    "stage_1": (150, 600),
+    "stage_2": (1500, 250),
+    "stage_3": (2500, 800)
+}
+
+
+@dataclass
+class QueryProfile:
+    """Difficulty estimate of a query"""
+    tier: str  # simple | standard | hard
+    score: float
+    features: Dict[str, Any] = field(default_factory=dict)
+
+
+def classify_query(query: str) -> QueryProfile:
+    """
+    Score how demanding a query looks, without a model call
+    
+    Args:
+        query: User's question
+    
+    Returns:
+        QueryProfile with a score in [0, 1] and its tier
+    """
+    features = {
+        "tokens": estimate_tokens(query),
+        # Distinct cues, so repeating one word does not make a query harder
+        "hard_cues": len({cue.lower() for cue in _HARD.findall(query)}),
+        "reasoning_cues": len(_REASONING.findall(query)),
+        "code": bool(_CODE.search(query)),
+        "math": bool(_MATH.search(query)),
+        "questions": query.count("?")
+    }
+    score = min(1.0, (
+        0.25 * min(features["hard_cues"], 3)
+        + 0.2 * min(features["tokens"] / 150, 1.0)
+        + 0.2 * min(features["reasoning_cues"], 2)
+        + 0.2 * features["code"]
+        + 0.1 * features["math"]
+        + 0.1 * (features["questions"] > 1)
+    ))
+    tier = "standard"
+    if score >= settings.routing_hard_score:
+        tier = "hard"
+    elif score < settings.routing_simple_score:
+        tier = "simple"
+    return QueryProfile(tier=tier, score=round(score, 3), features=features)
+
+
+def load_model_costs() -> Dict[str, Tuple[float, float]]:
+    """
+    Parse settings.model_costs
+    
+    The value is a JSON object of dollars per million tokens, such as
+    {"moonshotai/Kimi-K2-Instruct-0905:groq": {"prompt": 1.0, "completion": 3.0}}
+    
+    Returns:
+        Dict mapping model name to (prompt, completion) price per token
+    """
+    if not settings.model_costs:
+        return {}
+    return {
+        model: (float(prices.get("prompt", 0)) / 1e6, float(prices.get("completion", 0)) / 1e6)
+        for model, prices in json.loads(settings.model_costs).items()
+    }
+
+
+class ModelStats:
+    """Rolling latency, outcomes and token usage of one model, per stage"""
+    
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.tokens: Dict[str, Deque[Tuple[int, int]]] = {}
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+    
+    def observe(self, stage: str, latency: float, ok: bool, prompt_tokens: int, completion_tokens: int):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.setdefault(stage, deque(maxlen=self.window)).append(latency)
+            self.tokens.setdefault(stage, deque(maxlen=self.window)).append((prompt_tokens, completion_tokens))
+    
+    def p95(self, stage: str) -> Optional[float]:
+        """p95 latency of the stage's calls, or None until enough samples exist"""
+        samples = self.latencies.get(stage, ())
+        if len(samples) < settings.routing_min_samples:
+            return None
+        return float(np.percentile(samples, 95))
+    
+    def error_rate(self) -> float:
+        if len(self.outcomes) < settings.routing_min_samples:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+    
+    def mean_tokens(self, stage: str) -> Tuple[float, float]:
+        samples = self.tokens.get(stage)
+        if not samples:
+            return _DEFAULT_TOKENS.get(stage, _DEFAULT_TOKENS["stage_1"])
+        return (
+            sum(prompt for prompt, _ in samples) / len(samples),
+            sum(completion for _, completion in samples) / len(samples)
+        )
+
+
+@dataclass
+class RoutingDecision:
+    """Council picked for one query and why"""
+    tier: str
+    score: float
+    objective: str
+    members: List[str]
+    chairman: str
+    predicted_latency: Optional[float] = None  # p95-based seconds; None without history
+    estimated_cost: float = 0.0  # Dollars, from MODEL_COSTS
+    notes: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["estimated_cost"] = round(self.estimated_cost, 6)
+        if self.predicted_latency is not None:
+            data["predicted_latency"] = round(self.predicted_latency, 3)
+        return data
+
+
+class ModelRouter:
+    """Picks council members and the chairman per query from live model statistics"""
+    
+    def __init__(
+        self,
+        candidates: List[str],
+        council: List[str],
+        chairman: str,
+        costs: Dict[str, Tuple[float, float]],
+        topology: ReviewTopology
+    ):
+        self.candidates = candidates
+        self.council = council
+        self.chairman = chairman
+        self.costs = costs
+        self.topology = topology
+        self._stats: Dict[str, ModelStats] = {}
+    
+    def stats_for(self, model: str) -> ModelStats:
+        if model not in self._stats:
+            self._stats[model] = ModelStats()
+        return self._stats[model]
+    
+    def observe(self, timing: CallTiming):
+        """Record a finished call; cache hits and joined calls say nothing about the model"""
+        if timing.cache_hit or timing.coalesced:
+            return
+        self.stats_for(timing.model).observe(
+            timing.stage,
+            timing.latency,
+            timing.status == ResponseStatus.OK.value,
+            timing.prompt_tokens,
+            timing.completion_tokens
+        )
+    
+    def available(self, model: str) -> bool:
+        """Circuit not open and error rate within ROUTING_MAX_ERROR_RATE"""
+        if model_health.get(model).breaker.state == CircuitState.OPEN:
+            return False
+        return self.stats_for(model).error_rate() <= settings.routing_max_error_rate
+    
+    def predicted_latency(self, model: str, stage: str) -> Optional[float]:
+        """p95 latency of a call, stretched by the calls queued for the model's slots"""
+        p95 = self.stats_for(model).p95(stage)
+        if p95 is None:
+            return None
+        limiter = rate_limiter.get(model)
+        return p95 * (1 + limiter.waiting / max(limiter.limits.concurrency, 1))
+    
+    def call_cost(self, model: str, stage: str) -> float:
+        prompt_price, completion_price = self.costs.get(model, (0.0, 0.0))
+        prompt_tokens, completion_tokens = self.stats_for(model).mean_tokens(stage)
+        return prompt_tokens * prompt_price + completion_tokens * completion_price
+    
+    def run_cost(self, members: List[str], chairman: str) -> float:
+        """Expected dollars of a run: answers, the topology's review calls and the synthesis"""
+        reviews = self.topology.expected_cost(len(members))["calls"]
+        review_cost = sum(self.call_cost(model, "stage_2") for model in members) / max(len(members), 1)
+        return (
+            sum(self.call_cost(model, "stage_1") for model in members)
+            + reviews * review_cost
+            + self.call_cost(chairman, "stage_3")
+        )
+    
+    def run_latency(self, members: List[str], chairman: str) -> Optional[float]:
+        """Slowest member's answer and review plus the synthesis; None without history"""
+        paths = [
+            (self.predicted_latency(model, "stage_1") or 0.0) + (self.predicted_latency(model, "stage_2") or 0.0)
+            for model in members
+        ]
+        synthesis = self.predicted_latency(chairman, "stage_3")
+        if not any(paths) and synthesis is None:
+            return None
+        return max(paths, default=0.0) + (synthesis or 0.0)
+    
+    def _ranked(self, models: List[str], stage: str, objective: str) -> List[str]:
+        """Best first by objective; unknown models first so they gather samples, ties by pool order"""
+        if objective == "cost":
+            key = lambda model: (self.call_cost(model, stage), self._order(model))
+        else:
+            key = lambda model: (self.predicted_latency(model, stage) or 0.0, self._order(model))
+        return sorted(models, key=key)
+    
+    def _order(self, model: str) -> int:
+        return self.candidates.index(model) if model in self.candidates else len(self.candidates)
+    
+    def route(self, query: str) -> RoutingDecision:
+        """
+        Pick the council for a query
+        
+        Args:
+            query: User's question
+        
+        Returns:
+            RoutingDecision with the members, chairman, predictions and notes
+        """
+        profile = classify_query(query)
+        objective = settings.routing_objective
+        slo = settings.routing_latency_slo
+        notes = []
+        
+        healthy = [model for model in self.candidates if self.available(model)]
+        if not healthy:
+            # Every candidate is failing; the configured council fails fast on its own
+            healthy = list(self.candidates)
+            notes.append("no healthy candidates; using the configured council")
+            profile.tier = "hard"
+        
+        if profile.tier == "hard":
+            members = [model for model in self.council if self.available(model)]
+            spares = [model for model in self._ranked(healthy, "stage_1", objective) if model not in members]
+            swapped = spares[:len(self.council) - len(members)]
+            if swapped:
+                notes.append(f"replaced unhealthy members with {', '.join(swapped)}")
+            members += swapped
+            chairman = self.chairman
+            if not self.available(chairman):
+                chairman = self._ranked(members, "stage_3", objective)[0]
+                notes.append(f"chairman unhealthy; using {chairman}")
+        else:
+            size = settings.routing_simple_members if profile.tier == "simple" else settings.routing_standard_members
+            chairman = self._ranked(healthy, "stage_3", objective)[0]
+            if profile.tier == "standard" and self.chairman in healthy:
+                synthesis = self.predicted_latency(self.chairman, "stage_3")
+                if not slo or synthesis is None or synthesis <= slo:
+                    chairman = self.chairman
+            
+            ranked = self._ranked(healthy, "stage_1", objective)
+            members = [model for model in ranked if not slo or (self.run_latency([model], chairman) or 0.0) <= slo]
+            members = members[:size]
+            if len(members) < min(size, len(ranked)):
+                notes.append(f"only {len(members)} candidates within the {slo}s latency SLO; filled with the next best")
+                members += [model for model in ranked if model not in members][:size - len(members)]
+            
+            cost_slo = settings.routing_cost_slo
+            while cost_slo and len(members) > 2 and self.run_cost(members, chairman) > cost_slo:
+                dropped = max(members, key=lambda model: self.call_cost(model, "stage_1"))
+                members.remove(dropped)
+                notes.append(f"dropped {dropped} to stay within the cost SLO")
+        
+        decision = RoutingDecision(
+            tier=profile.tier,
+            score=profile.score,
+            objective=objective,
+            members=members,
+            chairman=chairman,
+            predicted_latency=self.run_latency(members, chairman),
+            estimated_cost=self.run_cost(members, chairman),
+            notes=notes
+        )
+        if settings.routing_cost_slo and decision.estimated_cost > settings.routing_cost_slo:
+            decision.notes.append("estimated cost is over the cost SLO")
+        
+        routing_decisions.inc(tier=decision.tier)
+        for model in members:
+            routing_selections.inc(model=model, role="member")
+        routing_selections.inc(model=chairman, role="chairman")
+        logger.info(f"Routed {profile.tier} query (score {profile.score}) to {len(members)} members, chairman {chairman}")
+        return decision
+    
+    def stats(self) -> Dict[str, Any]:
+        """Routing settings and each candidate's current statistics"""
+        models = {}
+        for model in self.candidates:
+            stats = self.stats_for(model)
+            models[model] = {
+                "available": self.available(model),
+                "error_rate": round(stats.error_rate(), 3),
+                "latency_p95": {
+                    stage: round(stats.p95(stage), 3) for stage in stats.latencies if stats.p95(stage) is not None
+                },
+                "cost_per_call": {stage: round(self.call_cost(model, stage), 6) for stage in _DEFAULT_TOKENS}
+            }
+        return {
+            "enabled": settings.routing_enabled,
+            "objective": settings.routing_objective,
+            "latency_slo": settings.routing_latency_slo,
+            "cost_slo": settings.routing_cost_slo,
+            "council": self.council,
+            "chairman": self.chairman,
+            "models": models
+        }
+
+
+# Global router; fed by every model call, consulted by the pipeline when ROUTING_ENABLED is set
+model_router = ModelRouter(
+    candidates=settings.routing_candidates_list,
+    council=settings.council_models,
+    chairman=settings.chairman_model,
+    costs=load_model_costs(),
+    topology=get_topology()
+)
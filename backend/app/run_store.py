@@ -0,0 +1,376 @@
+"""
+Persistent store of council runs
+
+Every pipeline result is kept in SQLite (WAL mode) together with the raw
+output of each model call, so runs can be audited, re-scored and replayed
+from their stored stages. Writes go through an in-memory queue drained by a
+background task that commits in batches on a worker thread, so a request
+only pays for putting its result on the queue.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.config import settings
+from app.semantic_cache import normalize_query
+from app.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    query TEXT NOT NULL,
+    query_hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    chairman_model TEXT NOT NULL,
+    processing_time REAL NOT NULL,
+    parent_id TEXT,
+    replayed_stages TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_runs_query_hash ON runs (query_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_chairman ON runs (chairman_model, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_parent ON runs (parent_id);
+
+CREATE TABLE IF NOT EXISTS run_outputs (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    model TEXT NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_outputs_model ON run_outputs (model, created_at);
+"""
+
+
+def query_hash(query: str) -> str:
+    """Hash of the normalized query, so case and punctuation do not matter"""
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class StoredRun:
+    """A run waiting in the write queue"""
+    id: str
+    created_at: float
+    result: Dict[str, Any]
+    outputs: List[Dict[str, Any]]
+    parent_id: Optional[str] = None
+    replayed_stages: Optional[List[str]] = None
+
+
+def run_outputs(result: Dict[str, Any], review_outputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Raw model outputs of a run, in stage order
+    
+    Stage 1 answers and the synthesis are in the result already; review
+    replies are kept before parsing, since their rankings may have been
+    recovered only partially.
+    
+    Args:
+        result: PipelineResponse.to_dict() output
+        review_outputs: Stage 2 outputs recorded in the run context
+    
+    Returns:
+        List of {"stage", "model", "status", "output"} dicts
+    """
+    outputs = [
+        {"stage": "stage_1", "model": resp["model_name"], "status": resp["status"], "output": resp["response"]}
+        for resp in result["stage_1_responses"]
+    ]
+    outputs.extend(review_outputs)
+    final = result["stage_3_final"]
+    outputs.append({
+        "stage": "stage_3", "model": final["chairman_model"], "status": final["status"], "output": final["content"]
+    })
+    return outputs
+
+
+class RunStore:
+    """
+    SQLite run history with asynchronous batched writes
+    
+    Reads use their own connection; with WAL they do not wait for a batch
+    being committed.
+    """
+    
+    def __init__(self, path: str, batch_size: int = 50, flush_interval: float = 0.5, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Workers of a multi-process deployment share the file; wait out their writes
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    async def start(self):
+        """Open the database and start the background writer"""
+        if self._writer is not None:
+            return
+        self._write_conn = self._connect()
+        self._write_conn.executescript(_SCHEMA)
+        self._read_conn = self._connect()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._writer = asyncio.create_task(self._write_loop())
+        logger.info(f"Run store opened at {self.path}")
+    
+    async def flush(self):
+        """Wait until every queued run is written"""
+        if self._queue is not None:
+            await self._queue.join()
+    
+    async def close(self):
+        """Flush queued runs and close the database"""
+        if self._writer is None:
+            return
+        await self.flush()
+        self._writer.cancel()
+        await asyncio.gather(self._writer, return_exceptions=True)
+        self._writer = None
+        with self._write_lock:
+            self._write_conn.close()
+        with self._read_lock:
+            self._read_conn.close()
+        logger.info(f"Run store closed ({self.written} runs written, {self.dropped} dropped)")
+    
+    def record(
+        self,
+        result: Dict[str, Any],
+        outputs: List[Dict[str, Any]],
+        parent_id: Optional[str] = None,
+        replayed_stages: Optional[List[str]] = None
+    ) -> Optional[str]:
+        """
+        Queue a run for writing without waiting for the database
+        
+        Args:
+            result: PipelineResponse.to_dict() output
+            outputs: Raw model outputs, see run_outputs
+            parent_id: Run this one was replayed from
+            replayed_stages: Stages re-run by the replay
+        
+        Returns:
+            The new run id, or None if the store is not running or its queue is full
+        """
+        if self._queue is None:
+            return None
+        run = StoredRun(
+            id=uuid.uuid4().hex,
+            created_at=time.time(),
+            result=result,
+            outputs=outputs,
+            parent_id=parent_id,
+            replayed_stages=replayed_stages
+        )
+        try:
+            self._queue.put_nowait(run)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Run store queue is full; dropping run")
+            return None
+        return run.id
+    
+    async def _write_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+                self.written += len(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} runs: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _write_batch(self, batch: List[StoredRun]):
+        run_rows = []
+        output_rows = []
+        for run in batch:
+            result = run.result
+            final = result["stage_3_final"]
+            run_rows.append((
+                run.id,
+                run.created_at,
+                result["query"],
+                query_hash(result["query"]),
+                result.get("path", "full"),
+                final["status"],
+                final["chairman_model"],
+                result["processing_time"],
+                run.parent_id,
+                json.dumps(run.replayed_stages) if run.replayed_stages else None,
+                dumps({**result, "run_id": run.id}).decode()
+            ))
+            output_rows.extend(
+                (run.id, seq, out["stage"], out["model"], out["status"], out["output"], run.created_at)
+                for seq, out in enumerate(run.outputs)
+            )
+        with self._write_lock:
+            with self._write_conn:
+                self._write_conn.executemany(
+                    "INSERT INTO runs (id, created_at, query, query_hash, path, status, chairman_model, "
+                    "processing_time, parent_id, replayed_stages, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    run_rows
+                )
+                self._write_conn.executemany(
+                    "INSERT INTO run_outputs (run_id, seq, stage, model, status, output, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    output_rows
+                )
+    
+    def _read(self, sql: str, params: Tuple) -> List[tuple]:
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+    
+    async def list_runs(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        query: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Page through run summaries, newest first
+        
+        Pagination is keyset-based on (created_at, id), so pages stay cheap
+        and stable while new runs are written.
+        
+        Args:
+            limit: Runs per page
+            cursor: next_cursor of the previous page
+            query: Only runs of this query (matched after normalization)
+            model: Only runs in which this model answered, reviewed or chaired
+        
+        Returns:
+            Dict with "runs" and "next_cursor" (None on the last page)
+        """
+        clauses = []
+        params: List[Any] = []
+        if cursor:
+            created_at, run_id = cursor.split(":", 1)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([float(created_at), float(created_at), run_id])
+        if query:
+            clauses.append("query_hash = ?")
+            params.append(query_hash(query))
+        if model:
+            clauses.append("id IN (SELECT run_id FROM run_outputs WHERE model = ?)")
+            params.append(model)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit + 1)
+        
+        rows = await asyncio.to_thread(
+            self._read,
+            "SELECT id, created_at, query, path, status, chairman_model, processing_time, parent_id, "
+            f"replayed_stages FROM runs {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            tuple(params)
+        )
+        page = rows[:limit]
+        runs = [
+            {
+                "run_id": row[0],
+                "created_at": row[1],
+                "query": row[2],
+                "path": row[3],
+                "status": row[4],
+                "chairman_model": row[5],
+                "processing_time": row[6],
+                "parent_id": row[7],
+                "replayed_stages": json.loads(row[8]) if row[8] else None
+            }
+            for row in page
+        ]
+        next_cursor = f"{page[-1][1]!r}:{page[-1][0]}" if len(rows) > limit else None
+        return {"runs": runs, "next_cursor": next_cursor}
+    
+    async def get_run(self, run_id: str, include_outputs: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Load a stored run
+        
+        Args:
+            run_id: Id returned with the run
+            include_outputs: Also load the raw output of every model call
+        
+        Returns:
+            The stored result with run metadata, or None if unknown
+        """
+        rows = await asyncio.to_thread(
+            self._read,
+            "SELECT created_at, parent_id, replayed_stages, result FROM runs WHERE id = ?",
+            (run_id,)
+        )
+        if not rows:
+            return None
+        created_at, parent_id, replayed_stages, result = rows[0]
+        run = {
+            **orjson.loads(result),
+            "created_at": created_at,
+            "parent_id": parent_id,
+            "replayed_stages": json.loads(replayed_stages) if replayed_stages else None
+        }
+        if include_outputs:
+            outputs = await asyncio.to_thread(
+                self._read,
+                "SELECT stage, model, status, output FROM run_outputs WHERE run_id = ? ORDER BY seq",
+                (run_id,)
+            )
+            run["outputs"] = [
+                {"stage": stage, "model": model, "status": status, "output": output}
+                for stage, model, status, output in outputs
+            ]
+        return run
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._writer is not None,
+            "path": self.path,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize() if self._queue is not None else 0
+        }
+
+
+# Global run store; opened by the app on startup when RUN_STORE_ENABLED is set
+run_store = RunStore(
+    path=settings.run_store_path,
+    batch_size=settings.run_store_batch_size,
+    flush_interval=settings.run_store_flush_interval
+)
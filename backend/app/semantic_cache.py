@@ -0,0 +1,260 @@
+import logging
+import re
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+_NUMBER = re.compile(r"(?<![\w.])-?\d[\d,]*(?:\.\d+)?")
+# Function words a paraphrase may add, drop or swap without changing the question
+_QUERY_STOPWORDS = frozenset(
+    "an as at be by do if in is it me my no of on or so to up we "
+    "about above after again all also and any are because been before being between both but "
+    "can could did does doing down during each few for from further had has have having her "
+    "here hers him his how into its itself just more most much must not now off once only other "
+    "our out over own same she should some such than that the their them then there these they "
+    "this those through too under until very was way were what when where which while who whom "
+    "why will with would you your please tell explain give show".split()
+)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    query = _PUNCTUATION.sub(" ", query.lower())
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def key_numbers(text: str) -> frozenset:
+    """Numbers in text without thousands separators"""
+    return frozenset(match.replace(",", "") for match in _NUMBER.findall(text))
+
+
+def stem(word: str) -> str:
+    """Strip plural and verb endings, so that cause, causes and caused share the stem caus"""
+    if word.endswith(("ss", "is", "us")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def query_terms(query: str) -> frozenset:
+    """
+    Terms two queries must share to be answered by the same result
+    
+    Its numbers plus the stem of every lowercased content word (names
+    included), so "25" vs "65", "France" vs "Italy" or "ascending" vs
+    "descending" keep apart queries whose wording is otherwise the same,
+    while "cause" vs "causes" does not.
+    """
+    words = {
+        stem(word) for word in normalize_query(query).split()
+        if len(word) > 1 and word.isalpha() and word not in _QUERY_STOPWORDS
+    }
+    return key_numbers(query) | words
+
+
+class HashedNGramVectorizer:
+    """
+    CPU-only text embedding built from hashed word and character n-grams
+    
+    Word unigrams/bigrams and character 3/4-grams are hashed with CRC32 into a
+    fixed number of signed buckets, then L2-normalized so a dot product is the
+    cosine similarity. No model download and no fitting step are needed.
+    """
+    
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+    
+    def _features(self, text: str) -> list:
+        words = text.split()
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        padded = f" {text} "
+        for n in (3, 4):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+    
+    def transform(self, text: str) -> np.ndarray:
+        """
+        Embed a single text
+        
+        Args:
+            text: Raw text, normalized internally
+        
+        Returns:
+            Unit-length float32 vector of size dim (all zeros for empty text)
+        """
+        features = self._features(normalize_query(text))
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+        
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) for f in features),
+            dtype=np.uint32,
+            count=len(features)
+        )
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+        vector += np.bincount(hashes % self.dim, weights=signs, minlength=self.dim)
+        
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """
+    Near-duplicate query cache over a fixed-size NumPy index
+    
+    Embeddings live in a preallocated (max_entries, dim) float32 matrix, so
+    memory is bounded up front and a lookup is one matrix-vector product.
+    When the index is full the least recently used slot is overwritten.
+    
+    Embedding similarity alone cannot tell "sort ascending" from "sort
+    descending", so a candidate above the threshold is only served when its
+    query_terms equal those of the query. That gate is what keeps different
+    questions apart; the threshold only has to be low enough for reworded
+    ones ("What causes inflation?" vs "What are the causes of inflation?"
+    score about 0.62 at 256 dimensions).
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        threshold: float,
+        ttl: float,
+        dim: int = 256,
+        vectorizer: Optional[HashedNGramVectorizer] = None
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectorizer = vectorizer or HashedNGramVectorizer(dim)
+        
+        dim = self.vectorizer.dim
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._payloads: list = [None] * max_entries
+        self._queries: list = [None] * max_entries
+        self._terms: list = [None] * max_entries
+        self._slots: Dict[str, int] = {}
+        self._size = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.term_mismatches = 0
+    
+    def lookup(self, query: str) -> Optional[Tuple[Dict[str, Any], float, str]]:
+        """
+        Find a cached result for a query or a close paraphrase of it
+        
+        Args:
+            query: User's question
+        
+        Returns:
+            (payload, similarity, matched query) or None if nothing above
+            the threshold has the same query terms
+        """
+        if self._size == 0:
+            self.misses += 1
+            return None
+        
+        vector = self.vectorizer.transform(query)
+        now = time.time()
+        similarities = self._vectors[:self._size] @ vector
+        similarities[self._expires_at[:self._size] < now] = -1.0
+        
+        candidates = np.flatnonzero(similarities >= self.threshold)
+        terms = query_terms(query)
+        for slot in candidates[np.argsort(-similarities[candidates])]:
+            if self._terms[slot] != terms:
+                self.term_mismatches += 1
+                continue
+            self._last_used[slot] = now
+            self.hits += 1
+            return self._payloads[slot], float(similarities[slot]), self._queries[slot]
+        
+        self.misses += 1
+        return None
+    
+    def store(self, query: str, payload: Dict[str, Any]):
+        """
+        Cache a result for a query, evicting the least recently used entry
+        when the index is full
+        
+        Args:
+            query: User's question
+            payload: Result to return for this query and its paraphrases
+        """
+        key = normalize_query(query)
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = self._evict()
+            self._slots[key] = slot
+        
+        now = time.time()
+        self._vectors[slot] = self.vectorizer.transform(query)
+        self._expires_at[slot] = now + self.ttl
+        self._last_used[slot] = now
+        self._payloads[slot] = payload
+        self._queries[slot] = query
+        self._terms[slot] = query_terms(query)
+    
+    def _evict(self) -> int:
+        """Free the least recently used slot (expired slots go first)"""
+        now = time.time()
+        last_used = np.where(self._expires_at < now, -np.inf, self._last_used)
+        slot = int(np.argmin(last_used))
+        del self._slots[normalize_query(self._queries[slot])]
+        self.evictions += 1
+        return slot
+    
+    def clear(self):
+        """Drop every entry"""
+        self._payloads = [None] * self.max_entries
+        self._queries = [None] * self.max_entries
+        self._terms = [None] * self.max_entries
+        self._slots.clear()
+        self._size = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and index size"""
+        return {
+            "enabled": settings.semantic_cache_enabled,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "term_mismatches": self.term_mismatches,
+            "index_bytes": int(self._vectors.nbytes)
+        }
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache(
+    max_entries=settings.semantic_cache_max_entries,
+    threshold=settings.semantic_cache_threshold,
+    ttl=settings.semantic_cache_ttl_seconds,
+    dim=settings.semantic_cache_dim
+)
+
@@ -0,0 +1,165 @@
+"""
+Fast JSON responses and response compression
+
+Results are plain dicts of strings and numbers, so FastAPI's generic
+jsonable_encoder walk plus json.dumps is pure overhead for them: endpoints
+that return large payloads hand CouncilJSONResponse the dict (or model)
+directly, and orjson encodes it in one pass. Model dataclasses are encoded
+through their to_dict, so the wire format stays the one the API documents.
+
+CompressionMiddleware compresses complete JSON and text bodies of at least
+COMPRESSION_MIN_SIZE bytes with brotli (when the brotli package is installed)
+or gzip, whichever the client prefers. Streamed responses such as Server-Sent
+Events are passed through untouched so events are not held back.
+"""
+
+import gzip
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Encode model dataclasses the way the API documents them"""
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode a result as compact UTF-8 JSON
+    
+    Args:
+        obj: Dicts, lists, scalars and model dataclasses, nested in any way
+    
+    Returns:
+        JSON bytes
+    """
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+class CouncilJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; return it directly to skip jsonable_encoder"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """
+    Pick the response coding for an Accept-Encoding header
+    
+    Args:
+        header: Raw Accept-Encoding value
+    
+    Returns:
+        "br", "gzip" or None for an uncompressed body
+    """
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level)
+
+
+_COMPRESSIBLE = (b"application/json", b"text/plain", b"text/html", b"application/javascript")
+
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating brotli or gzip for complete, large enough bodies"""
+    
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = next((value for name, value in scope["headers"] if name == b"accept-encoding"), b"")
+        encoding = choose_encoding(header.decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start: Optional[Dict[str, Any]] = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held until the first body chunk shows whether the body is complete
+                start = message
+                return
+            
+            headers: List[Tuple[bytes, bytes]] = list(start["headers"])
+            content_type = next((value for name, value in headers if name == b"content-type"), b"")
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or not content_type.startswith(_COMPRESSIBLE)
+                or any(name == b"content-encoding" for name, _ in headers)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            
+            compressed = compress(body, encoding)
+            headers = [(name, value) for name, value in headers if name != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b"Accept-Encoding")
+            ]
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+        
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,375 @@
+"""
+State shared by every worker process
+
+With several workers (WORKERS > 1, or gunicorn with uvicorn workers) each
+process has its own pipeline, LLM client and limiters. Rate-limit buckets,
+concurrency slots, in-flight deduplication and metrics then go through a
+StateBackend so the workers together still respect each provider's limits
+and report one set of counters. The response cache is shared through its
+own persistent backend (see app.cache).
+
+STATE_BACKEND=local keeps everything in-process (one worker); sqlite keeps
+it in a local SQLite file every worker on the machine opens.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in slot holders, flight claims and metrics snapshots
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class StateBackend(ABC):
+    """Interface for state shared between worker processes"""
+    
+    @abstractmethod
+    def take(self, bucket: str, amount: float, capacity: float, rate: float) -> float:
+        """
+        Take amount tokens from a bucket refilled at rate per second
+        
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they may be
+        """
+    
+    @abstractmethod
+    def adjust(self, bucket: str, amount: float, capacity: float, rate: float):
+        """Take (positive) or give back (negative) tokens after the fact"""
+    
+    @abstractmethod
+    def acquire_slot(self, name: str, limit: int, holder: str, lease: float) -> bool:
+        """Take one of limit slots for at most lease seconds; False if all are held"""
+    
+    @abstractmethod
+    def release_slot(self, name: str, holder: str):
+        """Give back a slot taken by holder"""
+    
+    @abstractmethod
+    def claim(self, key: str, holder: str, ttl: float) -> Optional[str]:
+        """
+        Claim the computation of key for ttl seconds
+        
+        Returns:
+            None if holder now owns it, otherwise the current owner
+        """
+    
+    @abstractmethod
+    def finish(self, key: str, holder: str, value: Optional[str], ttl: float):
+        """Drop holder's claim on key, publishing value (if any) for ttl seconds"""
+    
+    @abstractmethod
+    def poll(self, key: str) -> Tuple[bool, Optional[str]]:
+        """
+        State of the computation of key
+        
+        Returns:
+            Tuple of (still claimed, published value or None)
+        """
+    
+    @abstractmethod
+    def put(self, key: str, value: str, ttl: float):
+        """Store a value readable by every worker for ttl seconds"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Value stored under key, or None if missing or expired"""
+    
+    @abstractmethod
+    def add(self, key: str, amount: float, ttl: float) -> float:
+        """
+        Add amount to a counter readable by every worker
+        
+        The counter expires ttl seconds after it was created.
+        
+        Returns:
+            The new total
+        """
+    
+    @abstractmethod
+    def put_metrics(self, worker: str, snapshot: str):
+        """Store a worker's metrics snapshot"""
+    
+    @abstractmethod
+    def get_metrics(self, max_age: float) -> Dict[str, str]:
+        """Snapshots of workers that reported within max_age seconds"""
+    
+    def close(self):
+        """Release any resources held by the backend"""
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Shared state in a SQLite file (WAL mode)
+    
+    Every operation is one short IMMEDIATE transaction, so concurrent workers
+    serialize on the database write lock. Times are wall-clock, since
+    monotonic clocks are not comparable across processes.
+    """
+    
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS slots (name TEXT NOT NULL, holder TEXT NOT NULL, expires_at REAL NOT NULL,
+                                      PRIMARY KEY (name, holder));
+    CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, holder TEXT, value TEXT, expires_at REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS worker_metrics (worker TEXT PRIMARY KEY, snapshot TEXT NOT NULL, updated REAL NOT NULL);
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+    
+    def _transaction(self, operation):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+    
+    def _refilled(self, conn: sqlite3.Connection, bucket: str, capacity: float, rate: float) -> float:
+        row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (bucket,)).fetchone()
+        if row is None:
+            return capacity
+        tokens, updated = row
+        return min(capacity, tokens + (time.time() - updated) * rate)
+    
+    def take(self, bucket: str, amount: float, capacity: float, rate: float) -> float:
+        def operation(conn):
+            tokens = self._refilled(conn, bucket, capacity, rate)
+            wait = 0.0
+            if tokens >= amount:
+                tokens -= amount
+            else:
+                wait = (amount - tokens) / rate
+            conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                         (bucket, tokens, time.time()))
+            return wait
+        return self._transaction(operation)
+    
+    def adjust(self, bucket: str, amount: float, capacity: float, rate: float):
+        def operation(conn):
+            tokens = min(capacity, self._refilled(conn, bucket, capacity, rate) - amount)
+            conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                         (bucket, tokens, time.time()))
+        self._transaction(operation)
+    
+    def acquire_slot(self, name: str, limit: int, holder: str, lease: float) -> bool:
+        def operation(conn):
+            now = time.time()
+            # Slots of a crashed worker come back when their lease runs out
+            conn.execute("DELETE FROM slots WHERE name = ? AND expires_at < ?", (name, now))
+            held = conn.execute("SELECT COUNT(*) FROM slots WHERE name = ?", (name,)).fetchone()[0]
+            if held >= limit:
+                return False
+            conn.execute("INSERT INTO slots (name, holder, expires_at) VALUES (?, ?, ?)", (name, holder, now + lease))
+            return True
+        return self._transaction(operation)
+    
+    def release_slot(self, name: str, holder: str):
+        self._transaction(lambda conn: conn.execute("DELETE FROM slots WHERE name = ? AND holder = ?", (name, holder)))
+    
+    def claim(self, key: str, holder: str, ttl: float) -> Optional[str]:
+        def operation(conn):
+            now = time.time()
+            row = conn.execute("SELECT holder, expires_at FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] is not None and row[1] >= now:
+                return row[0]
+            conn.execute("INSERT OR REPLACE INTO flights (key, holder, value, expires_at) VALUES (?, ?, NULL, ?)",
+                         (key, holder, now + ttl))
+            conn.execute("DELETE FROM flights WHERE expires_at < ?", (now,))
+            return None
+        return self._transaction(operation)
+    
+    def finish(self, key: str, holder: str, value: Optional[str], ttl: float):
+        def operation(conn):
+            row = conn.execute("SELECT holder FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] != holder:
+                return
+            if value is None:
+                conn.execute("DELETE FROM flights WHERE key = ?", (key,))
+            else:
+                conn.execute("UPDATE flights SET holder = NULL, value = ?, expires_at = ? WHERE key = ?",
+                             (value, time.time() + ttl, key))
+        self._transaction(operation)
+    
+    def poll(self, key: str) -> Tuple[bool, Optional[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT holder, value FROM flights WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return False, None
+        return row[0] is not None, row[1]
+    
+    def put(self, key: str, value: str, ttl: float):
+        def operation(conn):
+            now = time.time()
+            conn.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, value, now + ttl))
+            conn.execute("DELETE FROM kv WHERE expires_at < ?", (now,))
+        self._transaction(operation)
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def add(self, key: str, amount: float, ttl: float) -> float:
+        def operation(conn):
+            now = time.time()
+            row = conn.execute("SELECT value, expires_at FROM kv WHERE key = ? AND expires_at >= ?", (key, now)).fetchone()
+            total = (float(row[0]) if row else 0.0) + amount
+            conn.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, str(total), row[1] if row else now + ttl))
+            return total
+        return self._transaction(operation)
+    
+    def put_metrics(self, worker: str, snapshot: str):
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO worker_metrics (worker, snapshot, updated) VALUES (?, ?, ?)",
+            (worker, snapshot, time.time())
+        ))
+    
+    def get_metrics(self, max_age: float) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT worker, snapshot FROM worker_metrics WHERE updated >= ?", (time.time() - max_age,)
+            ).fetchall()
+        return dict(rows)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SharedTokenBucket:
+    """TokenBucket counterpart whose tokens live in the state backend"""
+    
+    def __init__(self, backend: StateBackend, name: str, capacity_per_minute: float):
+        self.backend = backend
+        self.name = name
+        self.capacity = capacity_per_minute
+        self.rate = capacity_per_minute / 60.0
+        # FIFO within this worker, as with TokenBucket
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, amount: float):
+        """Wait until amount tokens are available in the shared bucket and take them"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                wait = await asyncio.to_thread(self.backend.take, self.name, amount, self.capacity, self.rate)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+    
+    def adjust(self, amount: float):
+        """Take or give back tokens without waiting for the backend"""
+        in_background(self.backend.adjust, self.name, amount, self.capacity, self.rate)
+
+
+class SharedSemaphore:
+    """Concurrency cap counted across workers; slots are leased so a crash cannot leak them"""
+    
+    def __init__(self, backend: StateBackend, name: str, limit: int, lease: float):
+        self.backend = backend
+        self.name = name
+        self.limit = limit
+        self.lease = lease
+        self._sequence = 0
+    
+    async def acquire(self) -> str:
+        """
+        Wait for a free slot and take it
+        
+        Returns:
+            The holder id, to pass to release
+        """
+        self._sequence += 1
+        holder = f"{WORKER_ID}:{id(self)}:{self._sequence}"
+        delay = settings.state_poll_interval
+        while not await asyncio.to_thread(self.backend.acquire_slot, self.name, self.limit, holder, self.lease):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        return holder
+    
+    def release(self, holder: str):
+        """Give back the slot taken as holder"""
+        in_background(self.backend.release_slot, self.name, holder)
+
+
+def in_background(function, *args):
+    """Run a blocking backend write on a worker thread without waiting for it"""
+    def done(future):
+        if future.exception() is not None:
+            logger.error(f"Shared state write failed: {str(future.exception())}")
+    asyncio.get_running_loop().run_in_executor(None, function, *args).add_done_callback(done)
+
+
+class MetricsSync:
+    """Publishes this worker's metrics and merges every live worker's at scrape time"""
+    
+    def __init__(self, backend: Optional[StateBackend], interval: float):
+        self.backend = backend
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _publish_loop(self, registry):
+        while True:
+            try:
+                await asyncio.to_thread(self.backend.put_metrics, WORKER_ID, json.dumps(registry.snapshot()))
+            except Exception as e:
+                logger.error(f"Failed to publish metrics: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    def start(self, registry):
+        if self.backend is not None and self._task is None:
+            self._task = asyncio.create_task(self._publish_loop(registry))
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    async def render(self, registry) -> str:
+        """Prometheus text of this worker's metrics plus the other live workers' last snapshots"""
+        if self.backend is None:
+            return registry.render()
+        snapshots = await asyncio.to_thread(self.backend.get_metrics, 3 * self.interval)
+        others = [json.loads(snapshot) for worker, snapshot in snapshots.items() if worker != WORKER_ID]
+        return registry.render(others)
+
+
+def create_state_backend() -> Optional[StateBackend]:
+    """Build the backend selected by settings.state_backend; None keeps state in-process"""
+    if settings.state_backend == "local":
+        return None
+    if settings.state_backend == "sqlite":
+        return SQLiteStateBackend(settings.state_sqlite_path)
+    raise ValueError(f"Unknown state backend: {settings.state_backend}")
+
+
+# Global shared state, None when STATE_BACKEND=local
+state_backend = create_state_backend()
+metrics_sync = MetricsSync(state_backend, settings.state_sync_interval)
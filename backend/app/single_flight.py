@@ -0,0 +1,184 @@
+"""
+Single-flight deduplication of identical in-flight work
+
+When the same council query (or the same model call) arrives while an
+identical one is still running, the newcomer joins the running computation
+instead of starting its own. This complements the caches, which only help
+once a result exists. Progress events of a shared computation fan out to
+every caller that passed a callback; callers that join late first get the
+events emitted so far.
+
+Given a shared state backend, flights also span worker processes: the first
+worker to claim a key runs it and publishes the result, and callers in other
+workers poll for it. Events do not cross processes, so callers that want
+them (streams) only join flights of their own worker.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.config import settings
+from app.metrics import single_flight_calls
+from app.shared_state import WORKER_ID, StateBackend, state_backend
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# How long a published result stays readable for callers in other workers
+RESULT_TTL = 30.0
+
+# Same shape as the pipeline's progress callback
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class _Flight:
+    """One shared computation and the callers waiting on it"""
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.listeners: List[EventCallback] = []
+        self.callers = 0
+    
+    def emit(self, event: str, data: Dict[str, Any]):
+        """Record an event for late joiners and forward it to every listener"""
+        self.events.append((event, data))
+        for listener in list(self.listeners):
+            listener(event, data)
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time
+    
+    The computation runs in its own task, so it survives any one caller
+    being cancelled; it is cancelled only when every caller has gone.
+    Results must be JSON-serializable when a backend is used.
+    """
+    
+    def __init__(self, name: str, backend: Optional[StateBackend] = None):
+        self.name = name
+        self.backend = backend
+        self.leaders = 0
+        self.followers = 0
+        self.remote_followers = 0
+        self._flights: Dict[str, _Flight] = {}
+    
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[EventCallback], Awaitable[T]],
+        on_event: Optional[EventCallback] = None
+    ) -> Tuple[T, bool]:
+        """
+        Run fn for key, or join the run already in flight for it
+        
+        Args:
+            key: Identity of the computation
+            fn: Coroutine factory; receives the callback to emit events through
+            on_event: Optional callback for the computation's events
+        
+        Returns:
+            Tuple of (result, shared), shared being True when this caller joined
+            a computation started by another one
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, fn, flight, follow_remote=on_event is None))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.leaders += 1
+            single_flight_calls.inc(level=self.name, role="leader")
+        else:
+            self.followers += 1
+            single_flight_calls.inc(level=self.name, role="follower")
+        
+        if on_event is not None:
+            for event, data in flight.events:
+                on_event(event, data)
+            flight.listeners.append(on_event)
+        flight.callers += 1
+        try:
+            result, remote = await asyncio.shield(flight.task)
+            return result, shared or remote
+        finally:
+            flight.callers -= 1
+            if on_event is not None:
+                flight.listeners.remove(on_event)
+            if flight.callers == 0 and not flight.task.done():
+                # Nobody is waiting for the result any more
+                logger.info(f"Cancelling abandoned {self.name} flight")
+                flight.task.cancel()
+                self._forget(key, flight)
+    
+    async def _run(
+        self,
+        key: str,
+        fn: Callable[[EventCallback], Awaitable[T]],
+        flight: _Flight,
+        follow_remote: bool
+    ) -> Tuple[T, bool]:
+        """
+        Run the computation, or wait for another worker already running it
+        
+        Returns:
+            Tuple of (result, whether another worker computed it)
+        """
+        if self.backend is None:
+            return await fn(flight.emit), False
+        
+        shared_key = f"{self.name}:{key}"
+        holder = f"{WORKER_ID}:{id(flight)}"
+        claim = lambda: asyncio.to_thread(self.backend.claim, shared_key, holder, settings.state_lease_seconds)
+        owned = await claim() is None
+        while not owned and follow_remote:
+            value = await self._follow(shared_key)
+            if value is not None:
+                self.remote_followers += 1
+                single_flight_calls.inc(level=self.name, role="remote_follower")
+                return json.loads(value), True
+            # The other worker failed or died; take over
+            owned = await claim() is None
+        
+        value = None
+        try:
+            result = await fn(flight.emit)
+            value = json.dumps(result)
+            return result, False
+        finally:
+            if owned:
+                await asyncio.to_thread(self.backend.finish, shared_key, holder, value, RESULT_TTL)
+    
+    async def _follow(self, shared_key: str) -> Optional[str]:
+        """Poll for another worker's result; None once its claim is gone without one"""
+        delay = settings.state_poll_interval
+        while True:
+            claimed, value = await asyncio.to_thread(self.backend.poll, shared_key)
+            if value is not None or not claimed:
+                return value
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+    
+    def _forget(self, key: str, flight: _Flight):
+        # A cancelled flight may already have been replaced by a new one
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "waiting": sum(flight.callers for flight in self._flights.values()),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "remote_followers": self.remote_followers
+        }
+
+
+# Global single-flight groups for whole council runs and for model calls
+pipeline_flights = SingleFlight("pipeline", state_backend)
+completion_flights = SingleFlight("completion", state_backend)
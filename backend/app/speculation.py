@@ -0,0 +1,149 @@
+"""
+Speculative chairman synthesis
+
+With SPECULATIVE_SYNTHESIS on, the chairman starts a draft from the Stage 1
+answers alone as soon as the last answer is in, while the reviews are still
+running. Once the reviews are aggregated the draft is checked against them:
+the draft "assumes" the answer it is closest to (by the same similarity the
+early-exit detector uses) is the best one. If that answer is among the
+SPECULATIVE_ACCEPT_TOP answers of the reviewers' consensus, the draft is
+returned as the synthesis; otherwise the chairman revises it in a short pass
+that sees the draft, the scoreboard and the top-ranked answers instead of
+every answer. Runs that need no chairman (direct-answer early exits) cancel
+the draft.
+
+A normal synthesis would have started when the reviews were in and taken
+about as long as the draft did, so the latency saved is estimated as the
+draft's latency minus the time still spent on it (waiting for it and any
+revision) after the reviews were in.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+
+from app.agreement import text_similarity
+from app.config import settings
+from app.metrics import registry
+from app.models import LLMResponse, RankAggregate
+
+speculations = registry.counter(
+    "council_speculation_total",
+    "Speculative chairman drafts by outcome (accepted, revised, failed, cancelled)",
+    ["outcome"]
+)
+speculation_seconds = registry.counter(
+    "council_speculation_seconds_total",
+    "Estimated synthesis latency speculation saved or lost",
+    ["effect"]
+)
+
+
+def closest_answer(draft: str, responses: List[LLMResponse]) -> Optional[str]:
+    """
+    Model whose Stage 1 answer the draft is most similar to
+    
+    Args:
+        draft: Chairman draft
+        responses: Stage 1 responses; failed ones are ignored
+    
+    Returns:
+        Model name, or None without successful answers
+    """
+    successful = [resp for resp in responses if resp.is_ok]
+    if not successful:
+        return None
+    return max(successful, key=lambda resp: text_similarity(draft, resp.response)).model_name
+
+
+def top_ranked(aggregate: RankAggregate, count: int) -> List[str]:
+    """Models of the count best answers in the reviewers' consensus order"""
+    return [score.model_name for score in sorted(aggregate.scores, key=lambda s: s.consensus_rank)[:count]]
+
+
+@dataclass
+class SpeculativeDraft:
+    """A chairman draft started from the Stage 1 answers while the reviews run"""
+    chairman_model: str
+    task: Optional[asyncio.Task] = None
+    coro: Optional[Coroutine] = None
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    
+    @classmethod
+    def start(cls, coro: Coroutine[Any, Any, str], chairman_model: str) -> "SpeculativeDraft":
+        """Run coro, the draft synthesis call, as a task of the current run"""
+        draft = cls(chairman_model=chairman_model, coro=coro)
+        draft.task = asyncio.create_task(draft._run(coro))
+        return draft
+    
+    async def _run(self, coro: Coroutine[Any, Any, str]) -> str:
+        try:
+            return await coro
+        finally:
+            self.finished_at = time.monotonic()
+    
+    @property
+    def latency(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+    
+    async def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        # A task cancelled before its first step never awaited the call
+        self.coro.close()
+    
+    def check(self, content: str, responses: List[LLMResponse], aggregate: Optional[RankAggregate]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Whether the draft leans on an answer the reviewers ranked at the top
+        
+        Returns:
+            (accepted, details for the run's speculation block)
+        """
+        if aggregate is None or not aggregate.scores:
+            return True, {"reason": "no reviews"}
+        leaned_on = closest_answer(content, responses)
+        top = top_ranked(aggregate, settings.speculative_accept_top)
+        return leaned_on in top, {"draft_leaned_on": leaned_on, "review_top": top}
+
+
+class SpeculationStats:
+    """How often drafts were used and how much synthesis latency they saved"""
+    
+    def __init__(self):
+        self.outcomes: Dict[str, int] = {}
+        self.saved_seconds = 0.0
+        self.lost_seconds = 0.0
+    
+    def record(self, outcome: str, saved: Optional[float] = None):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        speculations.inc(outcome=outcome)
+        if saved is None:
+            return
+        if saved >= 0:
+            self.saved_seconds += saved
+            speculation_seconds.inc(saved, effect="saved")
+        else:
+            self.lost_seconds -= saved
+            speculation_seconds.inc(-saved, effect="lost")
+    
+    def stats(self) -> Dict[str, Any]:
+        drafts = sum(self.outcomes.values())
+        used = self.outcomes.get("accepted", 0) + self.outcomes.get("revised", 0)
+        return {
+            "enabled": settings.speculative_synthesis,
+            "drafts": drafts,
+            "outcomes": dict(self.outcomes),
+            "accept_rate": round(self.outcomes.get("accepted", 0) / drafts, 3) if drafts else None,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "lost_seconds": round(self.lost_seconds, 3),
+            "mean_saved_seconds": round((self.saved_seconds - self.lost_seconds) / used, 3) if used else None
+        }
+
+
+# Global speculation counters, reported by GET /speculation
+speculation_stats = SpeculationStats()
@@ -0,0 +1,38 @@
+import re
+from typing import Dict, List
+
+# Words, numbers and individual punctuation marks; close to what BPE
+# tokenizers produce for English text without needing a vocabulary file
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Per-message overhead of the chat format (role markers, separators)
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text locally
+    
+    Args:
+        text: Any text
+        
+    Returns:
+        int: Approximate number of tokens
+    """
+    if not text:
+        return 0
+    # Long words are split into several sub-word tokens
+    return sum(1 + len(piece) // 6 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Estimate the prompt tokens of a chat message list
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        
+    Returns:
+        int: Approximate number of prompt tokens
+    """
+    return sum(estimate_tokens(m.get("content") or "") + _MESSAGE_OVERHEAD for m in messages)
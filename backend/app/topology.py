@@ -0,0 +1,266 @@
+"""
+Review topologies for Stage 2
+
+A topology decides who reviews which answers. With all-pairs every member
+ranks every other member's answer, so prompt volume grows as O(N^2); the
+other topologies cap it for larger councils. Compare their cost with
+python -m benchmarks.topology.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.models import LLMResponse, ReviewResponse
+
+logger = logging.getLogger(__name__)
+
+
+def anonymous_id(index: int) -> str:
+    """Spreadsheet-style anonymous id: A..Z, then AA, AB, ..."""
+    label = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+@dataclass
+class ReviewAssignment:
+    """One review call: a reviewer ranking some members' answers"""
+    key: str
+    reviewer: str
+    reviewees: List[str]
+    # Member reviews are dropped when the reviewer's own Stage 1 call fails;
+    # a judge reviews regardless
+    member_review: bool = True
+
+
+class ReviewTopology(ABC):
+    """Base class: review calls planned from the member list"""
+    
+    name = "base"
+    
+    @abstractmethod
+    def plan(self, members: List[str]) -> List[ReviewAssignment]:
+        """Review calls that can be planned before any review has finished"""
+    
+    def assignments(
+        self,
+        members: List[str],
+        responses: Dict[str, LLMResponse],
+        reviews: Dict[str, Optional[ReviewResponse]]
+    ) -> List[ReviewAssignment]:
+        """
+        Review calls known so far
+        
+        Static topologies return their whole plan; multi-round topologies add
+        calls as earlier reviews complete.
+        
+        Args:
+            members: Council members in order
+            responses: Settled Stage 1 responses by model
+            reviews: Finished review calls by assignment key (None for calls
+                that failed or could not be parsed)
+        
+        Returns:
+            List of ReviewAssignment objects
+        """
+        return self.plan(members)
+    
+    def expected_cost(self, size: int) -> Dict[str, int]:
+        """Review calls and answers embedded in review prompts for a council of size"""
+        members = [f"m{i}" for i in range(size)]
+        plan = self.plan(members)
+        return {
+            "calls": len(plan),
+            "answers_in_prompts": sum(len(a.reviewees) for a in plan)
+        }
+
+
+class AllPairsTopology(ReviewTopology):
+    """Every member ranks every other member's answer: N calls, N(N-1) answers"""
+    
+    name = "all_pairs"
+    
+    def plan(self, members: List[str]) -> List[ReviewAssignment]:
+        return [
+            ReviewAssignment(
+                key=reviewer,
+                reviewer=reviewer,
+                reviewees=[model for model in members if model != reviewer]
+            )
+            for reviewer in members
+        ]
+
+
+class RoundRobinTopology(ReviewTopology):
+    """
+    Each member ranks the next k members' answers (wrapping around)
+    
+    Every answer still gets k independent reviews, but prompt volume is
+    N*k answers instead of N(N-1).
+    """
+    
+    name = "round_robin"
+    
+    def __init__(self, k: int = 2):
+        self.k = max(2, k)
+    
+    def plan(self, members: List[str]) -> List[ReviewAssignment]:
+        n = len(members)
+        k = min(self.k, n - 1)
+        return [
+            ReviewAssignment(
+                key=reviewer,
+                reviewer=reviewer,
+                reviewees=[members[(idx + offset) % n] for offset in range(1, k + 1)]
+            )
+            for idx, reviewer in enumerate(members)
+        ]
+
+
+class JudgeTopology(ReviewTopology):
+    """A single judge model ranks every answer in one call"""
+    
+    name = "judge"
+    
+    def __init__(self, judge_model: str):
+        self.judge_model = judge_model
+    
+    def plan(self, members: List[str]) -> List[ReviewAssignment]:
+        return [
+            ReviewAssignment(
+                key="judge",
+                reviewer=self.judge_model,
+                reviewees=list(members),
+                member_review=False
+            )
+        ]
+
+
+class TournamentTopology(ReviewTopology):
+    """
+    Single-elimination bracket judged pairwise
+    
+    The judge compares two answers per call; winners advance until one is
+    left. That is N-1 calls with two answers each, run in ceil(log2 N)
+    rounds. Failed answers give their opponent a bye.
+    """
+    
+    name = "tournament"
+    
+    def __init__(self, judge_model: str):
+        self.judge_model = judge_model
+    
+    def _bracket_size(self, members: List[str]) -> int:
+        size = 1
+        while size < len(members):
+            size *= 2
+        return size
+    
+    def plan(self, members: List[str]) -> List[ReviewAssignment]:
+        """First-round matches; later rounds depend on who wins them"""
+        slots: List[Optional[str]] = list(members) + [None] * (self._bracket_size(members) - len(members))
+        return [
+            ReviewAssignment(
+                key=f"round_1_match_{match + 1}",
+                reviewer=self.judge_model,
+                reviewees=[slots[2 * match], slots[2 * match + 1]],
+                member_review=False
+            )
+            for match in range(len(slots) // 2)
+            if slots[2 * match + 1] is not None
+        ]
+    
+    def assignments(
+        self,
+        members: List[str],
+        responses: Dict[str, LLMResponse],
+        reviews: Dict[str, Optional[ReviewResponse]]
+    ) -> List[ReviewAssignment]:
+        # Slot values: a model name, None for an empty slot, or "" while undecided
+        slots: List[Optional[str]] = []
+        for idx in range(self._bracket_size(members)):
+            if idx >= len(members):
+                slots.append(None)
+            elif members[idx] not in responses:
+                slots.append("")
+            else:
+                slots.append(members[idx] if responses[members[idx]].is_ok else None)
+        
+        ids_to_models = {resp.model_id: model for model, resp in responses.items()}
+        ready = []
+        round_no = 0
+        while len(slots) > 1:
+            winners: List[Optional[str]] = []
+            for match in range(len(slots) // 2):
+                left, right = slots[2 * match], slots[2 * match + 1]
+                key = f"round_{round_no + 1}_match_{match + 1}"
+                if left == "" or right == "":
+                    winners.append("")
+                elif left is None or right is None:
+                    winners.append(left or right)
+                elif key in reviews:
+                    winners.append(self._winner(reviews[key], left, right, ids_to_models))
+                else:
+                    ready.append(ReviewAssignment(
+                        key=key,
+                        reviewer=self.judge_model,
+                        reviewees=[left, right],
+                        member_review=False
+                    ))
+                    winners.append("")
+            slots = winners
+            round_no += 1
+        return ready
+    
+    def _winner(
+        self,
+        review: Optional[ReviewResponse],
+        left: str,
+        right: str,
+        ids_to_models: Dict[str, str]
+    ) -> str:
+        rankings = review.rankings if review is not None else []
+        best = min(rankings, key=lambda entry: entry.rank, default=None)
+        winner = ids_to_models.get(best.response_id) if best is not None else None
+        if winner not in (left, right):
+            logger.warning(f"Match {left} vs {right} has no usable winner; advancing {left}")
+            return left
+        return winner
+    
+    def expected_cost(self, size: int) -> Dict[str, int]:
+        # Every match is played when no answer fails
+        matches = max(size - 1, 0)
+        return {"calls": matches, "answers_in_prompts": 2 * matches}
+
+
+TOPOLOGIES = ("all_pairs", "round_robin", "judge", "tournament")
+
+
+def get_topology(name: Optional[str] = None) -> ReviewTopology:
+    """
+    Build a topology from its name
+    
+    Args:
+        name: One of TOPOLOGIES; defaults to settings.review_topology
+    
+    Returns:
+        ReviewTopology instance configured from settings
+    """
+    name = name or settings.review_topology
+    judge = settings.review_judge_model or settings.chairman_model
+    if name == "all_pairs":
+        return AllPairsTopology()
+    if name == "round_robin":
+        return RoundRobinTopology(settings.review_round_robin_k)
+    if name == "judge":
+        return JudgeTopology(judge)
+    if name == "tournament":
+        return TournamentTopology(judge)
+    raise ValueError(f"Unknown review topology: {name} (expected one of {', '.join(TOPOLOGIES)})")
+
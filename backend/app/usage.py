@@ -0,0 +1,448 @@
+"""
+Token accounting, budgets and per-tenant quotas
+
+Every upstream call's tokens (the provider's usage block, or a local
+estimate when it has none) are charged to the tenant of the run that made
+it: the API key of the request, named through API_KEYS. The ledger keeps
+daily totals per tenant and totals per model, and each result gets a usage
+block with what that run spent.
+
+Requests are admitted against the tenant's daily budget: once it is spent
+they get 429 until midnight UTC. Admission reserves the tokens a full run is
+expected to need, so concurrent requests cannot all be admitted against the
+same remainder; the reservation is given back when the run ends, by which
+time its calls have been charged. An admitted run gets a RunBudget holding
+the tokens it may still spend (the per-request budget, capped by what is
+left of the day's). Before Stage 1 the pipeline compares that with the
+tokens the run is expected to need, from each model's recent usage, and
+takes a cheaper path when it would not fit: the chairman without reviews,
+or the most representative answer without a chairman. The same happens
+with reviews once the tenant has used BUDGET_DEGRADE_AT of its day, and the
+synthesis is checked again against the tokens actually spent once the
+reviews are in.
+
+With a shared STATE_BACKEND the daily totals that budgets are checked
+against span every worker; the per-model breakdown is this worker's.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.context import get_run_context
+from app.metrics import registry
+from app.models import CallTiming, PipelinePath
+from app.routing import model_router
+from app.shared_state import StateBackend, in_background, state_backend
+from app.topology import ReviewTopology
+
+logger = logging.getLogger(__name__)
+
+tenant_tokens = registry.counter(
+    "council_tenant_tokens_total",
+    "Upstream tokens charged per tenant",
+    ["tenant", "type"]
+)
+budget_rejections = registry.counter(
+    "council_budget_rejections_total",
+    "Requests rejected because the tenant's daily token budget was spent",
+    ["tenant"]
+)
+budget_degradations = registry.counter(
+    "council_budget_degraded_total",
+    "Runs that took a cheaper path to stay within their token budget",
+    ["path"]
+)
+
+ANONYMOUS = "anonymous"
+
+
+class UnknownApiKey(Exception):
+    """Raised for an X-API-Key that API_KEYS does not name"""
+
+
+class BudgetExceeded(Exception):
+    """Raised at admission when the tenant's daily token budget is spent"""
+    
+    def __init__(self, tenant: str, used: int, budget: int, retry_after: int):
+        super().__init__(f"Daily token budget of {budget} spent ({used} used) for tenant {tenant}")
+        self.tenant = tenant
+        self.retry_after = retry_after
+
+
+def load_api_keys() -> Dict[str, str]:
+    """Parse settings.api_keys into {api key: tenant}"""
+    if not settings.api_keys:
+        return {}
+    return {str(key): str(tenant) for key, tenant in json.loads(settings.api_keys).items()}
+
+
+def load_tenant_budgets() -> Dict[str, Dict[str, int]]:
+    """Parse settings.tenant_budgets into {tenant: {"daily_tokens", "request_tokens"}}"""
+    if not settings.tenant_budgets:
+        return {}
+    return {
+        tenant: {name: int(value) for name, value in budgets.items()}
+        for tenant, budgets in json.loads(settings.tenant_budgets).items()
+    }
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _seconds_to_midnight() -> int:
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def _charged(call: CallTiming) -> bool:
+    # Cache hits and joined calls made no upstream request of their own
+    return not (call.cache_hit or call.coalesced)
+
+
+def expected_tokens(members: List[str], chairman: str, topology: ReviewTopology) -> Dict[str, float]:
+    """
+    Tokens a full run is expected to need per stage, from each model's recent calls
+    
+    Args:
+        members: Council members answering and reviewing
+        chairman: Model writing the synthesis
+        topology: Review topology, for the number of review calls
+    
+    Returns:
+        Dict of stage name to expected prompt plus completion tokens
+    """
+    def call(model: str, stage: str) -> float:
+        return sum(model_router.stats_for(model).mean_tokens(stage))
+    
+    reviews = topology.expected_cost(len(members))["calls"]
+    return {
+        "stage_1": sum(call(model, "stage_1") for model in members),
+        "stage_2": reviews * sum(call(model, "stage_2") for model in members) / max(len(members), 1),
+        "stage_3": call(chairman, "stage_3")
+    }
+
+
+@dataclass
+class RunBudget:
+    """Tokens an admitted run may spend and the path the budget left it"""
+    tenant: str
+    limit: Optional[int] = None  # None = unlimited
+    nearly_spent: bool = False  # Tenant is past BUDGET_DEGRADE_AT of its daily budget
+    expected: Dict[str, float] = field(default_factory=dict)
+    path: Optional[PipelinePath] = None  # Set when the budget forced a cheaper path
+    reason: Optional[str] = None
+    reserved: int = 0  # Tokens held against the daily budget since admission
+    day: Optional[str] = None  # Day the reservation was charged to
+    
+    @property
+    def may_degrade(self) -> bool:
+        """Whether plan() could send this run down a cheaper path"""
+        return self.limit is not None or self.nearly_spent
+    
+    def settle(self):
+        """Give back the admission reservation once the run is over; calling it again does nothing"""
+        if self.reserved:
+            usage_ledger.release(self.tenant, self.day, self.reserved)
+            self.reserved = 0
+    
+    def spent(self) -> int:
+        """Tokens the current run has spent so far"""
+        return sum(call.prompt_tokens + call.completion_tokens for call in get_run_context().calls if _charged(call))
+    
+    def _degrade(self, path: PipelinePath, reason: str) -> PipelinePath:
+        if self.path is None:
+            usage_ledger.record_degraded(self.tenant)
+        self.path, self.reason = path, reason
+        budget_degradations.inc(path=path.value)
+        logger.info(f"Token budget of tenant {self.tenant}: taking the {path.value} path ({reason})")
+        return path
+    
+    def plan(self, members: List[str], chairman: str, topology: ReviewTopology) -> Optional[PipelinePath]:
+        """
+        Path the budget leaves a run of this council, decided before Stage 1
+        
+        Returns:
+            PipelinePath to take instead of the full run, or None
+        """
+        self.expected = expected_tokens(members, chairman, topology)
+        full = sum(self.expected.values())
+        if self.limit is not None and self.expected["stage_1"] + self.expected["stage_3"] > self.limit:
+            return self._degrade(PipelinePath.DIRECT, f"about {full:.0f} tokens needed, {self.limit} left")
+        if self.limit is not None and full > self.limit:
+            return self._degrade(PipelinePath.SKIP_REVIEW, f"about {full:.0f} tokens needed, {self.limit} left")
+        if self.nearly_spent:
+            return self._degrade(PipelinePath.SKIP_REVIEW, "daily budget nearly spent")
+        return None
+    
+    def allows_synthesis(self) -> bool:
+        """Whether the tokens still left cover the synthesis, checked once the reviews are in"""
+        if self.limit is None or self.spent() + self.expected.get("stage_3", 0.0) <= self.limit:
+            return True
+        self._degrade(PipelinePath.DIRECT, f"{self.spent()} of {self.limit} tokens spent before the synthesis")
+        return False
+    
+    def to_dict(self) -> dict:
+        data = {"limit": self.limit, "nearly_spent": self.nearly_spent}
+        if self.path is not None:
+            data["degraded_to"] = self.path.value
+            data["reason"] = self.reason
+        return data
+
+
+def run_usage(calls: List[CallTiming], budget: Optional[RunBudget]) -> Dict[str, Any]:
+    """
+    Usage block of a result: the tokens and cost the run was charged
+    
+    Args:
+        calls: Model calls of the run; cache hits and joined calls are free
+        budget: The run's budget, if it was admitted through the API
+    
+    Returns:
+        Dict with totals, a per-model breakdown and the budget
+    """
+    by_model: Dict[str, Dict[str, Any]] = {}
+    for call in calls:
+        if not _charged(call):
+            continue
+        entry = by_model.setdefault(call.model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+        entry["calls"] += 1
+        entry["prompt_tokens"] += call.prompt_tokens
+        entry["completion_tokens"] += call.completion_tokens
+        entry["cost"] += usage_ledger.cost(call)
+    for entry in by_model.values():
+        entry["cost"] = round(entry["cost"], 6)
+    
+    charged = [call for call in calls if _charged(call)]
+    prompt_tokens = sum(call.prompt_tokens for call in charged)
+    completion_tokens = sum(call.completion_tokens for call in charged)
+    return {
+        "tenant": budget.tenant if budget is not None else ANONYMOUS,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "estimated_tokens": sum(call.prompt_tokens + call.completion_tokens for call in charged if call.usage_estimated),
+        "cost": round(sum(entry["cost"] for entry in by_model.values()), 6),
+        "by_model": by_model,
+        "budget": budget.to_dict() if budget is not None else None
+    }
+
+
+class UsageLedger:
+    """Token totals per tenant and day and per model, and admission against the budgets"""
+    
+    def __init__(self, backend: Optional[StateBackend]):
+        self.backend = backend
+        self.api_keys = load_api_keys()
+        self.budgets = load_tenant_budgets()
+        # day -> tenant -> totals
+        self._days: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._models: Dict[str, Dict[str, float]] = {}
+    
+    def tenant_for(self, api_key: Optional[str]) -> str:
+        """
+        Tenant of a request's API key
+        
+        Returns:
+            The tenant API_KEYS names for the key, "anonymous" without a key,
+            or a fingerprint of the key when API_KEYS is not set
+        
+        Raises:
+            UnknownApiKey: When API_KEYS is set and does not name the key
+        """
+        if not api_key:
+            return ANONYMOUS
+        if api_key in self.api_keys:
+            return self.api_keys[api_key]
+        if self.api_keys:
+            # Otherwise every made-up key would be a new tenant with a fresh budget
+            raise UnknownApiKey("Unknown API key")
+        return "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    
+    def limits(self, tenant: str) -> Tuple[int, int]:
+        """(daily, per-request) token budgets of a tenant; 0 is unlimited"""
+        budgets = self.budgets.get(tenant, {})
+        return (
+            budgets.get("daily_tokens", settings.tenant_daily_token_budget),
+            budgets.get("request_tokens", settings.request_token_budget)
+        )
+    
+    def cost(self, call: CallTiming) -> float:
+        """Dollars of a call at the MODEL_COSTS prices"""
+        prompt_price, completion_price = model_router.costs.get(call.model, (0.0, 0.0))
+        return call.prompt_tokens * prompt_price + call.completion_tokens * completion_price
+    
+    def _totals(self, day: str, tenant: str) -> Dict[str, float]:
+        if day not in self._days:
+            self._days[day] = {}
+            # Keep USAGE_HISTORY_DAYS days
+            for old in sorted(self._days)[:-max(settings.usage_history_days, 1)]:
+                del self._days[old]
+        return self._days[day].setdefault(tenant, {
+            "requests": 0, "rejected": 0, "degraded": 0, "reserved": 0, "calls": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "estimated_tokens": 0, "cost": 0.0
+        })
+    
+    def record(self, call: CallTiming, tenant: str):
+        """Charge a finished call to a tenant; free calls are skipped"""
+        if not _charged(call):
+            return
+        tokens = call.prompt_tokens + call.completion_tokens
+        cost = self.cost(call)
+        day = _today()
+        
+        totals = self._totals(day, tenant)
+        totals["calls"] += 1
+        totals["prompt_tokens"] += call.prompt_tokens
+        totals["completion_tokens"] += call.completion_tokens
+        totals["cost"] += cost
+        if call.usage_estimated:
+            totals["estimated_tokens"] += tokens
+        
+        model = self._models.setdefault(call.model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+        model["calls"] += 1
+        model["prompt_tokens"] += call.prompt_tokens
+        model["completion_tokens"] += call.completion_tokens
+        model["cost"] += cost
+        
+        tenant_tokens.inc(call.prompt_tokens, tenant=tenant, type="prompt")
+        tenant_tokens.inc(call.completion_tokens, tenant=tenant, type="completion")
+        if self.backend is not None and tokens:
+            in_background(self.backend.add, f"usage:{day}:{tenant}", tokens, 2 * 86400)
+    
+    async def used_today(self, tenant: str) -> int:
+        """Tokens the tenant has spent or reserved today, across every worker"""
+        day = _today()
+        if self.backend is not None:
+            value = await asyncio.to_thread(self.backend.get, f"usage:{day}:{tenant}")
+            return int(float(value)) if value else 0
+        totals = self._days.get(day, {}).get(tenant)
+        return int(totals["prompt_tokens"] + totals["completion_tokens"] + totals["reserved"]) if totals else 0
+    
+    def expected_run_tokens(self) -> int:
+        """Tokens a full run of the configured council is expected to need"""
+        return int(sum(expected_tokens(model_router.council, model_router.chairman, model_router.topology).values()))
+    
+    async def _reserve(self, day: str, tenant: str, amount: int) -> int:
+        """
+        Hold amount tokens against the tenant's day
+        
+        The reservation is added to the same total the calls are charged to,
+        in one step with reading it, so concurrent admissions see each other.
+        
+        Returns:
+            Tokens spent or reserved before this reservation
+        """
+        totals = self._totals(day, tenant)
+        if self.backend is not None:
+            total = await asyncio.to_thread(self.backend.add, f"usage:{day}:{tenant}", amount, 2 * 86400)
+            used = int(total - amount)
+        else:
+            used = int(totals["prompt_tokens"] + totals["completion_tokens"] + totals["reserved"])
+        totals["reserved"] += amount
+        return used
+    
+    def release(self, tenant: str, day: str, amount: int):
+        """Give back tokens reserved at admission"""
+        totals = self._days.get(day, {}).get(tenant)
+        if totals is not None:
+            totals["reserved"] -= amount
+        if self.backend is not None and amount:
+            in_background(self.backend.add, f"usage:{day}:{tenant}", -amount, 2 * 86400)
+    
+    async def admit(self, tenant: str) -> RunBudget:
+        """
+        Admit a run of a tenant
+        
+        With a daily budget, the tokens a full run is expected to need are
+        reserved until RunBudget.settle is called.
+        
+        Returns:
+            The run's budget
+        
+        Raises:
+            BudgetExceeded: When the tenant's daily budget is spent or reserved
+        """
+        daily, per_request = self.limits(tenant)
+        day = _today()
+        totals = self._totals(day, tenant)
+        if not daily:
+            totals["requests"] += 1
+            return RunBudget(tenant=tenant, limit=per_request or None)
+        
+        reserve = self.expected_run_tokens()
+        if per_request:
+            reserve = min(reserve, per_request)
+        used = await self._reserve(day, tenant, reserve)
+        if used >= daily:
+            self.release(tenant, day, reserve)
+            totals["rejected"] += 1
+            budget_rejections.inc(tenant=tenant)
+            raise BudgetExceeded(tenant, used, daily, _seconds_to_midnight())
+        
+        totals["requests"] += 1
+        limit = min(per_request, daily - used) if per_request else daily - used
+        # Hold no more than the run may spend
+        if reserve > limit:
+            self.release(tenant, day, reserve - limit)
+            reserve = limit
+        return RunBudget(
+            tenant=tenant,
+            limit=limit,
+            nearly_spent=used >= settings.budget_degrade_at * daily,
+            reserved=reserve,
+            day=day
+        )
+    
+    def record_degraded(self, tenant: str):
+        self._totals(_today(), tenant)["degraded"] += 1
+    
+    def report(self, tenant: Optional[str] = None, include_models: bool = True) -> Dict[str, Any]:
+        """
+        Usage per day and tenant, per model, and the configured budgets
+        
+        Args:
+            tenant: Only this tenant's days and budget
+            include_models: Add the per-model totals, which span every tenant
+        """
+        days = {}
+        for day in sorted(self._days, reverse=True):
+            tenants = {
+                name: {
+                    **{key: int(value) for key, value in totals.items() if key != "cost"},
+                    "total_tokens": int(totals["prompt_tokens"] + totals["completion_tokens"]),
+                    "cost": round(totals["cost"], 6)
+                }
+                for name, totals in sorted(self._days[day].items())
+                if tenant is None or name == tenant
+            }
+            if tenants:
+                days[day] = tenants
+        
+        names = {tenant} if tenant is not None else {name for totals in self._days.values() for name in totals}
+        report = {"days": days}
+        if include_models:
+            report["models"] = {
+                model: {**totals, "cost": round(totals["cost"], 6)}
+                for model, totals in sorted(self._models.items())
+            }
+        return {
+            **report,
+            "budgets": {
+                name: dict(zip(("daily_tokens", "request_tokens"), self.limits(name)))
+                for name in sorted(names | set(self.budgets))
+                if tenant is None or name == tenant
+            },
+            "degrade_at": settings.budget_degrade_at
+        }
+
+
+# Global usage ledger
+usage_ledger = UsageLedger(state_backend)
@@ -0,0 +1,5 @@
+"""
+Offline load harness, mock LLM router and micro-benchmarks
+
+Not part of the service: the app package never imports from here.
+"""
@@ -0,0 +1,90 @@
+"""
+Time rank aggregation for a range of council sizes
+
+Aggregates synthetic reviews (noisy rankings around a hidden quality order),
+and optionally the Stage 2 reviews recorded in a batch results file.
+
+Usage:
+    python -m benchmarks.aggregation [--sizes 3 10 30 50] [--results results.jsonl]
+"""
+
+import argparse
+import json
+import time
+from typing import List
+
+import numpy as np
+
+from app.aggregation import aggregate_rankings
+from app.models import LLMResponse, RankingEntry, ReviewResponse
+
+
+def synthetic_reviews(size: int, reviewers: int, rng: np.random.Generator) -> List[ReviewResponse]:
+    """Noisy rankings around a hidden quality order"""
+    quality = rng.normal(size=size)
+    reviews = []
+    for reviewer in range(reviewers):
+        noisy = quality + rng.normal(scale=0.8, size=size)
+        noisy[reviewer % size] = np.nan  # Reviewers skip their own answer
+        order = [int(idx) for idx in np.argsort(-np.nan_to_num(noisy, nan=-np.inf)) if not np.isnan(noisy[idx])]
+        reviews.append(ReviewResponse(
+            reviewer_model=f"m{reviewer}",
+            rankings=[
+                RankingEntry(response_id=f"R{idx}", rank=rank, reasoning="")
+                for rank, idx in enumerate(order, start=1)
+            ]
+        ))
+    return reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time rank aggregation over Stage 2 reviews")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 5, 10, 30, 50])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--results", help="Also aggregate the reviews in this batch results JSONL")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    print(f"{'members':>7} {'ms/aggregate':>13}")
+    for size in args.sizes:
+        responses = [LLMResponse(model_name=f"m{i}", response="", model_id=f"R{i}") for i in range(size)]
+        samples = [synthetic_reviews(size, size, rng) for _ in range(args.repeats)]
+        start = time.perf_counter()
+        for reviews in samples:
+            aggregate_rankings(reviews, responses)
+        print(f"{size:>7} {1000 * (time.perf_counter() - start) / args.repeats:>13.3f}")
+    
+    if args.results:
+        queries = 0
+        agreements = []
+        start = time.perf_counter()
+        with open(args.results, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("status") != "ok":
+                    continue
+                result = record["result"]
+                responses = [
+                    LLMResponse(**{key: resp[key] for key in ("model_name", "response", "model_id", "status") if key in resp})
+                    for resp in result["stage_1_responses"]
+                ]
+                reviews = [
+                    ReviewResponse(
+                        reviewer_model=review["reviewer_model"],
+                        rankings=[RankingEntry(**entry) for entry in review["rankings"]]
+                    )
+                    for review in result["stage_2_reviews"]
+                ]
+                aggregate = aggregate_rankings(reviews, responses)
+                queries += 1
+                if aggregate is not None and aggregate.agreement is not None:
+                    agreements.append(aggregate.agreement)
+        seconds = time.perf_counter() - start
+        if queries:
+            print(f"results: {queries} queries in {seconds:.2f}s ({1000 * seconds / queries:.3f} ms/query)")
+        if agreements:
+            print(f"mean reviewer agreement: {np.mean(agreements):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Early-exit rates of recorded batch runs, per agreement threshold
+
+For every successful run in a batch results file, computes the Stage 1
+agreement score and how many calls skipping reviews, or answering directly,
+would have saved at each threshold.
+
+Usage:
+    python -m benchmarks.agreement results.jsonl [--thresholds 0.6 0.7 0.8 0.9]
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from app.agreement import stage_1_agreement
+from app.models import LLMResponse, PipelinePath
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate early-exit rates on batch results")
+    parser.add_argument("results", help="Results JSONL written by python -m app.batch")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.85, 0.9, 0.95])
+    args = parser.parse_args()
+    
+    runs = []
+    with open(args.results, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("status") != "ok":
+                continue
+            result = record["result"]
+            responses = [
+                LLMResponse(
+                    model_name=resp["model_name"],
+                    response=resp["response"],
+                    model_id=resp["model_id"],
+                    status=resp.get("status", "ok")
+                )
+                for resp in result["stage_1_responses"]
+            ]
+            calls = len(responses) + len(result["stage_2_reviews"]) + 1
+            runs.append((stage_1_agreement(responses), len(responses), calls))
+    
+    if not runs:
+        parser.error("No successful results in file")
+    scores = [score for score, _, _ in runs if score is not None]
+    if scores:
+        print(f"runs={len(runs)} agreement median={np.median(scores):.3f} p90={np.percentile(scores, 90):.3f}")
+    print(f"{'threshold':>9} {'exits':>7} {'calls saved (' + PipelinePath.SKIP_REVIEW.value + ')':>26} "
+          f"{'calls saved (' + PipelinePath.DIRECT.value + ')':>22}")
+    total_calls = sum(calls for _, _, calls in runs)
+    for threshold in args.thresholds:
+        exits = [(members, calls) for score, members, calls in runs if score is not None and score >= threshold]
+        # Skipping reviews keeps Stage 1 and the chairman; a direct answer keeps Stage 1 only
+        saved_review = sum(calls - members - 1 for members, calls in exits)
+        saved_direct = sum(calls - members for members, calls in exits)
+        print(f"{threshold:>9.2f} {100 * len(exits) / len(runs):>6.1f}% "
+              f"{100 * saved_review / total_calls:>25.1f}% {100 * saved_direct / total_calls:>21.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Multi-turn latency benchmark: full-history resending vs incremental summaries
+
+Starts benchmarks.mock_router with simulated prompt prefill and prefix caching (or
+uses --router-url) and asks the same follow-up questions in a fresh
+conversation under each context strategy:
+
+    full_history  every earlier turn resent verbatim, never summarized
+    rolling       the summary is refreshed after every turn (batch of 1)
+    incremental   recent turns verbatim, older ones folded in batches
+
+Each turn reports end-to-end and per-stage latency and its prompt tokens,
+split into tokens the provider's prefix cache served and tokens it had to
+process. Folds run while the simulated user thinks (--think-time), as they
+would between real messages. --no-prefix-cache simulates a provider without
+prompt caching, or one whose cache expired between turns.
+
+Usage:
+    python -m benchmarks.conversation [--turns 12] [--recent 4] [--batch 4]
+                                         [--think-time 2] [--no-prefix-cache]
+                                         [--profiles profiles.json] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.harness import git_commit, start_mock_router
+from app.config import settings
+from app.conversations import conversation_store
+from app.llm_client import llm_client
+from app.pipeline import pipeline
+
+logger = logging.getLogger(__name__)
+
+# Prefill slow enough that resending a long history shows up in latency
+DEFAULT_PROFILES = {
+    "default": {
+        "latency": 0.3,
+        "jitter": 0.1,
+        "tokens_per_second": 300,
+        "output_tokens": 150,
+        "prefill_tokens_per_second": 2000
+    }
+}
+
+
+def _question(turn: int) -> str:
+    return f"Follow-up {turn}: how does point {turn} change what we concluded so far?"
+
+
+async def run_strategy(
+    name: str,
+    turns: int,
+    recent_turns: int,
+    summary_batch: int,
+    think_time: float
+) -> Dict[str, Any]:
+    """
+    Ask every question of the script in a new conversation
+    
+    Args:
+        name: Strategy label
+        turns: Questions to ask
+        recent_turns: Turns always sent verbatim
+        summary_batch: Turns folded at once (0 = never fold)
+        think_time: Pause between a turn's answer and the next question
+    
+    Returns:
+        Result dict for this strategy
+    """
+    conversation_store.recent_turns = recent_turns
+    conversation_store.summary_batch = summary_batch
+    folds_before = conversation_store.stats()
+    conversation_id = (await conversation_store.create())["conversation_id"]
+    
+    rows = []
+    for idx in range(1, turns + 1):
+        started = time.monotonic()
+        result = await pipeline.run_full_pipeline(
+            _question(idx),
+            bypass_cache=True,
+            include_timings=True,
+            conversation_id=conversation_id
+        )
+        totals = result["timings"]["totals"]
+        rows.append({
+            "turn": idx,
+            "latency": round(time.monotonic() - started, 3),
+            "stages": result["stage_timings"],
+            "context_turns": result["conversation"]["context_turns"],
+            "summarized": result["conversation"]["summarized"],
+            "prompt_tokens": totals["prompt_tokens"],
+            "cached_prompt_tokens": totals["cached_prompt_tokens"]
+        })
+        print(
+            f"{name:<13} turn {idx:>2}  {rows[-1]['latency']:>6.2f}s  "
+            f"context {rows[-1]['context_turns']:>2} turns{' + summary' if rows[-1]['summarized'] else '          '}  "
+            f"prompt {totals['prompt_tokens']:>6}  cached {totals['cached_prompt_tokens']:>6}"
+        )
+        if idx < turns:
+            await asyncio.sleep(think_time)
+    
+    # Let a trailing fold finish so its cost is counted
+    await conversation_store.history(conversation_id)
+    folds_after = conversation_store.stats()
+    latencies = np.array([row["latency"] for row in rows])
+    prompt_tokens = sum(row["prompt_tokens"] for row in rows)
+    cached_tokens = sum(row["cached_prompt_tokens"] for row in rows)
+    return {
+        "strategy": name,
+        "recent_turns": recent_turns,
+        "summary_batch": summary_batch,
+        "turns": rows,
+        "latency": {
+            "mean": round(float(latencies.mean()), 3),
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "last": rows[-1]["latency"]
+        },
+        "prompt_tokens": prompt_tokens,
+        "cached_prompt_tokens": cached_tokens,
+        "uncached_prompt_tokens": prompt_tokens - cached_tokens,
+        "folds": folds_after["folds"] - folds_before["folds"],
+        "fold_seconds": round(folds_after["fold_seconds"] - folds_before["fold_seconds"], 3),
+        "fold_tokens": folds_after["fold_tokens"] - folds_before["fold_tokens"]
+    }
+
+
+async def run_benchmark(args: argparse.Namespace, router_url: str, store_path: str) -> List[Dict[str, Any]]:
+    settings.hf_base_url = f"{router_url}/v1"
+    settings.hf_token = settings.hf_token or "mock"
+    
+    strategies = [
+        ("full_history", 0),
+        ("rolling", 1),
+        ("incremental", args.batch)
+    ]
+    conversation_store.path = store_path
+    await llm_client.start()
+    await conversation_store.start()
+    try:
+        results = []
+        for name, batch in strategies:
+            results.append(await run_strategy(name, args.turns, args.recent, batch, args.think_time))
+        return results
+    finally:
+        await conversation_store.close()
+        await llm_client.close()
+
+
+def print_summary(results: List[Dict[str, Any]]):
+    """One line per strategy, relative to full-history resending"""
+    baseline = results[0]
+    print(f"\n{'strategy':<13} {'mean s':>7} {'last s':>7} {'prompt tok':>11} {'uncached':>9} {'folds':>6} {'fold tok':>9}")
+    for result in results:
+        change = 100 * (result["latency"]["mean"] - baseline["latency"]["mean"]) / baseline["latency"]["mean"]
+        print(
+            f"{result['strategy']:<13} {result['latency']['mean']:>7.2f} {result['latency']['last']:>7.2f} "
+            f"{result['prompt_tokens']:>11} {result['uncached_prompt_tokens']:>9} "
+            f"{result['folds']:>6} {result['fold_tokens']:>9}  ({change:+.0f}% mean latency)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare conversation context strategies against the mock LLM router")
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--recent", type=int, default=settings.conversation_recent_turns, help="Turns kept verbatim")
+    parser.add_argument("--batch", type=int, default=settings.conversation_summary_batch or 4, help="Turns folded at once")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Seconds between an answer and the next question")
+    parser.add_argument("--profiles", help="Per-model mock router profiles (JSON); default simulates prefill")
+    parser.add_argument("--no-prefix-cache", action="store_true", help="Mock router without prompt caching")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--router-url", help="Use a mock router that is already running")
+    parser.add_argument("--output", help="Results file (default: benchmark-results/conversations-<commit>-<time>.json)")
+    args = parser.parse_args()
+    
+    # app.main configures INFO logging on import; per-request lines would swamp the report
+    logging.getLogger().setLevel(logging.WARNING)
+    settings.semantic_cache_enabled = False
+    
+    profiles = DEFAULT_PROFILES
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as f:
+            profiles = json.load(f)
+    if args.no_prefix_cache:
+        profiles = {model: {**profile, "prefix_cache": False} for model, profile in profiles.items()}
+        profiles.setdefault("default", {"prefix_cache": False})
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles_path = os.path.join(tmp, "profiles.json")
+        with open(profiles_path, "w", encoding="utf-8") as f:
+            json.dump(profiles, f)
+        
+        process = None
+        router_url = args.router_url
+        if router_url is None:
+            process, router_url = start_mock_router(profiles_path, args.seed)
+        try:
+            results = asyncio.run(run_benchmark(args, router_url, os.path.join(tmp, "conversations.db")))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    
+    print_summary(results)
+    meta = git_commit()
+    output = args.output
+    if output is None:
+        os.makedirs("benchmark-results", exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join("benchmark-results", f"conversations-{meta['commit'] or 'nogit'}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                **meta,
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "turns": args.turns,
+                "think_time": args.think_time,
+                "prefix_cache": not args.no_prefix_cache,
+                "profiles": profiles,
+                "members": pipeline.models,
+                "chairman": settings.chairman_model
+            },
+            "strategies": results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
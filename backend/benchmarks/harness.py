@@ -0,0 +1,299 @@
+"""
+Offline load benchmark against the mock LLM router
+
+Starts benchmarks.mock_router in a subprocess (or uses --router-url), points the
+LLM client at it and runs the council at increasing concurrency, either
+directly through LLMCouncilPipeline or through the FastAPI app in-process.
+Each level reports throughput, end-to-end and per-stage latency, upstream
+requests and event-loop lag (how late a 10 ms timer fires while the level
+runs). Results are written as JSON tagged with the git commit, so two
+commits can be compared with --compare.
+
+Usage:
+    python -m benchmarks.harness [--concurrency 1 4 16 64] [--mode pipeline|api|both]
+                            [--profiles profiles.json] [--output results.json]
+                            [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from app.batch import BatchItem, BatchReport, BatchRunner
+from app.config import settings
+from app.llm_client import llm_client
+from app.main import app
+from app.pipeline import pipeline
+
+logger = logging.getLogger(__name__)
+
+LAG_INTERVAL = 0.01
+
+
+class LoopLagMonitor:
+    """Samples how late a periodic timer fires on the running event loop"""
+    
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+    
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> Dict[str, float]:
+        """Stop sampling and return lag percentiles in milliseconds"""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        if not self.samples:
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+        values = np.array(self.samples) * 1000
+        return {
+            "p50": round(float(np.percentile(values, 50)), 2),
+            "p99": round(float(np.percentile(values, 99)), 2),
+            "max": round(float(values.max()), 2)
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_router(profiles_path: Optional[str], seed: int) -> (subprocess.Popen, str):
+    """
+    Launch benchmarks.mock_router on a free local port
+    
+    Returns:
+        (process, base URL) once the router answers
+    """
+    port = _free_port()
+    command = [sys.executable, "-m", "benchmarks.mock_router", "--port", str(port), "--seed", str(seed)]
+    if profiles_path:
+        command += ["--profiles", profiles_path]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{url}/v1/models", timeout=0.5)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Mock router did not start")
+
+
+def git_commit() -> Dict[str, Any]:
+    """Current commit and whether the tree has uncommitted changes"""
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], text=True).strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _queries(count: int, offset: int) -> List[BatchItem]:
+    # Distinct queries so no level is served from an earlier level's completions
+    return [
+        BatchItem(id=str(offset + idx), query=f"Benchmark question {offset + idx}: explain topic {idx % 17} in depth.")
+        for idx in range(count)
+    ]
+
+
+async def _upstream_requests(client: httpx.AsyncClient) -> int:
+    stats = (await client.get("/stats")).json()
+    return sum(stats["requests"].values())
+
+
+async def run_level(mode: str, concurrency: int, items: List[BatchItem], router: httpx.AsyncClient) -> Dict[str, Any]:
+    """
+    Run one batch of queries at a fixed concurrency
+    
+    Args:
+        mode: "pipeline" (LLMCouncilPipeline directly) or "api" (POST /query in-process)
+        concurrency: Runs in flight
+        items: Queries to run
+        router: Client for the mock router's /stats
+    
+    Returns:
+        Result dict for this level
+    """
+    monitor = LoopLagMonitor()
+    requests_before = await _upstream_requests(router)
+    monitor.start()
+    
+    if mode == "pipeline":
+        report = await BatchRunner(concurrency=concurrency, bypass_cache=True).run(items)
+    else:
+        report = BatchReport()
+        semaphore = asyncio.Semaphore(concurrency)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council", timeout=None)
+        
+        async def post(item: BatchItem):
+            async with semaphore:
+                response = await client.post("/query", json={"query": item.query, "bypass_cache": True})
+                if response.status_code == 200:
+                    report.record(response.json())
+                else:
+                    report.failed += 1
+        
+        start_time = time.time()
+        await asyncio.gather(*(post(item) for item in items))
+        report.wall_time = time.time() - start_time
+        await client.aclose()
+    
+    loop_lag = await monitor.stop()
+    summary = report.to_dict()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "queries": len(items),
+        "completed": summary["completed"],
+        "failed": summary["failed"],
+        "wall_time": summary["wall_time"],
+        "throughput_rps": round(report.completed / report.wall_time, 3) if report.wall_time else 0.0,
+        "latency": summary["latency"],
+        "stage_latency": summary["stage_latency"],
+        "upstream_requests": await _upstream_requests(router) - requests_before,
+        "loop_lag_ms": loop_lag
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print each level's key metrics next to the baseline's"""
+    base_levels = {(level["mode"], level["concurrency"]): level for level in baseline["levels"]}
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'mode':<9} {'conc':>4} {'rps':>16} {'p50 s':>16} {'p95 s':>16} {'lag p99 ms':>18}")
+    
+    def cell(now: float, before: Optional[float]) -> str:
+        if before is None:
+            return f"{now:.3f} (new)"
+        change = 100 * (now - before) / before if before else 0.0
+        return f"{now:.3f} ({change:+.0f}%)"
+    
+    for level in current["levels"]:
+        base = base_levels.get((level["mode"], level["concurrency"]), {})
+        print(
+            f"{level['mode']:<9} {level['concurrency']:>4} "
+            f"{cell(level['throughput_rps'], base.get('throughput_rps')):>16} "
+            f"{cell(level['latency']['p50'], base.get('latency', {}).get('p50')):>16} "
+            f"{cell(level['latency']['p95'], base.get('latency', {}).get('p95')):>16} "
+            f"{cell(level['loop_lag_ms']['p99'], base.get('loop_lag_ms', {}).get('p99')):>18}"
+        )
+
+
+async def run_benchmark(args: argparse.Namespace, router_url: str) -> Dict[str, Any]:
+    settings.hf_base_url = f"{router_url}/v1"
+    settings.hf_token = settings.hf_token or "mock"
+    settings.semantic_cache_enabled = False
+    
+    modes = ["pipeline", "api"] if args.mode == "both" else [args.mode]
+    levels = []
+    offset = 0
+    await llm_client.start()
+    router = httpx.AsyncClient(base_url=router_url)
+    try:
+        for mode in modes:
+            for concurrency in args.concurrency:
+                count = args.queries or max(8, 2 * concurrency)
+                level = await run_level(mode, concurrency, _queries(count, offset), router)
+                offset += count
+                levels.append(level)
+                print(
+                    f"{mode:<9} c={concurrency:<4} {level['throughput_rps']:>7.2f} runs/s  "
+                    f"p50 {level['latency']['p50']:.2f}s  p95 {level['latency']['p95']:.2f}s  "
+                    f"loop lag p99 {level['loop_lag_ms']['p99']:.1f}ms  failed {level['failed']}"
+                )
+    finally:
+        await router.aclose()
+        await llm_client.close()
+    
+    profiles = {}
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as f:
+            profiles = json.load(f)
+    return {
+        "meta": {
+            **git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "profiles": profiles,
+            "council": {
+                "members": pipeline.models,
+                "chairman": settings.chairman_model,
+                "review_topology": pipeline.topology.name,
+                "early_start_reviews": settings.early_start_reviews,
+                "early_exit_enabled": settings.early_exit_enabled,
+                "model_max_concurrency": settings.model_max_concurrency
+            }
+        },
+        "levels": levels
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the council against the mock LLM router")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--queries", type=int, default=0, help="Queries per level (default: 2x concurrency, min 8)")
+    parser.add_argument("--mode", choices=["pipeline", "api", "both"], default="pipeline")
+    parser.add_argument("--profiles", help="Per-model mock router profiles (JSON)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--router-url", help="Use a mock router that is already running")
+    parser.add_argument("--output", help="Results file (default: benchmark-results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    
+    # app.main configures INFO logging on import; per-request lines would swamp the report
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    process = None
+    router_url = args.router_url
+    if router_url is None:
+        process, router_url = start_mock_router(args.profiles, args.seed)
+    try:
+        results = asyncio.run(run_benchmark(args, router_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    
+    output = args.output
+    if output is None:
+        os.makedirs("benchmark-results", exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join("benchmark-results", f"{results['meta']['commit'] or 'nogit'}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Local OpenAI-compatible stand-in for the HuggingFace router
+
+Serves /v1/chat/completions (plain and streamed) with per-model latency,
+token rate, error rate and 429 rate, so the pipeline can be load-tested
+offline. Outcomes are deterministic: each request draws from a generator
+seeded by the model, the messages and how often that exact request was seen
+before, so a run replays identically at any concurrency and retries of a
+failed request can succeed.
+
+Review prompts get well-formed JSON rankings; every other prompt gets filler
+text of the configured length.
+
+Like providers with prompt caching, the router remembers the message
+prefixes each model has seen: prompt tokens of a request's longest
+previously seen prefix are reported as usage.prompt_tokens_details.cached_tokens
+and skip the simulated prefill time.
+
+Usage:
+    python -m benchmarks.mock_router [--port 9100] [--profiles profiles.json] [--seed 0]
+
+profiles.json maps model names (or "default") to any of:
+    {"latency": 0.8, "jitter": 0.2, "tokens_per_second": 80, "output_tokens": 300,
+     "error_rate": 0.0, "rate_limit_rate": 0.0, "retry_after": 1.0,
+     "prefill_tokens_per_second": 0, "prefix_cache": true}
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_RESPONSE_ID = re.compile(r"^Response ([A-Z]+):", re.MULTILINE)
+
+_WORDS = (
+    "the council considers each answer on accuracy depth clarity and completeness while "
+    "weighing evidence from several models to reach a careful and well organized conclusion"
+).split()
+
+
+@dataclass
+class ModelProfile:
+    """Simulated behaviour of one upstream model"""
+    latency: float = 0.5  # Seconds before the first token
+    jitter: float = 0.2  # Latency varies uniformly by +/- this fraction
+    tokens_per_second: float = 100.0  # Generation speed after the first token
+    output_tokens: int = 200  # Length of non-review answers
+    error_rate: float = 0.0  # Share of requests failing with a 503
+    rate_limit_rate: float = 0.0  # Share of requests rejected with a 429
+    retry_after: float = 1.0  # Retry-After header on 429s
+    prefill_tokens_per_second: float = 0.0  # Prompt processing speed (0 = prompt length is free)
+    prefix_cache: bool = True  # Skip prefill for a prompt prefix seen before
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        return cls(**known)
+
+
+class MockRouter:
+    """Request handling and counters of the stand-in router"""
+    
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None, seed: int = 0):
+        profiles = profiles or {}
+        self.default = ModelProfile.from_dict(profiles.get("default", {}))
+        self.profiles = {
+            model: ModelProfile.from_dict({**asdict(self.default), **overrides})
+            for model, overrides in profiles.items() if model != "default"
+        }
+        self.seed = seed
+        self.requests: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        # Concurrent successful requests per model, to check client-side limits
+        self.in_flight: Counter = Counter()
+        self.peak_in_flight: Counter = Counter()
+        self._seen: Counter = Counter()
+        self._prefixes: Dict[str, set] = {}
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+    
+    def profile(self, model: str) -> ModelProfile:
+        return self.profiles.get(model, self.default)
+    
+    def _enter(self, model: str):
+        self.in_flight[model] += 1
+        self.peak_in_flight[model] = max(self.peak_in_flight[model], self.in_flight[model])
+    
+    def _rng(self, model: str, messages: List[Dict[str, str]]) -> random.Random:
+        key = hashlib.sha256(json.dumps([model, messages], sort_keys=True).encode("utf-8")).hexdigest()
+        attempt = self._seen[key]
+        self._seen[key] += 1
+        return random.Random(f"{self.seed}:{key}:{attempt}")
+    
+    def _prefill(self, model: str, messages: List[Dict[str, str]], profile: ModelProfile) -> (int, int):
+        """
+        Prompt tokens of a request and how many of them the prefix cache covers
+        
+        Returns:
+            (prompt tokens, cached tokens)
+        """
+        seen = self._prefixes.setdefault(model, set())
+        if len(seen) > 100000:
+            seen.clear()
+        digest = hashlib.sha256()
+        prompt_tokens = 0
+        cached_tokens = 0
+        hit = profile.prefix_cache
+        for message in messages:
+            digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+            prefix = digest.hexdigest()
+            tokens = len(message.get("content", "")) // 4
+            prompt_tokens += tokens
+            hit = hit and prefix in seen
+            if hit:
+                cached_tokens += tokens
+            seen.add(prefix)
+        return prompt_tokens, cached_tokens
+    
+    def _content(self, messages: List[Dict[str, str]], profile: ModelProfile, rng: random.Random) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        ids = _RESPONSE_ID.findall(prompt)
+        if ids:
+            order = list(dict.fromkeys(ids))
+            rng.shuffle(order)
+            return json.dumps({"rankings": [
+                {"response_id": response_id, "rank": rank, "reasoning": "Accurate and clearly organized."}
+                for rank, response_id in enumerate(order, start=1)
+            ]})
+        return " ".join(rng.choice(_WORDS) for _ in range(profile.output_tokens))
+    
+    async def complete(self, body: Dict[str, Any]):
+        model = body.get("model", "")
+        messages = body.get("messages", [])
+        profile = self.profile(model)
+        rng = self._rng(model, messages)
+        self.requests[model] += 1
+        
+        draw = rng.random()
+        if draw < profile.rate_limit_rate:
+            self.outcomes["429"] += 1
+            await asyncio.sleep(0.01)
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                status_code=429,
+                headers={"Retry-After": str(profile.retry_after)}
+            )
+        if draw < profile.rate_limit_rate + profile.error_rate:
+            self.outcomes["503"] += 1
+            await asyncio.sleep(profile.latency * rng.uniform(0.1, 0.5))
+            return JSONResponse({"error": {"message": "Upstream unavailable"}}, status_code=503)
+        
+        content = self._content(messages, profile, rng)
+        completion_tokens = max(1, len(content.split()))
+        prompt_tokens, cached_tokens = self._prefill(model, messages, profile)
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        first_token = profile.latency * (1 + rng.uniform(-profile.jitter, profile.jitter))
+        if profile.prefill_tokens_per_second > 0:
+            first_token += (prompt_tokens - cached_tokens) / profile.prefill_tokens_per_second
+        generation = completion_tokens / profile.tokens_per_second if profile.tokens_per_second > 0 else 0.0
+        self.outcomes["200"] += 1
+        
+        if body.get("stream"):
+            return StreamingResponse(
+                self._stream(model, content, first_token, generation),
+                media_type="text/event-stream"
+            )
+        
+        self._enter(model)
+        try:
+            await asyncio.sleep(first_token + generation)
+        finally:
+            self.in_flight[model] -= 1
+        return {
+            "id": f"mock-{rng.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+    
+    async def _stream(self, model: str, content: str, first_token: float, generation: float):
+        self._enter(model)
+        try:
+            async for chunk in self._chunks(model, content, first_token, generation):
+                yield chunk
+        finally:
+            self.in_flight[model] -= 1
+    
+    async def _chunks(self, model: str, content: str, first_token: float, generation: float):
+        await asyncio.sleep(first_token)
+        words = content.split(" ")
+        delay = generation / max(len(words), 1)
+        for idx, word in enumerate(words):
+            chunk = {
+                "id": "mock-stream",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if idx == 0 else f" {word}"},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(delay)
+        yield "data: [DONE]\n\n"
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "outcomes": dict(self.outcomes),
+            "peak_in_flight": dict(self.peak_in_flight),
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_tokens
+        }
+
+
+def create_app(profiles: Optional[Dict[str, Dict[str, Any]]] = None, seed: int = 0) -> FastAPI:
+    """
+    Build the stand-in router app
+    
+    Args:
+        profiles: Per-model ModelProfile overrides, plus an optional "default"
+        seed: Seed for every simulated outcome
+    
+    Returns:
+        FastAPI app serving /v1/chat/completions, /v1/models and /stats
+    """
+    router = MockRouter(profiles, seed)
+    app = FastAPI(title="Mock LLM Router")
+    
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await router.complete(await request.json())
+    
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": model, "object": "model"} for model in router.profiles]}
+    
+    @app.get("/stats")
+    async def stats():
+        return router.stats()
+    
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Run the mock OpenAI-compatible LLM router")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profiles", help="JSON file of per-model profiles")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    profiles = {}
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as f:
+            profiles = json.load(f)
+    uvicorn.run(create_app(profiles, args.seed), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,85 @@
+"""
+Prompt budgeting on real answers: tokens saved and CPU time per prompt
+
+Replays the Stage 1 answers of a batch results file through fit_texts, as
+if each run's answers were embedded in one review or chairman prompt.
+
+Usage:
+    python -m benchmarks.prompt_budget results.jsonl [--budget 3000] [--mode summarize]
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.prompt_budget import fit_text, fit_texts
+
+
+def measure(results_path: str, budget: int) -> Optional[Dict[str, Any]]:
+    """
+    Budget the successful answers of every run in a results file
+    
+    Args:
+        results_path: Results JSONL written by python -m app.batch
+        budget: Token budget for the answers of one prompt
+    
+    Returns:
+        Dict with token totals, compressed answers and CPU time, or None
+        when the file has no successful runs
+    """
+    original = budgeted = compressed = prompts = 0
+    seconds = 0.0
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("status") != "ok":
+                continue
+            answers = [
+                resp["response"] for resp in record["result"]["stage_1_responses"]
+                if resp.get("status", "ok") == "ok"
+            ]
+            start = time.perf_counter()
+            _, stats = fit_texts(answers, budget)
+            seconds += time.perf_counter() - start
+            # Every prompt is timed cold, as the first reviewer would see it
+            fit_text.cache_clear()
+            
+            prompts += 1
+            original += stats["original_tokens"]
+            budgeted += stats["budgeted_tokens"]
+            compressed += stats["texts_compressed"]
+    
+    if not prompts:
+        return None
+    return {
+        "prompts": prompts,
+        "original_tokens": original,
+        "budgeted_tokens": budgeted,
+        "answers_compressed": compressed,
+        "ms_per_prompt": 1000 * seconds / prompts
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prompt budgeting on batch results")
+    parser.add_argument("results", help="Results JSONL written by python -m app.batch")
+    parser.add_argument("--budget", type=int, default=settings.chairman_prompt_token_budget,
+                        help="Token budget for the answers of one prompt")
+    parser.add_argument("--mode", choices=["summarize", "truncate"], default=settings.prompt_budget_mode)
+    args = parser.parse_args()
+    settings.prompt_budget_mode = args.mode
+    
+    results = measure(args.results, args.budget)
+    if results is None:
+        parser.error("No successful results in file")
+    original, budgeted = results["original_tokens"], results["budgeted_tokens"]
+    print(f"prompts={results['prompts']} mode={args.mode} budget={args.budget}")
+    print(f"answer tokens: {original} -> {budgeted} ({100 * (original - budgeted) / max(original, 1):.1f}% saved)")
+    print(f"answers compressed: {results['answers_compressed']}")
+    print(f"CPU time: {results['ms_per_prompt']:.2f} ms per prompt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Ranking parser benchmark: parse rate and throughput on a fuzz corpus
+
+Generates reviewer replies with the defects seen in practice (fences,
+prose, trailing commas, single quotes, cut-off JSON, markdown lists, ...)
+and parses them with the original first-{ to last-} parser and with
+parse_rankings, reporting exact-match rates per defect and replies/s.
+
+Usage:
+    python -m benchmarks.ranking_parser [--samples 5000] [--seed 0]
+                                           [--corpus corpus.jsonl] [--dump corpus.jsonl]
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import List
+
+from app.models import RankingEntry
+from app.ranking_parser import STRATEGIES, parse_rankings
+
+
+def legacy_parse(text: str) -> List[RankingEntry]:
+    """The original first-{ to last-} parser, kept for the benchmark"""
+    try:
+        start_idx = text.find('{')
+        end_idx = text.rfind('}') + 1
+        if start_idx == -1 or end_idx == 0:
+            return []
+        data = json.loads(text[start_idx:end_idx])
+        return [
+            RankingEntry(response_id=r['response_id'], rank=r['rank'], reasoning=r['reasoning'])
+            for r in data.get('rankings', [])
+        ]
+    except Exception:
+        return []
+
+
+def fuzz_corpus(samples: int, seed: int = 0) -> List[dict]:
+    """
+    Generate reviewer replies with the defects seen in practice
+    
+    Args:
+        samples: Number of replies
+        seed: Random seed, so the corpus is reproducible
+    
+    Returns:
+        List of {"text", "ids", "mutation"} dicts; ids is the true ranking order
+    """
+    rng = random.Random(seed)
+    mutations = [
+        "clean", "fenced", "prose", "stray_braces", "trailing_comma", "single_quotes",
+        "python_literals", "unquoted_keys", "truncated", "comments", "smart_quotes",
+        "response_prefix", "string_ranks", "markdown_list", "inline_prose"
+    ]
+    corpus = []
+    for _ in range(samples):
+        n = rng.randint(2, 6)
+        ids = [chr(65 + i) for i in range(n)]
+        rng.shuffle(ids)
+        reasons = [
+            rng.choice(["Clear and accurate", "Covers edge cases {e.g. nulls}", "Some errors",
+                        "Too brief", "Says \"it depends\" without detail", "Best structure"])
+            for _ in ids
+        ]
+        entries = [
+            {"response_id": rid, "rank": rank, "reasoning": reason}
+            for rank, (rid, reason) in enumerate(zip(ids, reasons), start=1)
+        ]
+        clean = json.dumps({"rankings": entries}, indent=2)
+        mutation = rng.choice(mutations)
+        
+        if mutation == "clean":
+            text = clean
+        elif mutation == "fenced":
+            text = f"Here is my evaluation:\n\n```json\n{clean}\n```\n"
+        elif mutation == "prose":
+            text = f"After careful review, my ranking follows.\n{clean}\nLet me know if you need more detail."
+        elif mutation == "stray_braces":
+            text = f"Response {{A}} used set notation {{x}}.\n{clean}\nNote: {{ends here"
+        elif mutation == "trailing_comma":
+            text = clean.replace('"\n    }', '",\n    }').replace("}\n  ]", "},\n  ]")
+        elif mutation == "single_quotes":
+            text = clean.replace("'", "").replace('"', "'")
+        elif mutation == "python_literals":
+            text = clean.replace('"rankings"', '"final": True, "rankings"')
+        elif mutation == "unquoted_keys":
+            text = re.sub(r'"(response_id|rank|reasoning|rankings)":', r"\1:", clean)
+        elif mutation == "truncated":
+            text = clean[:rng.randint(len(clean) * 2 // 3, len(clean) - 5)]
+        elif mutation == "comments":
+            text = clean.replace('"rankings": [', '"rankings": [ // best first')
+        elif mutation == "smart_quotes":
+            text = clean.replace('"response_id"', "“response_id”")
+        elif mutation == "response_prefix":
+            text = re.sub(r'"response_id": "([A-Z])"', r'"response_id": "Response \1"', clean)
+        elif mutation == "string_ranks":
+            text = re.sub(r'"rank": (\d+)', r'"rank": "#\1"', clean)
+        elif mutation == "markdown_list":
+            text = "My ranking:\n" + "\n".join(
+                f"{rank}. **Response {rid}** - {reason}"
+                for rank, (rid, reason) in enumerate(zip(ids, reasons), start=1)
+            )
+        else:
+            text = " ".join(
+                f"Response {rid} is ranked #{rank} because: {reason.lower()}."
+                for rank, (rid, reason) in enumerate(zip(ids, reasons), start=1)
+            )
+        
+        corpus.append({"text": text, "ids": ids, "mutation": mutation})
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ranking parser on a fuzz corpus")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="Read the corpus from this JSONL file instead of generating it")
+    parser.add_argument("--dump", help="Write the generated corpus to this JSONL file")
+    args = parser.parse_args()
+    
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [json.loads(line) for line in f if line.strip()]
+    else:
+        corpus = fuzz_corpus(args.samples, args.seed)
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as f:
+            for sample in corpus:
+                f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+    
+    def correct(rankings: List[RankingEntry], ids: List[str]) -> bool:
+        return [entry.response_id for entry in rankings] == ids
+    
+    for name, parse in (
+        ("legacy", lambda sample: legacy_parse(sample["text"])),
+        ("robust", lambda sample: parse_rankings(sample["text"], sorted(sample["ids"])).rankings)
+    ):
+        start = time.perf_counter()
+        results = [parse(sample) for sample in corpus]
+        seconds = time.perf_counter() - start
+        
+        by_mutation = Counter()
+        totals = Counter(sample["mutation"] for sample in corpus)
+        for sample, rankings in zip(corpus, results):
+            if correct(rankings, sample["ids"]):
+                by_mutation[sample["mutation"]] += 1
+        parsed = sum(1 for rankings in results if rankings)
+        exact = sum(by_mutation.values())
+        print(
+            f"{name}: parsed {100 * parsed / len(corpus):.1f}%, exact {100 * exact / len(corpus):.1f}%, "
+            f"{len(corpus) / seconds:,.0f} replies/s"
+        )
+        for mutation in sorted(totals):
+            print(f"  {mutation:<16} {100 * by_mutation[mutation] / totals[mutation]:5.1f}%")
+    
+    strategies = Counter(parse_rankings(s["text"], sorted(s["ids"])).strategy for s in corpus)
+    print("strategies: " + ", ".join(f"{name}={strategies[name]}" for name in STRATEGIES + ("failed",)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Semantic cache benchmark: insert throughput and lookup latency at scale
+
+Fills a SemanticCache with random queries and times lookups of fresh ones
+against the full index, the same matrix-vector product a real lookup pays
+before the query-term check.
+
+Usage:
+    python -m benchmarks.semantic_cache [--entries 100000] [--lookups 1000]
+                                           [--dim 256] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import numpy as np
+
+from benchmarks.harness import git_commit
+from app.config import settings
+from app.semantic_cache import SemanticCache
+
+
+def run_benchmark(entries: int, lookups: int, dim: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Fill an index and time lookups against it
+    
+    Args:
+        entries: Queries stored before the lookups
+        lookups: Lookups timed
+        dim: Embedding dimension
+        seed: Seed for the random queries
+    
+    Returns:
+        Dict with index size, fill rate and lookup latency percentiles
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"word{i}" for i in range(5_000)])
+    
+    def random_query() -> str:
+        return " ".join(rng.choice(vocabulary, size=int(rng.integers(4, 16))))
+    
+    cache = SemanticCache(entries, threshold=settings.semantic_cache_threshold, ttl=3600, dim=dim)
+    
+    start = time.perf_counter()
+    for i in range(entries):
+        cache.store(random_query(), {"id": i})
+    fill_seconds = time.perf_counter() - start
+    
+    latencies = []
+    for _ in range(lookups):
+        query = random_query()
+        start = time.perf_counter()
+        cache.lookup(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    latencies = np.array(latencies)
+    return {
+        "entries": entries,
+        "dim": dim,
+        "index_mb": round(cache._vectors.nbytes / 1e6, 1),
+        "fill_seconds": round(fill_seconds, 2),
+        "inserts_per_second": round(entries / fill_seconds),
+        "lookup_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3)
+        }
+    }
+
+
+def print_report(results: Dict[str, Any]):
+    lookup = results["lookup_ms"]
+    print(f"entries={results['entries']} dim={results['dim']} index={results['index_mb']:.1f} MB")
+    print(f"fill: {results['fill_seconds']:.1f}s ({results['inserts_per_second']} inserts/s)")
+    print(f"lookup ms: p50={lookup['p50']:.3f} p95={lookup['p95']:.3f} p99={lookup['p99']:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic cache lookups")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=1_000)
+    parser.add_argument("--dim", type=int, default=settings.semantic_cache_dim)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default: benchmark-results/semantic-cache-<commit>-<time>.json)")
+    args = parser.parse_args()
+    
+    results = run_benchmark(args.entries, args.lookups, args.dim, args.seed)
+    print_report(results)
+    
+    meta = git_commit()
+    output = args.output
+    if output is None:
+        os.makedirs("benchmark-results", exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join("benchmark-results", f"semantic-cache-{meta['commit'] or 'nogit'}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                **meta,
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "threshold": settings.semantic_cache_threshold
+            },
+            **results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
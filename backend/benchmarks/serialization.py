@@ -0,0 +1,250 @@
+"""
+Serialization micro-benchmark for pipeline results
+
+Builds synthetic PipelineResponse objects shaped like real runs (answers,
+all-pairs reviews, aggregate, per-call timings) and measures, per response:
+
+    asdict_stdlib   dataclasses.asdict + jsonable_encoder + json.dumps, the
+                    path results took before CouncilJSONResponse
+    dict_orjson     to_dict + orjson, what /query does with a pipeline result
+    direct_orjson   orjson straight from the model objects
+
+plus gzip and brotli size and time for the encoded body, and the memory the
+model objects take with slotted dataclasses and with plain ones.
+
+Usage:
+    python -m benchmarks.serialization [--members 5] [--answer-chars 4000]
+                                          [--iterations 200] [--output results.json]
+"""
+
+import argparse
+import dataclasses
+import gzip
+import json
+import os
+import random
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.harness import git_commit
+from app.models import (
+    AggregateScore, CallTiming, FinalResponse, LLMResponse, PipelineResponse,
+    RankAggregate, RankingEntry, ReviewResponse
+)
+from app.serialization import brotli, dumps
+from app.topology import anonymous_id
+
+
+def _unslotted(cls):
+    """Plain (dict-backed, mutable) twin of a slotted model dataclass"""
+    return dataclasses.make_dataclass(
+        f"Plain{cls.__name__}",
+        [(f.name, f.type, f) for f in dataclasses.fields(cls)],
+        namespace={"to_dict": cls.to_dict}
+    )
+
+
+MODEL_CLASSES = (LLMResponse, RankingEntry, ReviewResponse, AggregateScore, RankAggregate, FinalResponse, PipelineResponse)
+PLAIN_CLASSES = {cls: _unslotted(cls) for cls in MODEL_CLASSES}
+
+
+def build_response(members: int, texts: Dict[str, Any], classes: Dict[type, type]) -> PipelineResponse:
+    """
+    Synthetic full-path result with every member reviewing every other answer
+    
+    Args:
+        members: Council size
+        texts: Answers, synthesis and review text, created once so memory
+            figures count the objects only
+        classes: Model class to instantiate for each model type
+    """
+    C = lambda cls: classes.get(cls, cls)
+    models = [f"provider/model-{idx}" for idx in range(members)]
+    ids = [anonymous_id(idx) for idx in range(members)]
+    responses = [
+        C(LLMResponse)(model_name=model, response=texts["answers"][idx], model_id=ids[idx])
+        for idx, model in enumerate(models)
+    ]
+    reviews = [
+        C(ReviewResponse)(
+            reviewer_model=model,
+            rankings=[
+                C(RankingEntry)(response_id=ids[other], rank=rank + 1, reasoning=texts["reasoning"])
+                for rank, other in enumerate(o for o in range(members) if o != idx)
+            ]
+        )
+        for idx, model in enumerate(models)
+    ]
+    aggregate = C(RankAggregate)(
+        scores=[
+            C(AggregateScore)(
+                response_id=ids[idx], model_name=model, consensus_rank=idx + 1, borda=1 - idx / members,
+                copeland=members - 2 * idx, bradley_terry=1 / members, mean_rank=idx + 1.0, reviews=members - 1
+            )
+            for idx, model in enumerate(models)
+        ],
+        agreement=0.62,
+        reviewers=members
+    )
+    calls = [
+        CallTiming(model=model, stage=stage, latency=1.234567, queue_wait=0.01, prompt_tokens=1500, completion_tokens=600)
+        for stage in ("stage_1", "stage_2") for model in models
+    ]
+    return C(PipelineResponse)(
+        query=texts["query"],
+        stage_1_responses=responses,
+        stage_2_reviews=reviews,
+        stage_3_final=C(FinalResponse)(content=texts["synthesis"], chairman_model=models[0]),
+        processing_time=12.34,
+        stage_timings={"stage_1": 4.1, "stage_2": 3.9, "stage_3": 4.3},
+        review_cost={"topology": "all_pairs", "members": members, "calls": members},
+        aggregate=aggregate,
+        stage_1_agreement=0.41,
+        timings={"calls": [call.to_dict() for call in calls]}
+    )
+
+
+def _legacy(response: PipelineResponse) -> bytes:
+    # What Starlette's JSONResponse.render does after FastAPI's encoder walk
+    return json.dumps(
+        jsonable_encoder(dataclasses.asdict(response)),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _time(fn: Callable[[], Any], iterations: int) -> float:
+    """Mean microseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _object_bytes(build: Callable[[], Any], count: int) -> float:
+    """Bytes allocated per object built, strings excluded (they are shared)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def _prose(rng: random.Random, chars: int) -> str:
+    """Random words, so compression ratios are not flattered by repetition"""
+    words = []
+    while sum(len(word) + 1 for word in words) < chars:
+        words.append("".join(rng.choice("etaoinshrdlucmfwypvbgk") for _ in range(rng.randint(2, 9))))
+    return " ".join(words)[:chars]
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    texts = {
+        "query": "Benchmark question: explain the trade-offs in depth.",
+        "answers": [_prose(rng, args.answer_chars) for _ in range(args.members)],
+        "synthesis": _prose(rng, args.answer_chars),
+        "reasoning": _prose(rng, 200)
+    }
+    response = build_response(args.members, texts, {})
+    result = response.to_dict()
+    body = dumps(result)
+    if json.loads(body) != json.loads(json.dumps(jsonable_encoder(result))):
+        raise RuntimeError("orjson output differs from the stdlib encoding")
+    
+    encoders = {
+        "asdict_stdlib": lambda: _legacy(response),
+        "dict_orjson": lambda: dumps(response.to_dict()),
+        "direct_orjson": lambda: dumps(response)
+    }
+    serialization = {}
+    for name, fn in encoders.items():
+        micros = _time(fn, args.iterations)
+        serialization[name] = {
+            "us_per_response": round(micros, 1),
+            "responses_per_second": round(1e6 / micros),
+            "mb_per_second": round(len(body) / micros, 1)
+        }
+    
+    compression = {"identity": {"bytes": len(body), "us": 0.0}}
+    compression["gzip"] = {
+        "bytes": len(gzip.compress(body, compresslevel=args.gzip_level)),
+        "us": round(_time(lambda: gzip.compress(body, compresslevel=args.gzip_level), args.iterations), 1)
+    }
+    if brotli is not None:
+        compression["br"] = {
+            "bytes": len(brotli.compress(body, quality=args.brotli_quality)),
+            "us": round(_time(lambda: brotli.compress(body, quality=args.brotli_quality), args.iterations), 1)
+        }
+    
+    count = max(args.iterations, 50)
+    memory = {
+        "slotted_bytes": round(_object_bytes(lambda: build_response(args.members, texts, {}), count)),
+        "plain_bytes": round(_object_bytes(lambda: build_response(args.members, texts, PLAIN_CLASSES), count)),
+        "result_dict_bytes": round(_object_bytes(response.to_dict, count))
+    }
+    return {"serialization": serialization, "compression": compression, "memory": memory, "body_bytes": len(body)}
+
+
+def print_report(results: Dict[str, Any]):
+    baseline = results["serialization"]["asdict_stdlib"]["us_per_response"]
+    print(f"{results['body_bytes']} byte response\n")
+    print(f"{'encoder':<15} {'us/resp':>9} {'resp/s':>9} {'MB/s':>7}")
+    for name, row in results["serialization"].items():
+        print(
+            f"{name:<15} {row['us_per_response']:>9.1f} {row['responses_per_second']:>9} {row['mb_per_second']:>7.1f}"
+            f"  ({baseline / row['us_per_response']:.1f}x)"
+        )
+    print(f"\n{'encoding':<15} {'bytes':>9} {'us':>9}")
+    for name, row in results["compression"].items():
+        print(f"{name:<15} {row['bytes']:>9} {row['us']:>9.1f}")
+    memory = results["memory"]
+    print(
+        f"\nmodel objects per response: {memory['slotted_bytes']} B slotted, {memory['plain_bytes']} B plain; "
+        f"result dict {memory['result_dict_bytes']} B (strings shared and excluded)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure serialization cost and memory of pipeline results")
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--answer-chars", type=int, default=4000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default: benchmark-results/serialization-<commit>-<time>.json)")
+    args = parser.parse_args()
+    
+    results = run_benchmark(args)
+    print_report(results)
+    
+    meta = git_commit()
+    output = args.output
+    if output is None:
+        os.makedirs("benchmark-results", exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join("benchmark-results", f"serialization-{meta['commit'] or 'nogit'}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                **meta,
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "members": args.members,
+                "answer_chars": args.answer_chars,
+                "iterations": args.iterations,
+                "brotli": brotli is not None
+            },
+            **results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
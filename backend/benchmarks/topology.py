@@ -0,0 +1,58 @@
+"""
+Stage 2 cost of each review topology for a range of council sizes
+
+Prints the review calls, the answers embedded in review prompts and the
+resulting prompt tokens per topology, so a topology can be picked before
+growing the council.
+
+Usage:
+    python -m benchmarks.topology [--sizes 3 5 8 10] [--answer-tokens 600]
+"""
+
+import argparse
+from typing import Any, Dict, List
+
+from app.topology import TOPOLOGIES, get_topology
+
+
+def topology_costs(sizes: List[int], answer_tokens: int) -> List[Dict[str, Any]]:
+    """
+    Expected Stage 2 cost of every topology at every council size
+    
+    Args:
+        sizes: Council sizes to compare
+        answer_tokens: Typical Stage 1 answer length in tokens
+    
+    Returns:
+        One row per (topology, size) with calls, answers and prompt tokens
+    """
+    rows = []
+    for name in TOPOLOGIES:
+        topology = get_topology(name)
+        for size in sizes:
+            cost = topology.expected_cost(size)
+            rows.append({
+                "topology": name,
+                "members": size,
+                "calls": cost["calls"],
+                "answers_in_prompts": cost["answers_in_prompts"],
+                "prompt_tokens": cost["answers_in_prompts"] * answer_tokens
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Stage 2 cost of each review topology")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 5, 8, 10])
+    parser.add_argument("--answer-tokens", type=int, default=600,
+                        help="Typical Stage 1 answer length in tokens")
+    args = parser.parse_args()
+    
+    print(f"{'topology':<12} {'members':>7} {'calls':>6} {'answers':>8} {'prompt tokens':>14}")
+    for row in topology_costs(args.sizes, args.answer_tokens):
+        print(f"{row['topology']:<12} {row['members']:>7} {row['calls']:>6} "
+              f"{row['answers_in_prompts']:>8} {row['prompt_tokens']:>14}")
+
+
+if __name__ == "__main__":
+    main()
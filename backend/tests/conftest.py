@@ -0,0 +1,133 @@
+"""
+Shared fixtures
+
+The suite runs offline: model calls go to benchmarks.mock_router, started in a
+subprocess per profile set, and every SQLite file lives in a temporary
+directory. Settings are read from the environment at import time, so the
+environment is prepared before any app module is imported.
+"""
+
+import json
+import os
+import tempfile
+
+_STATE_DIR = tempfile.mkdtemp(prefix="council-tests-")
+os.environ.update({
+    "HF_TOKEN": "test-token",
+    "CACHE_BACKEND": "none",
+    "CACHE_SQLITE_PATH": os.path.join(_STATE_DIR, "cache.db"),
+    "RUN_STORE_ENABLED": "false",
+    "RUN_STORE_PATH": os.path.join(_STATE_DIR, "runs.db"),
+    "RUN_STORE_FLUSH_INTERVAL": "0.01",
+    "CONVERSATION_STORE_PATH": os.path.join(_STATE_DIR, "conversations.db"),
+    "STATE_SQLITE_PATH": os.path.join(_STATE_DIR, "state.db"),
+    "HTTP2_ENABLED": "false"
+})
+
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+import httpx
+import pytest
+
+from benchmarks.harness import start_mock_router
+from app.cache import response_cache
+from app.config import settings
+from app.llm_client import llm_client
+from app.main import app
+from app.rate_limiter import rate_limiter
+from app.resilience import model_health
+from app.routing import model_router
+from app.run_store import run_store
+from app.semantic_cache import semantic_cache
+
+# Answers in a few tens of milliseconds, so a full council run takes well under a second
+FAST_PROFILE = {"default": {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40}}
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def state_dir() -> str:
+    return _STATE_DIR
+
+
+@pytest.fixture(scope="session")
+def mock_routers():
+    """Start a mock router per distinct profile set; all are stopped at the end of the session"""
+    started: Dict[str, Any] = {}
+    
+    def get(profiles: Dict[str, Any]) -> str:
+        key = json.dumps(profiles, sort_keys=True)
+        if key not in started:
+            path = os.path.join(_STATE_DIR, f"profiles-{len(started)}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(key)
+            started[key] = start_mock_router(path, seed=0)
+        return started[key][1]
+    
+    yield get
+    # Killed rather than terminated: uvicorn would wait out requests a test abandoned
+    for process, _ in started.values():
+        process.kill()
+        process.wait()
+
+
+def reset_state():
+    """Forget what earlier tests taught the process-wide registries"""
+    response_cache.clear()
+    semantic_cache.clear()
+    model_health._models.clear()
+    rate_limiter._limiters.clear()
+    model_router._stats.clear()
+    llm_client._json_mode_unsupported.clear()
+
+
+@pytest.fixture
+def connect(mock_routers, monkeypatch):
+    """
+    Point the LLM client at a mock router for the duration of a block
+    
+    Usage:
+        async with connect({"default": {"latency": 0.1}}):
+            ...
+    """
+    @asynccontextmanager
+    async def connected(profiles: Dict[str, Any] = FAST_PROFILE):
+        monkeypatch.setattr(settings, "hf_base_url", f"{mock_routers(profiles)}/v1")
+        reset_state()
+        await llm_client.close()
+        await llm_client.start()
+        try:
+            yield
+        finally:
+            await llm_client.close()
+    
+    return connected
+
+
+@pytest.fixture
+async def council(connect):
+    """LLM client connected to the fast mock router"""
+    async with connect():
+        yield
+
+
+@pytest.fixture
+async def client(council):
+    """HTTP client calling the API in-process"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council", timeout=None) as http:
+        yield http
+
+
+@pytest.fixture
+async def runs():
+    """Run store opened for one test; await runs.flush() before reading"""
+    await run_store.start()
+    try:
+        yield run_store
+    finally:
+        await run_store.close()
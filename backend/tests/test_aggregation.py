@@ -0,0 +1,86 @@
+"""Rank aggregation over Stage 2 reviews"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from app.aggregation import (
+    aggregate_rankings,
+    bradley_terry,
+    kemeny_order,
+    kendall_agreement,
+    pairwise_wins,
+    rank_matrix
+)
+from benchmarks.aggregation import synthetic_reviews
+from app.models import LLMResponse, RankingEntry, ReviewResponse
+
+
+def _responses(size: int):
+    return [LLMResponse(model_name=f"m{idx}", response="", model_id=f"R{idx}") for idx in range(size)]
+
+
+def _review(reviewer: str, *order: str) -> ReviewResponse:
+    return ReviewResponse(
+        reviewer_model=reviewer,
+        rankings=[RankingEntry(response_id=response_id, rank=rank, reasoning="") for rank, response_id in enumerate(order, start=1)]
+    )
+
+
+def test_unanimous_reviews():
+    reviews = [_review(f"m{idx}", "R2", "R0", "R1") for idx in range(3)]
+    aggregate = aggregate_rankings(reviews, _responses(3))
+    
+    assert [score.response_id for score in aggregate.scores] == ["R2", "R0", "R1"]
+    assert aggregate.agreement == 1.0
+    assert aggregate.scores[0].borda == 1.0
+    assert aggregate.scores[0].copeland == 2
+    assert sum(score.bradley_terry for score in aggregate.scores) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_partial_reviews_count_fully():
+    # Round-robin style: each reviewer only ranks two of the answers
+    reviews = [_review("m0", "R1", "R2"), _review("m1", "R0", "R2"), _review("m2", "R1", "R0")]
+    aggregate = aggregate_rankings(reviews, _responses(3))
+    
+    assert [score.response_id for score in aggregate.scores] == ["R1", "R0", "R2"]
+    assert all(score.reviews == 2 for score in aggregate.scores)
+
+
+def test_failed_answers_and_unknown_ids_are_ignored():
+    responses = _responses(2) + [LLMResponse(model_name="m2", response="", model_id="R2", status="timeout")]
+    aggregate = aggregate_rankings([_review("m0", "R9", "R1", "R0")], responses)
+    assert [score.response_id for score in aggregate.scores] == ["R1", "R0"]
+    assert aggregate_rankings([], responses) is None
+
+
+def test_kemeny_search_matches_exhaustive_order():
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        wins = pairwise_wins(rank_matrix(synthetic_reviews(6, 6, rng), [f"R{idx}" for idx in range(6)]))
+        
+        def agreement(order):
+            return sum(wins[a, b] for a, b in itertools.combinations(order, 2))
+        
+        best = max(agreement(order) for order in itertools.permutations(range(6)))
+        assert agreement(kemeny_order(wins)) == best
+
+
+def test_bradley_terry_newton_fit():
+    # A beats B in 3 of 4 games: the maximum likelihood odds are close to 3:1
+    wins = np.array([[0.0, 30.0], [10.0, 0.0]])
+    strength = bradley_terry(wins)
+    assert strength[0] / strength[1] == pytest.approx(3.0, rel=0.02)
+    
+    # An answer that won every comparison still gets a finite strength
+    strength = bradley_terry(np.array([[0.0, 2.0, 2.0], [0.0, 0.0, 2.0], [0.0, 0.0, 0.0]]))
+    assert np.all(np.isfinite(strength))
+    assert list(np.argsort(-strength)) == [0, 1, 2]
+
+
+def test_kendall_agreement():
+    opposed = rank_matrix([_review("m0", "R0", "R1", "R2"), _review("m1", "R2", "R1", "R0")], ["R0", "R1", "R2"])
+    assert kendall_agreement(opposed) == -1.0
+    disjoint = rank_matrix([_review("m0", "R0"), _review("m1", "R1")], ["R0", "R1"])
+    assert kendall_agreement(disjoint) is None
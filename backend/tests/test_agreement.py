@@ -0,0 +1,74 @@
+"""Stage 1 agreement detection and adaptive early exit"""
+
+import pytest
+
+from app.agreement import AgreementDetector, key_terms, stage_1_agreement, text_similarity
+from app.config import settings
+from app.models import LLMResponse
+from app.pipeline import pipeline
+
+pytestmark = pytest.mark.anyio
+
+CAPITAL = "The capital of {} is {}, a city on the river {} with about {} million inhabitants."
+
+
+def _answer(model: str, text: str, status: str = "ok") -> LLMResponse:
+    return LLMResponse(model_name=model, response=text, model_id=model, status=status)
+
+
+def test_key_terms_skip_sentence_starters():
+    assert key_terms("The answer is Paris. However, 2.5 million live there.") == {"paris", "2.5"}
+
+
+def test_same_facts_agree_and_different_facts_do_not():
+    same = text_similarity(CAPITAL.format("France", "Paris", "Seine", 2), "The capital of France is Paris, on the Seine, with about 2 million people.")
+    different = text_similarity(CAPITAL.format("France", "Paris", "Seine", 2), CAPITAL.format("Germany", "Berlin", "Spree", 4))
+    assert same > 0.6
+    assert different < 0.3
+
+
+def test_detector_gives_up_once_two_answers_disagree():
+    detector = AgreementDetector(threshold=0.6)
+    assert detector.update([_answer("a", CAPITAL.format("France", "Paris", "Seine", 2))])
+    assert not detector.agreed  # One answer is not a consensus
+    assert detector.update([_answer("b", CAPITAL.format("France", "Paris", "Seine", 2))])
+    assert detector.agreed
+    assert not detector.update([_answer("c", CAPITAL.format("Germany", "Berlin", "Spree", 4))])
+    assert not detector.agreed
+
+
+def test_failed_answers_are_ignored():
+    responses = [_answer("a", CAPITAL.format("France", "Paris", "Seine", 2)), _answer("b", "", status="timeout")]
+    assert stage_1_agreement(responses) is None
+
+
+def test_most_representative_is_the_medoid():
+    detector = AgreementDetector(threshold=0.0)
+    detector.update([
+        _answer("a", CAPITAL.format("France", "Paris", "Seine", 2)),
+        _answer("b", CAPITAL.format("France", "Paris", "Seine", 2) + " It hosts the Louvre."),
+        _answer("c", CAPITAL.format("France", "Paris", "Seine", 2) + " It hosted the Olympics in 2024.")
+    ])
+    assert detector.most_representative() == "a"
+
+
+@pytest.mark.parametrize("skip, path", [("all", "direct_answer"), ("review", "skip_review")])
+async def test_agreeing_council_exits_early(council, monkeypatch, skip, path):
+    # The mock router answers every member with the same filler vocabulary
+    monkeypatch.setattr(settings, "early_exit_enabled", True)
+    monkeypatch.setattr(settings, "early_exit_threshold", 0.5)
+    monkeypatch.setattr(settings, "early_exit_skip", skip)
+    result = await pipeline.run_full_pipeline(f"What is a quasar ({skip})?", bypass_cache=True)
+    
+    assert result["path"] == path
+    assert result["stage_2_reviews"] == []
+    assert result["stage_3_final"]["status"] == "ok"
+
+
+async def test_disagreeing_council_runs_in_full(council, monkeypatch):
+    monkeypatch.setattr(settings, "early_exit_enabled", True)
+    monkeypatch.setattr(settings, "early_exit_threshold", 1.01)
+    result = await pipeline.run_full_pipeline("What is a magnetar?", bypass_cache=True)
+    
+    assert result["path"] == "full"
+    assert len(result["stage_2_reviews"]) == len(settings.council_models)
@@ -0,0 +1,65 @@
+"""POST /batch and the batch runner"""
+
+import json
+import os
+
+import pytest
+
+from app.batch import BatchItem, BatchRunner, completed_ids
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_results_come_back_in_input_order(client):
+    response = await client.post("/batch", json={
+        "queries": ["What is DNS?", {"id": "tcp", "query": "What is TCP?"}, "What is UDP?"],
+        "concurrency": 2,
+        "bypass_cache": True
+    })
+    assert response.status_code == 200
+    body = response.json()
+    
+    assert [record["id"] for record in body["results"]] == ["0", "tcp", "2"]
+    assert {record["status"] for record in body["results"]} == {"ok"}
+    assert body["report"]["completed"] == 3
+    assert body["report"]["failed"] == 0
+
+
+@pytest.mark.parametrize("body", [
+    {"queries": []},
+    {"queries": [{"id": "a", "query": "What is DNS?"}, {"id": "a", "query": "What is TCP?"}]},
+    # A string's id is its position, which clashes with the explicit "0"
+    {"queries": ["What is DNS?", {"id": "0", "query": "What is TCP?"}]},
+    {"queries": ["What is DNS?"], "concurrency": "many"},
+    {"queries": ["What is DNS?"], "concurrency": 0},
+    {"queries": ["What is DNS?"], "concurrency": -3},
+    {"queries": ["What is DNS?"], "concurrency": True},
+    {"queries": [42]},
+    {"queries": [""]}
+])
+async def test_invalid_batches_are_rejected(client, body):
+    response = await client.post("/batch", json=body)
+    assert response.status_code == 400
+
+
+async def test_runner_respects_its_concurrency(council):
+    runner = BatchRunner(concurrency=1, bypass_cache=True)
+    records = []
+    report = await runner.run(
+        [BatchItem(id=str(idx), query=f"Batch runner question {idx}?") for idx in range(3)],
+        on_result=records.append
+    )
+    
+    # One at a time, so results arrive in submission order
+    assert [record["id"] for record in records] == ["0", "1", "2"]
+    assert report.completed == 3
+
+
+def test_completed_ids_skip_failed_and_corrupt_lines(state_dir):
+    path = os.path.join(state_dir, "batch-results.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "a", "status": "ok"}) + "\n")
+        f.write(json.dumps({"id": "b", "status": "error"}) + "\n")
+        f.write('{"id": "c", "sta\n')
+    
+    assert completed_ids(path) == {"a"}
@@ -0,0 +1,83 @@
+"""Content-addressed response cache: keys, TTL, LRU eviction and the SQLite backend"""
+
+import os
+
+import pytest
+
+from app.cache import LRUCache, ResponseCache, SQLiteCacheBackend, response_cache
+from app.llm_client import llm_client
+
+pytestmark = pytest.mark.anyio
+
+MESSAGES = [{"role": "user", "content": "What is 2 + 2?"}]
+
+
+def test_key_depends_on_every_request_field():
+    key = ResponseCache.make_key("model-a", MESSAGES, 0.7, 100)
+    
+    assert key == ResponseCache.make_key("model-a", [dict(MESSAGES[0])], 0.7, 100)
+    assert key != ResponseCache.make_key("model-b", MESSAGES, 0.7, 100)
+    assert key != ResponseCache.make_key("model-a", MESSAGES, 0.2, 100)
+    assert key != ResponseCache.make_key("model-a", MESSAGES, 0.7, 200)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+
+
+def test_lru_entries_expire():
+    cache = LRUCache(max_entries=10, ttl=60)
+    cache.set("a", "1", ttl=-1)
+    
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_backend_persists_and_expires(state_dir):
+    path = os.path.join(state_dir, "cache-test.db")
+    backend = SQLiteCacheBackend(path)
+    backend.set("fresh", "value", ttl=60)
+    backend.set("stale", "value", ttl=-1)
+    backend.close()
+    
+    reopened = SQLiteCacheBackend(path)
+    try:
+        assert reopened.get("fresh") == "value"
+        assert reopened.get("stale") is None
+    finally:
+        reopened.clear()
+        reopened.close()
+
+async def test_memory_misses_fall_through_to_the_backend(state_dir):
+    backend = SQLiteCacheBackend(os.path.join(state_dir, "cache-fallthrough.db"))
+    cache = ResponseCache(max_entries=10, ttl=60, backend=backend)
+    try:
+        await cache.set("key", "answer")
+        cache.memory.clear()
+        
+        assert await cache.get("key") == "answer"
+        assert await cache.get("other") is None
+        assert cache.stats()["backend_hits"] == 1
+        assert cache.stats()["misses"] == 1
+    finally:
+        cache.clear()
+        cache.close()
+
+
+async def test_repeated_call_is_served_from_cache(council):
+    before = response_cache.stats()
+    first = await llm_client.get_completion("meta-llama/Llama-3.3-70B-Instruct:groq", MESSAGES)
+    second = await llm_client.get_completion("meta-llama/Llama-3.3-70B-Instruct:groq", MESSAGES)
+    
+    assert second == first
+    after = response_cache.stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
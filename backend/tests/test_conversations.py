@@ -0,0 +1,92 @@
+"""Server-side conversations and their running summary"""
+
+import os
+
+import pytest
+
+from app.conversations import ConversationStore, conversation_store
+from app.models import ConversationTurn
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def conversations():
+    await conversation_store.start()
+    try:
+        yield conversation_store
+    finally:
+        await conversation_store.close()
+
+
+async def test_follow_ups_see_the_earlier_turns(client, conversations):
+    response = await client.post("/conversations")
+    assert response.status_code == 201
+    conversation_id = response.json()["conversation_id"]
+    
+    results = []
+    for query in ("What is a galaxy?", "How many stars does it have?"):
+        response = await client.post("/query", json={"query": query, "conversation_id": conversation_id, "bypass_cache": True})
+        assert response.status_code == 200
+        results.append(response.json())
+    
+    assert [result["conversation"]["context_turns"] for result in results] == [0, 1]
+    assert results[1]["conversation"]["turns"] == 2
+    conversation = (await client.get(f"/conversations/{conversation_id}")).json()
+    assert [turn["query"] for turn in conversation["turns"]] == ["What is a galaxy?", "How many stars does it have?"]
+    assert conversation["turns"][0]["answer"] == results[0]["stage_3_final"]["content"]
+
+
+async def test_the_same_question_in_two_conversations_is_not_shared(client, conversations):
+    first = (await client.post("/conversations")).json()["conversation_id"]
+    second = (await client.post("/conversations")).json()["conversation_id"]
+    await client.post("/query", json={"query": "What is a nebula?", "conversation_id": first})
+    
+    response = await client.post("/query", json={"query": "Why?", "conversation_id": second})
+    assert response.json()["conversation"]["context_turns"] == 0
+    assert not response.json().get("coalesced", False)
+
+
+async def test_unknown_and_deleted_conversations(client, conversations):
+    assert (await client.post("/query", json={"query": "Hi?", "conversation_id": "unknown"})).status_code == 404
+    
+    conversation_id = (await client.post("/conversations")).json()["conversation_id"]
+    assert (await client.delete(f"/conversations/{conversation_id}")).json() == {"deleted": True}
+    assert (await client.get(f"/conversations/{conversation_id}")).status_code == 404
+    assert (await client.delete(f"/conversations/{conversation_id}")).status_code == 404
+
+
+async def test_older_turns_are_folded_into_the_summary(council, state_dir):
+    store = ConversationStore(os.path.join(state_dir, "folding.db"), recent_turns=2, summary_batch=2)
+    await store.start()
+    try:
+        conversation_id = (await store.create())["conversation_id"]
+        for idx in range(4):
+            await store.add_turn(conversation_id, ConversationTurn(query=f"Question {idx}?", answer=f"Answer {idx}."))
+        
+        # The fourth turn started a fold; the next question waits for it
+        history = await store.history(conversation_id)
+        assert store.folds == 1
+        assert history.summary
+        assert [turn.query for turn in history.turns] == ["Question 2?", "Question 3?"]
+        assert history.total_turns == 4
+        assert (await store.get(conversation_id))["summarized_turns"] == 2
+    finally:
+        await store.close()
+
+
+async def test_failed_fold_keeps_the_turns(connect, state_dir):
+    async with connect({"default": {"latency": 0.01, "error_rate": 1.0}}):
+        store = ConversationStore(os.path.join(state_dir, "failed-fold.db"), recent_turns=1, summary_batch=1)
+        await store.start()
+        try:
+            conversation_id = (await store.create())["conversation_id"]
+            for idx in range(2):
+                await store.add_turn(conversation_id, ConversationTurn(query=f"Question {idx}?", answer=f"Answer {idx}."))
+            
+            history = await store.history(conversation_id)
+            assert store.fold_failures == 1
+            assert history.summary == ""
+            assert len(history.turns) == 2
+        finally:
+            await store.close()
@@ -0,0 +1,46 @@
+"""Early-start reviews and the Stage 1 quorum"""
+
+import time
+
+import pytest
+
+from app.config import settings
+from app.pipeline import pipeline
+
+pytestmark = pytest.mark.anyio
+
+SLOW_MODEL = "moonshotai/Kimi-K2-Instruct-0905:groq"
+FAST = {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40}
+
+
+async def test_reviews_overlap_the_slowest_answer(connect):
+    async with connect({"default": FAST, SLOW_MODEL: {"latency": 0.6}}):
+        result = await pipeline.run_full_pipeline("What is a black hole?", bypass_cache=True)
+    
+    timings = result["stage_timings"]
+    # The slow member's review of the others ran while its own answer was pending
+    assert timings["stage_2_overlap"] > 0.3
+    assert len(result["stage_2_reviews"]) == len(settings.council_models)
+
+
+async def test_without_early_start_reviews_wait_for_stage_1(connect, monkeypatch):
+    monkeypatch.setattr(settings, "early_start_reviews", False)
+    async with connect({"default": FAST, SLOW_MODEL: {"latency": 0.6}}):
+        result = await pipeline.run_full_pipeline("What is a neutron star?", bypass_cache=True)
+    
+    assert "stage_2_overlap" not in result["stage_timings"]
+    assert len(result["stage_2_reviews"]) == len(settings.council_models)
+
+
+async def test_quorum_drops_the_straggler(connect, monkeypatch):
+    monkeypatch.setattr(settings, "stage_1_quorum", 2)
+    async with connect({"default": FAST, SLOW_MODEL: {"latency": 5.0}}):
+        start = time.monotonic()
+        result = await pipeline.run_full_pipeline("What is a pulsar?", bypass_cache=True)
+        elapsed = time.monotonic() - start
+    
+    statuses = {resp["model_name"]: resp["status"] for resp in result["stage_1_responses"]}
+    assert statuses.pop(SLOW_MODEL) == "dropped"
+    assert set(statuses.values()) == {"ok"}
+    assert result["stage_3_final"]["status"] == "ok"
+    assert elapsed < 2.0
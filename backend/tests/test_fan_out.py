@@ -0,0 +1,75 @@
+"""Stage 1 and Stage 2 fan out concurrently, and per-model deadlines drop stragglers"""
+
+import time
+
+import pytest
+
+from app.config import settings
+from app.pipeline import pipeline
+
+pytestmark = pytest.mark.anyio
+
+SLOW_MODEL = "moonshotai/Kimi-K2-Instruct-0905:groq"
+
+
+def _statuses(result):
+    return {resp["model_name"]: resp["status"] for resp in result["stage_1_responses"]}
+
+
+async def test_members_are_asked_concurrently(connect):
+    profiles = {"default": {"latency": 0.3, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40}}
+    async with connect(profiles):
+        result = await pipeline.run_full_pipeline("Why is the sky blue?", bypass_cache=True)
+    
+    assert set(_statuses(result).values()) == {"ok"}
+    assert len(result["stage_2_reviews"]) == len(settings.council_models)
+    # Three members one after the other would take at least 0.9s
+    assert result["stage_timings"]["stage_1"] < 0.6
+
+
+async def test_model_past_its_deadline_times_out(connect, monkeypatch):
+    monkeypatch.setattr(settings, "model_timeout", 0.5)
+    profiles = {
+        "default": {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40},
+        SLOW_MODEL: {"latency": 5.0}
+    }
+    async with connect(profiles):
+        start = time.monotonic()
+        result = await pipeline.run_full_pipeline("What causes tides?", bypass_cache=True)
+        elapsed = time.monotonic() - start
+    
+    statuses = _statuses(result)
+    assert statuses.pop(SLOW_MODEL) == "timeout"
+    assert set(statuses.values()) == {"ok"}
+    assert result["stage_3_final"]["status"] == "ok"
+    assert elapsed < 2.5
+    # The timed-out member neither reviews nor is reviewed
+    assert SLOW_MODEL not in {review["reviewer_model"] for review in result["stage_2_reviews"]}
+
+
+async def test_stage_deadline_caps_the_whole_fan_out(connect, monkeypatch):
+    monkeypatch.setattr(settings, "stage_1_timeout", 0.5)
+    profiles = {
+        "default": {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40},
+        SLOW_MODEL: {"latency": 5.0}
+    }
+    async with connect(profiles):
+        result = await pipeline.run_full_pipeline("What causes seasons?", bypass_cache=True)
+    
+    assert _statuses(result)[SLOW_MODEL] == "timeout"
+    assert result["stage_timings"]["stage_1"] < 1.0
+
+
+async def test_failing_model_does_not_fail_the_run(connect, monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    profiles = {
+        "default": {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40},
+        SLOW_MODEL: {"error_rate": 1.0}
+    }
+    async with connect(profiles):
+        result = await pipeline.run_full_pipeline("How do vaccines work?", bypass_cache=True)
+    
+    statuses = _statuses(result)
+    assert statuses.pop(SLOW_MODEL) == "error"
+    assert set(statuses.values()) == {"ok"}
+    assert result["stage_3_final"]["status"] == "ok"
@@ -0,0 +1,98 @@
+"""Background council jobs"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.jobs import JobManager, JobQueueFull, job_manager
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+SLOW_MODEL = "moonshotai/Kimi-K2-Instruct-0905:groq"
+FAST = {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40}
+
+
+@pytest.fixture
+async def jobs():
+    await job_manager.start()
+    try:
+        yield job_manager
+    finally:
+        await job_manager.stop()
+
+
+async def _wait_for(http: httpx.AsyncClient, job_id: str, statuses, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = (await http.get(f"/jobs/{job_id}")).json()
+        if job["status"] in statuses or time.monotonic() > deadline:
+            return job
+        await asyncio.sleep(0.02)
+
+
+async def test_job_runs_to_completion(client, jobs):
+    response = await client.post("/jobs", json={"query": "What is a comet?", "bypass_cache": True})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+    
+    job = await _wait_for(client, job_id, {"completed", "failed"})
+    assert job["status"] == "completed"
+    assert job["result"]["stage_3_final"]["status"] == "ok"
+    assert "partial" not in job
+    
+    # Finished jobs cannot be cancelled
+    assert (await client.delete(f"/jobs/{job_id}")).status_code == 409
+
+
+async def test_partial_results_and_cancellation(connect, jobs):
+    async with connect({"default": FAST, SLOW_MODEL: {"latency": 3.0}}):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council") as http:
+            job_id = (await http.post("/jobs", json={"query": "What is an asteroid?", "bypass_cache": True})).json()["job_id"]
+            await asyncio.sleep(0.3)
+            
+            job = (await http.get(f"/jobs/{job_id}")).json()
+            assert job["status"] == "running"
+            # The fast members' answers are visible while the slow one is pending
+            assert len(job["partial"]["stage_1_responses"]) == 2
+            
+            start = time.monotonic()
+            cancelled = (await http.delete(f"/jobs/{job_id}")).json()
+            assert cancelled["status"] == "cancelled"
+            assert time.monotonic() - start < 0.5
+
+
+async def test_unknown_job(client, jobs):
+    assert (await client.get("/jobs/unknown")).status_code == 404
+    assert (await client.delete("/jobs/unknown")).status_code == 404
+
+
+async def test_full_queue_refuses_jobs(council):
+    manager = JobManager(workers=1, max_queue=1, ttl=60)
+    await manager.start()
+    try:
+        # The worker picks up the first job; the second waits and fills the queue
+        running = manager.submit("First question?", bypass_cache=True)
+        await asyncio.sleep(0)
+        queued = manager.submit("Second question?", bypass_cache=True)
+        assert manager.position(queued) == 1
+        with pytest.raises(JobQueueFull):
+            manager.submit("Third question?", bypass_cache=True)
+        
+        # A cancelled queued job never starts and frees its slot at once
+        assert (await manager.cancel(queued.id))["status"] == "cancelled"
+        assert manager.stats()["queue_depth"] == 0
+        third = manager.submit("Third question?", bypass_cache=True)
+        assert manager.position(third) == 1
+        with pytest.raises(JobQueueFull):
+            manager.submit("Fourth question?", bypass_cache=True)
+        
+        await asyncio.sleep(1.0)
+        assert running.status.value == "completed"
+        assert third.status.value == "completed"
+        assert queued.started_at is None
+    finally:
+        await manager.stop()
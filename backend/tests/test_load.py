@@ -0,0 +1,57 @@
+"""
+Load test: concurrent council runs share the event loop instead of queueing on it
+
+With a blocking transport, N concurrent runs take N times as long as one and
+every other request waits behind them. With the async transport they
+overlap, and the loop keeps answering cheap requests while they run.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from benchmarks.harness import LoopLagMonitor
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+# Slow enough upstream that serialized runs would be obvious
+SLOW_PROFILE = {"default": {"latency": 0.3, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40}}
+CONCURRENCY = 8
+
+
+async def _query(http: httpx.AsyncClient, query: str) -> float:
+    start = time.monotonic()
+    response = await http.post("/query", json={"query": query, "bypass_cache": True})
+    assert response.status_code == 200
+    assert response.json()["stage_3_final"]["status"] == "ok"
+    return time.monotonic() - start
+
+
+async def test_concurrent_runs_overlap_and_loop_stays_responsive(connect):
+    async with connect(SLOW_PROFILE):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council", timeout=None) as http:
+            single = await _query(http, "Load test warm-up question?")
+            
+            monitor = LoopLagMonitor()
+            monitor.start()
+            start = time.monotonic()
+            runs = asyncio.gather(*(_query(http, f"Load test question {idx}?") for idx in range(CONCURRENCY)))
+            
+            # Cheap requests are answered while every run is waiting upstream
+            await asyncio.sleep(0.1)
+            health_start = time.monotonic()
+            assert (await http.get("/health")).status_code == 200
+            health_latency = time.monotonic() - health_start
+            
+            await runs
+            wall = time.monotonic() - start
+            lag = await monitor.stop()
+    
+    assert wall < 2.5 * single, f"{CONCURRENCY} runs took {wall:.2f}s, one took {single:.2f}s"
+    assert health_latency < 0.2
+    # A blocking upstream call would stall the loop for a whole 300 ms response
+    assert lag["p50"] < 20
+    assert lag["max"] < 250
@@ -0,0 +1,55 @@
+"""Prometheus exposition, cross-worker merging and the per-run timings block"""
+
+import pytest
+
+from app.metrics import MetricsRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+def test_counter_and_histogram_render():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ["model"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    calls.inc(model="a")
+    calls.inc(2, model="b")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{model="a"} 1.0' in lines
+    assert 'calls_total{model="b"} 2.0' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1.0' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2.0' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3.0' in lines
+    assert "latency_seconds_count 3.0" in lines
+    assert "latency_seconds_sum 5.55" in lines
+
+
+def test_other_workers_snapshots_are_summed():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ["model"])
+    calls.inc(model="a")
+    other = {"calls_total": [[["a"], 4.0], [["b"], 1.0]]}
+    
+    lines = registry.render([other]).splitlines()
+    assert 'calls_total{model="a"} 5.0' in lines
+    assert 'calls_total{model="b"} 1.0' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "Calls", ["model"]).inc(model='a"b')
+    assert 'calls_total{model="a\\"b"} 1.0' in registry.render().splitlines()
+
+async def test_metrics_endpoint_counts_a_run(client):
+    response = await client.post("/query", json={"query": "What is entropy?", "bypass_cache": True, "include_timings": True})
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    assert timings["calls"]
+    
+    metrics = (await client.get("/metrics")).text
+    assert "# TYPE council_pipeline_duration_seconds histogram" in metrics
+    assert 'council_llm_calls_total{model="' in metrics
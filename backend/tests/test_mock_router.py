@@ -0,0 +1,96 @@
+"""Mock LLM router and the offline benchmark harness"""
+
+import json
+
+import httpx
+import pytest
+
+from benchmarks.harness import _queries, compare, run_level
+from app.config import settings
+from benchmarks.mock_router import create_app
+
+pytestmark = pytest.mark.anyio
+
+MODEL = "m"
+INSTANT = {"latency": 0.0, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 12}
+
+
+def _router(profiles, seed: int = 0) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(profiles, seed)), base_url="http://router")
+
+
+async def _complete(router: httpx.AsyncClient, content: str, **extra) -> httpx.Response:
+    return await router.post("/v1/chat/completions", json={"model": MODEL, "messages": [{"role": "user", "content": content}], **extra})
+
+
+async def test_outcomes_replay_identically():
+    profiles = {"default": {**INSTANT, "error_rate": 0.5}}
+    replies = []
+    for _ in range(2):
+        async with _router(profiles) as router:
+            replies.append([(await _complete(router, f"Question {idx}")).status_code for idx in range(20)])
+    assert replies[0] == replies[1]
+    assert {200, 503} <= set(replies[0])
+
+
+async def test_retries_of_a_failed_request_can_succeed():
+    async with _router({"default": {**INSTANT, "error_rate": 0.7}}) as router:
+        statuses = [(await _complete(router, "Same question")).status_code for _ in range(20)]
+    assert statuses.count(200) > 0
+    assert statuses.count(503) > 0
+
+
+async def test_rate_limits_carry_retry_after():
+    async with _router({"default": {**INSTANT, "rate_limit_rate": 1.0, "retry_after": 2.5}}) as router:
+        response = await _complete(router, "Question")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2.5"
+
+
+async def test_review_prompts_get_json_rankings():
+    async with _router({"default": INSTANT}) as router:
+        response = await _complete(router, "Response A: one\n\nResponse B: two\n\nResponse C: three\n\nRank them.")
+    rankings = json.loads(response.json()["choices"][0]["message"]["content"])["rankings"]
+    assert sorted(entry["response_id"] for entry in rankings) == ["A", "B", "C"]
+    assert [entry["rank"] for entry in rankings] == [1, 2, 3]
+
+
+async def test_prefix_cache_reports_cached_tokens():
+    async with _router({"default": INSTANT}) as router:
+        system = {"role": "system", "content": "You are a council member. " * 20}
+        usages = []
+        for question in ("First question?", "Second question?"):
+            body = {"model": MODEL, "messages": [system, {"role": "user", "content": question}]}
+            usages.append((await router.post("/v1/chat/completions", json=body)).json()["usage"])
+        stats = (await router.get("/stats")).json()
+    
+    assert usages[0]["prompt_tokens_details"]["cached_tokens"] == 0
+    assert usages[1]["prompt_tokens_details"]["cached_tokens"] == len(system["content"]) // 4
+    assert stats["cached_prompt_tokens"] == len(system["content"]) // 4
+
+
+async def test_streamed_reply_matches_the_plain_one():
+    async with _router({"default": INSTANT}) as router:
+        plain = (await _complete(router, "Stream me")).json()["choices"][0]["message"]["content"]
+    async with _router({"default": INSTANT}) as router:
+        response = await _complete(router, "Stream me", stream=True)
+    
+    lines = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+    assert lines[-1] == "[DONE]"
+    streamed = "".join(json.loads(line)["choices"][0]["delta"]["content"] for line in lines[:-1])
+    assert streamed == plain
+
+
+@pytest.mark.parametrize("mode", ["pipeline", "api"])
+async def test_benchmark_level(council, mode):
+    router_url = settings.hf_base_url.removesuffix("/v1")
+    async with httpx.AsyncClient(base_url=router_url) as router:
+        level = await run_level(mode, 4, _queries(4, offset=1000 if mode == "api" else 0), router)
+    
+    assert level["completed"] == 4
+    assert level["failed"] == 0
+    # Every member answers and reviews, then the chairman synthesizes
+    assert level["upstream_requests"] == 4 * (2 * len(settings.council_models) + 1)
+    assert level["loop_lag_ms"]["p50"] < 50
+    
+    compare({"levels": [level]}, {"meta": {}, "levels": [level]})
@@ -0,0 +1,80 @@
+"""Prompt budgets for the answers embedded in review and chairman prompts"""
+
+import json
+import os
+
+import pytest
+
+from app.config import settings
+from app.pipeline import pipeline
+from app.prompt_budget import OMISSION, allocate_budgets, fit_texts, summarize, truncate
+from benchmarks.prompt_budget import measure
+from app.tokens import estimate_tokens
+
+pytestmark = pytest.mark.anyio
+
+LONG_ANSWER = " ".join(
+    f"Sentence {idx} explains how caching reduces latency for repeated requests." for idx in range(60)
+)
+
+
+def test_short_texts_keep_their_length_and_long_ones_share_the_rest():
+    assert allocate_budgets([100, 1000, 1000], 1200) == [100, 550, 550]
+    assert allocate_budgets([10, 20], 100) == [10, 20]
+
+
+@pytest.mark.parametrize("compress", [truncate, summarize])
+def test_compressed_text_fits_its_budget(compress):
+    fitted = compress(LONG_ANSWER, 120)
+    assert estimate_tokens(fitted) <= 120
+    assert OMISSION in fitted
+
+
+def test_summary_keeps_sentences_in_order():
+    fitted = summarize(LONG_ANSWER, 120)
+    kept = [int(line.split()[1]) for line in fitted.splitlines() if line.startswith("Sentence")]
+    assert kept == sorted(kept)
+    assert kept[0] == 0
+
+
+def test_code_blocks_are_kept_whole_or_dropped():
+    text = "Intro sentence here. " * 20 + "\n```python\nprint('hello')\nprint('world')\n```\n" + "Outro sentence. " * 20
+    fitted = summarize(text, 60)
+    assert fitted.count("```") in (0, 2)
+
+
+def test_fit_texts_reports_what_it_saved():
+    fitted, stats = fit_texts(["short answer", LONG_ANSWER], 200)
+    assert fitted[0] == "short answer"
+    assert stats["texts_compressed"] == 1
+    assert stats["budgeted_tokens"] <= 200 < stats["original_tokens"]
+
+
+def test_zero_budget_disables_budgeting():
+    fitted, stats = fit_texts([LONG_ANSWER], 0)
+    assert fitted == [LONG_ANSWER]
+    assert stats["texts_compressed"] == 0
+
+
+async def test_run_reports_its_prompt_budget(connect, monkeypatch):
+    monkeypatch.setattr(settings, "review_prompt_token_budget", 200)
+    profiles = {"default": {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 300}}
+    async with connect(profiles):
+        result = await pipeline.run_full_pipeline("Explain caching in depth.", bypass_cache=True)
+    
+    review_budget = result["prompt_budget"]["stage_2"]
+    assert review_budget["texts_compressed"] > 0
+    assert review_budget["saved_pct"] > 0
+
+
+def test_benchmark_measures_a_results_file(state_dir):
+    path = os.path.join(state_dir, "budget-results.jsonl")
+    result = {"stage_1_responses": [{"response": LONG_ANSWER, "status": "ok"}, {"response": "Error", "status": "error"}]}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"status": "ok", "result": result}) + "\n")
+        f.write(json.dumps({"status": "error"}) + "\n")
+    
+    report = measure(path, 200)
+    assert report["prompts"] == 1
+    assert report["answers_compressed"] == 1
+    assert report["budgeted_tokens"] < report["original_tokens"]
@@ -0,0 +1,99 @@
+"""Review ranking parser and the JSON-mode fallback"""
+
+import httpx
+import openai
+import pytest
+
+from app.llm_client import llm_client
+from app.ranking_parser import parse_rankings
+from benchmarks.ranking_parser import fuzz_corpus
+
+pytestmark = pytest.mark.anyio
+
+IDS = ["A", "B", "C"]
+MODEL = "openai/gpt-oss-safeguard-20b:groq"
+
+
+@pytest.mark.parametrize("text, strategy", [
+    ('{"rankings": [{"response_id": "B", "rank": 1, "reasoning": "x"}, {"response_id": "A", "rank": 2, "reasoning": "y"}]}', "direct"),
+    ('Here you go:\n```json\n{"rankings": [{"response_id": "B", "rank": 1, "reasoning": "x"}]}\n```', "fenced"),
+    ('Set {x} first. {"rankings": [{"response_id": "B", "rank": 1, "reasoning": "x"}]} done', "balanced"),
+    ("{'rankings': [{'response_id': 'B', 'rank': 1, 'reasoning': 'x',},]}", "repaired"),
+    ('{"rankings": [{"response_id": "B", "rank": 1, "reasoning": "x"}, {"response_id": "A", "rank": 2, "reas', "repaired"),
+    ("1. Response B - best\n2. Response A - fine", "regex")
+])
+def test_strategies(text, strategy):
+    result = parse_rankings(text, IDS)
+    assert result.strategy == strategy
+    assert result.rankings[0].response_id == "B"
+
+
+def test_ids_not_shown_to_the_reviewer_are_dropped():
+    text = '{"rankings": [{"response_id": "Z", "rank": 1, "reasoning": ""}, {"response_id": "A", "rank": 2, "reasoning": ""}]}'
+    assert [entry.response_id for entry in parse_rankings(text, IDS).rankings] == ["A"]
+
+
+def test_unparseable_reply_fails():
+    result = parse_rankings("I cannot rank these answers.", IDS)
+    assert result.rankings == []
+    assert result.strategy == "failed"
+
+
+def test_fuzz_corpus_is_parsed_exactly():
+    # Truncated replies only keep the entries that were complete
+    corpus = [sample for sample in fuzz_corpus(500, seed=1) if sample["mutation"] != "truncated"]
+    exact = sum(
+        [entry.response_id for entry in parse_rankings(sample["text"], sorted(sample["ids"])).rankings] == sample["ids"]
+        for sample in corpus
+    )
+    assert exact == len(corpus)
+
+
+def _bad_request(message: str, param=None) -> openai.BadRequestError:
+    response = httpx.Response(400, request=httpx.Request("POST", "http://router/v1/chat/completions"))
+    return openai.BadRequestError(message, response=response, body={"message": message, "param": param})
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Replace get_completion: JSON-mode calls raise the error under test"""
+    calls = []
+    error = {}
+    
+    async def get_completion(model, messages, temperature=0.7, max_tokens=2000, stage="", response_format=None):
+        calls.append(response_format)
+        if response_format is not None and "error" in error:
+            raise error["error"]
+        return '{"rankings": []}'
+    
+    monkeypatch.setattr(llm_client, "get_completion", get_completion)
+    monkeypatch.setattr(llm_client, "_json_mode_unsupported", set())
+    return calls, error
+
+
+@pytest.mark.parametrize("rejection", [
+    _bad_request("response_format json_object is not supported by this model"),
+    _bad_request("Invalid value", param="response_format")
+])
+async def test_json_mode_rejection_falls_back_to_prompting(completions, rejection):
+    calls, error = completions
+    error["error"] = rejection
+    answers = [{"id": "A", "content": "one"}, {"id": "B", "content": "two"}]
+    
+    await llm_client.get_review_rankings(MODEL, "Question?", answers)
+    await llm_client.get_review_rankings(MODEL, "Question?", answers)
+    
+    # Rejected once, then the model is asked without JSON mode
+    assert calls == [{"type": "json_object"}, None, None]
+
+
+async def test_other_bad_requests_do_not_disable_json_mode(completions):
+    calls, error = completions
+    error["error"] = _bad_request("This model's maximum context length is 8192 tokens")
+    answers = [{"id": "A", "content": "one"}, {"id": "B", "content": "two"}]
+    
+    with pytest.raises(openai.BadRequestError):
+        await llm_client.get_review_rankings(MODEL, "Question?", answers)
+    
+    assert MODEL not in llm_client._json_mode_unsupported
+    assert calls == [{"type": "json_object"}]
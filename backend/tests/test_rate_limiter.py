@@ -0,0 +1,71 @@
+"""Per-model token buckets and concurrency caps shared across requests"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.pipeline import pipeline
+from app.rate_limiter import ModelLimiter, ModelLimits, TokenBucket, rate_limiter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity_per_minute=600)  # Refills 10 tokens per second
+    await bucket.acquire(600)
+    
+    start = time.monotonic()
+    await bucket.acquire(2)
+    assert 0.15 <= time.monotonic() - start < 0.5
+
+
+async def test_oversized_request_is_capped_at_capacity():
+    bucket = TokenBucket(capacity_per_minute=60)
+    start = time.monotonic()
+    await bucket.acquire(1_000)
+    assert time.monotonic() - start < 0.1
+
+
+async def test_reported_usage_reconciles_the_estimate():
+    limiter = ModelLimiter("model", ModelLimits(tokens_per_minute=6000))
+    async with limiter.slot(estimated_tokens=1000) as ticket:
+        ticket.report_usage(3000)
+    
+    assert limiter.tokens_bucket.tokens == pytest.approx(3000, abs=5)
+
+
+async def test_concurrency_cap_holds_across_callers():
+    limiter = ModelLimiter("model", ModelLimits(concurrency=2))
+    peak = 0
+    
+    async def call():
+        nonlocal peak
+        async with limiter.slot(estimated_tokens=10):
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.05)
+    
+    await asyncio.gather(*(call() for _ in range(6)))
+    
+    assert peak == 2
+    assert limiter.stats()["calls"] == 6
+    assert limiter.stats()["max_wait_seconds"] >= 0.05
+
+
+async def test_concurrent_runs_share_the_model_cap(connect, monkeypatch):
+    capped = settings.model_1
+    monkeypatch.setitem(rate_limiter.overrides, capped, ModelLimits(concurrency=1))
+    # A profile of its own, so the router's peak counts only this test
+    profiles = {"default": {"latency": 0.1, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 41}}
+    async with connect(profiles):
+        await asyncio.gather(*(
+            pipeline.run_full_pipeline(f"Rate limit question {idx}?", bypass_cache=True)
+            for idx in range(3)
+        ))
+        async with httpx.AsyncClient(base_url=settings.hf_base_url.removesuffix("/v1")) as router:
+            peak = (await router.get("/stats")).json()["peak_in_flight"]
+    
+    assert peak[capped] == 1
+    assert max(peak.values()) > 1
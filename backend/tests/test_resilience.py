@@ -0,0 +1,74 @@
+"""Retries with backoff, circuit breaking, and rate-limit slots during retries"""
+
+import asyncio
+
+import openai
+import pytest
+
+from app.config import settings
+from app.llm_client import llm_client
+from app.rate_limiter import ModelLimits, rate_limiter
+from app.resilience import CircuitBreaker, CircuitOpenError, CircuitState, model_health
+
+pytestmark = pytest.mark.anyio
+
+MODEL = "meta-llama/Llama-3.3-70B-Instruct:groq"
+MESSAGES = [{"role": "user", "content": "Hello?"}]
+FAST = {"latency": 0.02, "jitter": 0.0, "tokens_per_second": 0, "output_tokens": 40}
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once():
+    breaker = CircuitBreaker("model", failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    
+    # Reset timeout passed: one probe, then nothing until it reports back
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_transient_errors_are_retried(connect, monkeypatch):
+    monkeypatch.setattr(settings, "llm_backoff_base", 0.01)
+    monkeypatch.setattr(settings, "llm_max_retries", 8)
+    async with connect({"default": {**FAST, "error_rate": 0.6}}):
+        content = await llm_client.get_completion(MODEL, MESSAGES)
+    
+    assert content
+    assert model_health.get(MODEL).retries > 0
+
+
+async def test_open_circuit_fails_fast(connect, monkeypatch):
+    monkeypatch.setattr(settings, "llm_backoff_base", 0.01)
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    monkeypatch.setattr(settings, "circuit_failure_threshold", 2)
+    async with connect({"default": {**FAST, "error_rate": 1.0}}):
+        for idx in range(2):
+            with pytest.raises(openai.APIStatusError):
+                await llm_client.get_completion(MODEL, [{"role": "user", "content": f"Failing {idx}?"}])
+        with pytest.raises(CircuitOpenError):
+            await llm_client.get_completion(MODEL, [{"role": "user", "content": "Failing 2?"}])
+
+
+async def test_stream_gives_back_its_slot_while_backing_off(connect, monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_retries", 1)
+    monkeypatch.setitem(rate_limiter.overrides, MODEL, ModelLimits(concurrency=1))
+    async with connect({"default": {**FAST, "rate_limit_rate": 1.0, "retry_after": 0.5}}):
+        async def consume():
+            return [delta async for delta in llm_client.stream_completion(MODEL, MESSAGES)]
+        
+        stream = asyncio.create_task(consume())
+        # The first attempt got its 429 and is now waiting out Retry-After
+        await asyncio.sleep(0.2)
+        limiter = rate_limiter.get(MODEL)
+        assert limiter.in_flight == 0
+        async with limiter.slot(estimated_tokens=10) as ticket:
+            assert ticket.wait_time < 0.1
+        
+        with pytest.raises(openai.RateLimitError):
+            await stream
+    
+    assert limiter.in_flight == 0
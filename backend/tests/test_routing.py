@@ -0,0 +1,66 @@
+"""Query difficulty tiers and per-query council routing"""
+
+import pytest
+
+from app.config import settings
+from app.routing import classify_query, model_router
+
+# Hand-labeled queries; short questions about proofs, algorithms or
+# distributed systems are hard however few words they take
+LABELED = [
+    ("Hi", "simple"),
+    ("Thanks!", "simple"),
+    ("What is the capital of France?", "simple"),
+    ("Who wrote Pride and Prejudice?", "simple"),
+    ("Translate 'good morning' into Spanish.", "simple"),
+    ("Give me a recipe for banana bread.", "simple"),
+    ("How do vaccines work?", "simple"),
+    ("Explain why the sky is blue.", "standard"),
+    ("Compare Python and JavaScript for web development.", "standard"),
+    ("What are the pros and cons of remote work, and how should a small team decide?", "standard"),
+    ("What is an algorithm?", "standard"),
+    ("Prove that there are infinitely many primes.", "hard"),
+    ("Is P equal to NP? Give a rigorous proof.", "hard"),
+    ("Prove that the square root of 2 is irrational.", "hard"),
+    ("What is the time complexity of Dijkstra's algorithm with a binary heap, and why?", "hard"),
+    ("Explain how to avoid deadlocks in a concurrent program that takes several locks.", "hard"),
+    (
+        "Design a Byzantine fault-tolerant consensus protocol for a permissioned blockchain with "
+        "3f+1 replicas and explain its safety and liveness guarantees.",
+        "hard"
+    )
+]
+
+
+@pytest.mark.parametrize("query, tier", LABELED)
+def test_labeled_tiers(query, tier):
+    profile = classify_query(query)
+    assert profile.tier == tier, f"{query!r} scored {profile.score} ({profile.features})"
+
+
+def test_hard_subject_outweighs_length():
+    short_hard = classify_query("Is P equal to NP? Give a rigorous proof.")
+    long_easy = classify_query(
+        "I'm planning a two week trip to Japan in spring with my partner. We like food, hiking and "
+        "quiet towns, want to avoid crowds and have a moderate budget. Could you suggest places to "
+        "stay and things to eat in each region we pass through along the way?"
+    )
+    assert short_hard.score > long_easy.score
+
+
+def test_repeated_cues_count_once():
+    assert classify_query("algorithm algorithm algorithm").features["hard_cues"] == 1
+
+
+def test_hard_queries_keep_the_configured_council():
+    decision = model_router.route("Prove that there are infinitely many primes.")
+    
+    assert decision.tier == "hard"
+    assert decision.members == model_router.council
+    assert decision.chairman == model_router.chairman
+
+
+def test_simple_queries_get_a_smaller_council():
+    decision = model_router.route("What is the capital of France?")
+    assert decision.tier == "simple"
+    assert len(decision.members) == settings.routing_simple_members
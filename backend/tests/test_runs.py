@@ -0,0 +1,55 @@
+"""Run history and stage replay"""
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def _stored_run(client, runs) -> str:
+    response = await client.post("/query", json={"query": "What is a white dwarf?", "bypass_cache": True})
+    assert response.status_code == 200
+    await runs.flush()
+    return response.json()["run_id"]
+
+
+async def test_runs_are_stored_and_listed(client, runs):
+    run_id = await _stored_run(client, runs)
+    
+    run = (await client.get(f"/runs/{run_id}")).json()
+    assert run["query"] == "What is a white dwarf?"
+    assert {output["stage"] for output in run["outputs"]} == {"stage_1", "stage_2", "stage_3"}
+    # Queries match after normalization
+    listed = (await client.get("/runs", params={"query": "what is a WHITE dwarf?"})).json()
+    assert run_id in [item["run_id"] for item in listed["runs"]]
+
+
+async def test_replay_of_the_chairman_keeps_the_reviews(client, runs):
+    run_id = await _stored_run(client, runs)
+    
+    response = await client.post(f"/runs/{run_id}/replay", json={"stages": ["stage_3"]})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["replay"] == {"source_run": run_id, "stages": ["stage_3"]}
+    assert result["stage_3_final"]["status"] == "ok"
+    assert result["run_id"] != run_id
+
+
+@pytest.mark.parametrize("stages", [
+    "stage_3",
+    ["stage_1"],
+    [["stage_3"]],
+    [{"stage": "stage_3"}],
+    [3]
+])
+async def test_replay_rejects_bad_stages(client, runs, stages):
+    response = await client.post("/runs/unknown/replay", json={"stages": stages})
+    assert response.status_code == 400
+
+
+async def test_replay_of_an_unknown_run(client, runs):
+    response = await client.post("/runs/unknown/replay", json={"stages": ["stage_3"]})
+    assert response.status_code == 404
+
+
+async def test_history_needs_the_run_store(client):
+    assert (await client.get("/runs")).status_code == 503
@@ -0,0 +1,109 @@
+"""Semantic cache: paraphrases hit, near-identical questions with different terms miss"""
+
+import pytest
+
+from app.config import settings
+from app.semantic_cache import HashedNGramVectorizer, SemanticCache, query_terms
+
+SORT = "Write a Python function that takes a list of dictionaries and returns it sorted by the 'age' key in ascending order"
+POLICY = "How has the shared energy and industrial policy between France and Germany shaped the European Union over the last decade?"
+INVEST = "If I invest 500 dollars every month in an index fund starting at age 25, how much will I have when I retire?"
+
+# Different questions whose embeddings are closer than any sensible threshold
+NEGATIVE_PAIRS = [
+    (SORT, SORT.replace("ascending", "descending")),
+    (POLICY, POLICY.replace("France", "Italy")),
+    (INVEST, INVEST.replace("25", "65"))
+]
+
+PARAPHRASES = [
+    ("Why is the sky blue?", "why is the sky blue"),
+    ("What are the causes of inflation?", "What causes inflation?"),
+    ("Explain how photosynthesis works", "How does photosynthesis work?"),
+    ("What's the capital of France?", "What is the capital of France?"),
+    ("How do I reverse a list in Python?", "How can I reverse a Python list?")
+]
+
+# Different questions with much of their wording in common
+UNRELATED = [
+    ("How do I reverse a list in Python?", "How do I sort a list in Python?"),
+    ("What is the capital of France?", "What is the population of France?"),
+    ("What causes inflation?", "What causes earthquakes?")
+]
+
+
+def _cache() -> SemanticCache:
+    return SemanticCache(
+        max_entries=16,
+        threshold=settings.semantic_cache_threshold,
+        ttl=60,
+        dim=settings.semantic_cache_dim
+    )
+
+
+@pytest.mark.parametrize("cached, query", NEGATIVE_PAIRS)
+def test_different_terms_miss_despite_high_similarity(cached, query):
+    vectorizer = HashedNGramVectorizer(settings.semantic_cache_dim)
+    assert float(vectorizer.transform(cached) @ vectorizer.transform(query)) > 0.94
+    
+    cache = _cache()
+    cache.store(cached, {"answer": cached})
+    
+    assert cache.lookup(query) is None
+    assert cache.stats()["term_mismatches"] == 1
+
+
+@pytest.mark.parametrize("cached, query", PARAPHRASES)
+def test_paraphrases_hit(cached, query):
+    cache = _cache()
+    cache.store(cached, {"answer": cached})
+    
+    match = cache.lookup(query)
+    assert match is not None
+    payload, similarity, matched_query = match
+    assert payload == {"answer": cached}
+    assert matched_query == cached
+    assert similarity >= settings.semantic_cache_threshold
+
+
+@pytest.mark.parametrize("cached, query", UNRELATED)
+def test_unrelated_questions_miss(cached, query):
+    cache = _cache()
+    cache.store(cached, {"answer": cached})
+    
+    assert cache.lookup(query) is None
+
+
+def test_mismatched_best_candidate_falls_back_to_the_next():
+    cache = _cache()
+    cache.store(SORT.replace("ascending", "descending"), {"order": "descending"})
+    cache.store(SORT + " please", {"order": "ascending"})
+    
+    payload, _, _ = cache.lookup(SORT)
+    assert payload == {"order": "ascending"}
+
+
+def test_query_terms_keep_numbers_and_ignore_stopwords():
+    assert query_terms("What is 1,000 times 3.5?") == {"1000", "3.5", "tim"}
+    assert query_terms("What are the causes of inflation?") == query_terms("causes inflation")
+    assert query_terms("What causes inflation?") == query_terms("What is the cause of inflation?")
+    assert query_terms("sort ascending") != query_terms("sort descending")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(max_entries=2, threshold=0.9, ttl=60)
+    cache.store("first question about tides", {"id": 1})
+    cache.store("second question about seasons", {"id": 2})
+    cache.lookup("first question about tides")
+    cache.store("third question about eclipses", {"id": 3})
+    
+    assert cache.lookup("first question about tides") is not None
+    assert cache.lookup("second question about seasons") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_miss():
+    cache = SemanticCache(max_entries=4, threshold=0.9, ttl=-1)
+    cache.store("Why is the sky blue?", {"id": 1})
+    
+    assert cache.lookup("Why is the sky blue?") is None
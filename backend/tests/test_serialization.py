@@ -0,0 +1,76 @@
+"""orjson responses and response compression"""
+
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from app.main import app
+from app.serialization import brotli, choose_encoding, dumps
+from benchmarks.serialization import PLAIN_CLASSES, build_response
+
+pytestmark = pytest.mark.anyio
+
+# brotli is optional; without it gzip is the preferred coding
+PREFERRED = "br" if brotli is not None else "gzip"
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+TEXTS = {
+    "query": "What is entropy?",
+    "answers": [f"Answer {idx} about entropy. " * 40 for idx in range(3)],
+    "reasoning": "Clear and accurate.",
+    "synthesis": "Entropy measures disorder. " * 40
+}
+
+
+def test_dataclasses_encode_through_to_dict():
+    response = build_response(3, TEXTS, {})
+    assert json.loads(dumps(response)) == json.loads(json.dumps(response.to_dict()))
+    # Slotted and plain dataclasses give the same wire format
+    assert dumps(build_response(3, TEXTS, PLAIN_CLASSES)) == dumps(response)
+
+
+def test_numpy_values_and_sets():
+    assert json.loads(dumps({"score": np.float64(0.5), "ranks": np.array([1, 2]), "ids": {"A"}})) == {
+        "score": 0.5, "ranks": [1, 2], "ids": ["A"]
+    }
+
+
+@pytest.mark.parametrize("header, encoding", [
+    ("gzip, deflate, br", PREFERRED),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("*", PREFERRED),
+    ("br;q=0, gzip;q=0", None),
+    ("identity", None),
+    ("", None)
+])
+def test_choose_encoding(header, encoding):
+    assert choose_encoding(header) == encoding
+
+
+async def test_large_results_are_compressed(council):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council") as http:
+        for encoding in ENCODINGS:
+            response = await http.post(
+                "/query",
+                json={"query": f"What is entropy ({encoding})?", "bypass_cache": True},
+                headers={"Accept-Encoding": encoding}
+            )
+            assert response.headers["content-encoding"] == encoding
+            assert response.headers["vary"] == "Accept-Encoding"
+            # httpx decodes the body; the header has the compressed size
+            assert int(response.headers["content-length"]) < len(response.content) / 2
+            assert response.json()["stage_3_final"]["status"] == "ok"
+
+
+async def test_small_and_streamed_bodies_pass_through(council):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council") as http:
+        health = await http.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in health.headers
+        
+        async with http.stream("POST", "/query/stream", json={"query": "What is enthalpy?"}, headers={"Accept-Encoding": "gzip"}) as stream:
+            assert "content-encoding" not in stream.headers
+            events = [line async for line in stream.aiter_lines() if line.startswith("event:")]
+        assert events[-1] == "event: complete"
@@ -0,0 +1,71 @@
+"""State shared between worker processes through the SQLite backend"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.rate_limiter import ModelLimiter, ModelLimits
+from app.shared_state import SharedSemaphore, SharedTokenBucket, SQLiteStateBackend
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def backend(state_dir, request):
+    backend = SQLiteStateBackend(os.path.join(state_dir, f"{request.node.name}.db"))
+    yield backend
+    backend.close()
+
+
+def _holders(backend: SQLiteStateBackend, name: str):
+    return {row[0] for row in backend._conn.execute("SELECT holder FROM slots WHERE name = ?", (name,))}
+
+
+async def _settle():
+    # Releases are written on a worker thread without being awaited
+    await asyncio.sleep(0.05)
+
+async def test_semaphore_releases_the_slot_of_the_given_holder(backend):
+    semaphore = SharedSemaphore(backend, "m:slots", limit=2, lease=60)
+    first = await semaphore.acquire()
+    second = await semaphore.acquire()
+    assert first != second
+    
+    # Released out of order: the first holder's lease must stay in place
+    semaphore.release(second)
+    await _settle()
+    assert _holders(backend, "m:slots") == {first}
+    semaphore.release(first)
+    await _settle()
+    assert _holders(backend, "m:slots") == set()
+
+
+async def test_concurrency_cap_spans_workers(backend):
+    # Two limiters on one backend stand in for two worker processes
+    workers = [ModelLimiter("m", ModelLimits(concurrency=2), backend) for _ in range(2)]
+    running = 0
+    peak = 0
+    
+    async def call(limiter: ModelLimiter, seconds: float):
+        nonlocal running, peak
+        async with limiter.slot(estimated_tokens=10):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(seconds)
+            running -= 1
+    
+    await asyncio.gather(*(call(workers[idx % 2], 0.02 + 0.03 * (idx % 3)) for idx in range(8)))
+    await _settle()
+    
+    assert peak == 2
+    assert _holders(backend, "m:slots") == set()
+
+
+async def test_token_bucket_is_shared(backend):
+    first, second = SharedTokenBucket(backend, "m:tpm", 6000), SharedTokenBucket(backend, "m:tpm", 6000)
+    await first.acquire(6000)
+    # The bucket refills 100 tokens per second; the other worker sees it empty
+    started = asyncio.get_running_loop().time()
+    await second.acquire(20)
+    assert asyncio.get_running_loop().time() - started >= 0.15
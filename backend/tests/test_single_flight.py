@@ -0,0 +1,121 @@
+"""Single-flight coalescing of identical in-flight work"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.pipeline import pipeline
+from app.shared_state import SQLiteStateBackend
+from app.single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight("test")
+    calls = []
+    
+    async def compute(emit):
+        calls.append(1)
+        emit("started", {})
+        await asyncio.sleep(0.05)
+        return {"answer": 42}
+    
+    results = await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+    
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert all(result == {"answer": 42} for result, _ in results)
+    assert flights.stats()["in_flight"] == 0
+
+
+async def test_late_joiners_get_earlier_events():
+    flights = SingleFlight("test")
+    release = asyncio.Event()
+    
+    async def compute(emit):
+        emit("stage_1", {"n": 1})
+        await release.wait()
+        emit("stage_2", {"n": 2})
+        return "done"
+    
+    first, second = [], []
+    leader = asyncio.create_task(flights.do("key", compute, lambda event, data: first.append(event)))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(flights.do("key", compute, lambda event, data: second.append(event)))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(leader, follower)
+    
+    assert first == second == ["stage_1", "stage_2"]
+
+
+async def test_errors_reach_every_caller():
+    flights = SingleFlight("test")
+    
+    async def compute(emit):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+    
+    results = await asyncio.gather(*(flights.do("key", compute) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_computation_survives_one_caller_and_stops_without_any():
+    flights = SingleFlight("test")
+    finished = []
+    
+    async def compute(emit):
+        await asyncio.sleep(0.1)
+        finished.append(1)
+        return "done"
+    
+    leader = asyncio.create_task(flights.do("kept", compute))
+    follower = asyncio.create_task(flights.do("kept", compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == ("done", True)
+    
+    abandoned = asyncio.create_task(flights.do("abandoned", compute))
+    await asyncio.sleep(0.01)
+    abandoned.cancel()
+    await asyncio.sleep(0.15)
+    assert finished == [1]
+
+
+async def test_flights_span_workers_through_the_backend(state_dir):
+    backend = SQLiteStateBackend(os.path.join(state_dir, "single-flight.db"))
+    # Two groups on one backend stand in for two worker processes
+    worker_a, worker_b = SingleFlight("pipeline", backend), SingleFlight("pipeline", backend)
+    calls = []
+    
+    async def compute(emit):
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"answer": 42}
+    
+    try:
+        leader = asyncio.create_task(worker_a.do("key", compute))
+        await asyncio.sleep(0.02)
+        result, shared = await worker_b.do("key", compute)
+        assert (await leader) == ({"answer": 42}, False)
+    finally:
+        backend.close()
+    
+    assert (result, shared) == ({"answer": 42}, True)
+    assert len(calls) == 1
+    assert worker_b.remote_followers == 1
+
+
+async def test_identical_council_queries_are_coalesced(council):
+    query = "What is dark matter made of?"
+    first, second = await asyncio.gather(
+        pipeline.run_full_pipeline(query, bypass_cache=True),
+        pipeline.run_full_pipeline(query, bypass_cache=True)
+    )
+    
+    assert [result.get("coalesced", False) for result in (first, second)] == [False, True]
+    assert first["stage_3_final"] == second["stage_3_final"]
+    # The follower is not charged for the leader's calls
+    assert second["usage"]["total_tokens"] == 0
@@ -0,0 +1,107 @@
+"""Speculative chairman synthesis"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.models import AggregateScore, LLMResponse, RankAggregate
+from app.pipeline import pipeline
+from app.speculation import SpeculativeDraft, closest_answer, speculation_stats, top_ranked
+
+pytestmark = pytest.mark.anyio
+
+PARIS = "The capital of France is Paris, on the Seine."
+BERLIN = "The capital of Germany is Berlin, on the Spree."
+
+
+def _aggregate(*models: str) -> RankAggregate:
+    return RankAggregate(
+        scores=[
+            AggregateScore(
+                response_id=f"R{rank}", model_name=model, consensus_rank=rank, borda=0.0,
+                copeland=0, bradley_terry=0.0, mean_rank=float(rank), reviews=1
+            )
+            for rank, model in enumerate(models, start=1)
+        ],
+        agreement=None,
+        reviewers=1
+    )
+
+
+RESPONSES = [
+    LLMResponse(model_name="paris", response=PARIS, model_id="R1"),
+    LLMResponse(model_name="berlin", response=BERLIN, model_id="R2"),
+    LLMResponse(model_name="failed", response="", model_id="R3", status="timeout")
+]
+
+
+def test_closest_answer_ignores_failed_answers():
+    assert closest_answer("Paris, on the Seine, is the capital of France.", RESPONSES) == "paris"
+    assert closest_answer("anything", RESPONSES[2:]) is None
+
+
+def test_top_ranked_follows_the_consensus_order():
+    aggregate = _aggregate("berlin", "paris")
+    assert top_ranked(aggregate, 1) == ["berlin"]
+    assert top_ranked(aggregate, 5) == ["berlin", "paris"]
+
+
+async def _draft(content: str) -> SpeculativeDraft:
+    async def synthesize():
+        return content
+    
+    draft = SpeculativeDraft.start(synthesize(), "chairman")
+    await draft.task
+    return draft
+
+
+async def test_draft_is_accepted_only_when_it_leans_on_the_top_answer(monkeypatch):
+    monkeypatch.setattr(settings, "speculative_accept_top", 1)
+    draft = await _draft(PARIS)
+    assert draft.latency is not None
+    
+    assert draft.check(PARIS, RESPONSES, _aggregate("paris", "berlin"))[0]
+    accepted, details = draft.check(PARIS, RESPONSES, _aggregate("berlin", "paris"))
+    assert not accepted
+    assert details == {"draft_leaned_on": "paris", "review_top": ["berlin"]}
+    assert draft.check(PARIS, RESPONSES, None) == (True, {"reason": "no reviews"})
+
+
+async def test_cancelled_draft_never_runs():
+    started = []
+    
+    async def synthesize():
+        started.append(1)
+        return ""
+    
+    draft = SpeculativeDraft.start(synthesize(), "chairman")
+    await draft.cancel()
+    await asyncio.sleep(0)
+    assert started == []
+    assert draft.task.cancelled()
+
+
+@pytest.mark.parametrize("accept_top, outcome", [(3, "accepted"), (0, "revised")])
+async def test_pipeline_uses_or_revises_the_draft(council, monkeypatch, accept_top, outcome):
+    monkeypatch.setattr(settings, "speculative_synthesis", True)
+    monkeypatch.setattr(settings, "speculative_accept_top", accept_top)
+    before = speculation_stats.outcomes.get(outcome, 0)
+    
+    result = await pipeline.run_full_pipeline(f"What is a supernova ({outcome})?", bypass_cache=True)
+    
+    assert result["speculation"]["outcome"] == outcome
+    assert result["stage_3_final"]["status"] == "ok"
+    assert len(result["stage_2_reviews"]) == len(settings.council_models)
+    assert speculation_stats.outcomes[outcome] == before + 1
+
+
+async def test_direct_answer_cancels_the_draft(council, monkeypatch):
+    monkeypatch.setattr(settings, "speculative_synthesis", True)
+    monkeypatch.setattr(settings, "early_exit_enabled", True)
+    monkeypatch.setattr(settings, "early_exit_threshold", 0.5)
+    # The mock answers agree, so the run returns an answer without the chairman
+    result = await pipeline.run_full_pipeline("What is a hypernova?", bypass_cache=True)
+    
+    assert result["path"] == "direct_answer"
+    assert result["speculation"] == {"outcome": "cancelled"}
@@ -0,0 +1,54 @@
+"""POST /query/stream sends progress as Server-Sent Events"""
+
+import json
+
+import pytest
+
+from app.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def _events(client, body):
+    events = []
+    async with client.stream("POST", "/query/stream", json=body) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        buffer = ""
+        async for chunk in response.aiter_text():
+            buffer += chunk
+            while "\n\n" in buffer:
+                message, buffer = buffer.split("\n\n", 1)
+                lines = dict(line.split(": ", 1) for line in message.splitlines())
+                events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def test_events_arrive_in_stage_order(client):
+    events = await _events(client, {"query": "What is a monad?", "bypass_cache": True})
+    names = [name for name, _ in events]
+    
+    assert names[0] == "stage"
+    assert names[-1] == "complete"
+    assert names.count("stage_1_response") == len(settings.council_models)
+    assert names.count("stage_2_review") == len(settings.council_models)
+    assert "stage_3_token" in names
+    assert names.index("stage_2_aggregate") < names.index("stage_3_token")
+    
+    stages = [data["stage"] for name, data in events if name == "stage"]
+    assert stages == ["initial", "review", "synthesis"]
+
+
+async def test_streamed_tokens_add_up_to_the_final_answer(client):
+    events = await _events(client, {"query": "Explain recursion briefly.", "bypass_cache": True})
+    streamed = "".join(data["content"] for name, data in events if name == "stage_3_token")
+    complete = events[-1][1]
+    
+    assert complete["stage_3_final"]["status"] == "ok"
+    assert streamed == complete["stage_3_final"]["content"]
+    assert {"stage_1_responses", "stage_2_reviews", "run_id", "usage"} <= set(complete)
+
+
+async def test_invalid_request_fails_before_streaming(client):
+    response = await client.post("/query/stream", json={"query": ""})
+    assert response.status_code == 400
@@ -0,0 +1,90 @@
+"""Stage 2 review topologies"""
+
+import pytest
+
+from app.models import LLMResponse, RankingEntry, ReviewResponse
+from app.pipeline import pipeline
+from app.topology import (
+    AllPairsTopology,
+    JudgeTopology,
+    RoundRobinTopology,
+    TournamentTopology,
+    anonymous_id
+)
+
+pytestmark = pytest.mark.anyio
+
+MEMBERS = ["m0", "m1", "m2", "m3", "m4"]
+
+
+def _responses(failed=()):
+    return {
+        model: LLMResponse(
+            model_name=model,
+            response="answer",
+            model_id=anonymous_id(idx),
+            status="error" if model in failed else "ok"
+        )
+        for idx, model in enumerate(MEMBERS)
+    }
+
+
+def _win(winner_id: str, loser_id: str) -> ReviewResponse:
+    return ReviewResponse(reviewer_model="judge", rankings=[
+        RankingEntry(response_id=winner_id, rank=1, reasoning=""),
+        RankingEntry(response_id=loser_id, rank=2, reasoning="")
+    ])
+
+
+def test_anonymous_ids_continue_past_z():
+    assert [anonymous_id(idx) for idx in (0, 25, 26, 27)] == ["A", "Z", "AA", "AB"]
+
+
+@pytest.mark.parametrize("topology, calls, answers", [
+    (AllPairsTopology(), 5, 20),
+    (RoundRobinTopology(k=2), 5, 10),
+    (JudgeTopology("judge"), 1, 5),
+    (TournamentTopology("judge"), 4, 8)
+])
+def test_expected_cost(topology, calls, answers):
+    assert topology.expected_cost(len(MEMBERS)) == {"calls": calls, "answers_in_prompts": answers}
+
+
+def test_round_robin_reviews_the_next_k_members():
+    plan = RoundRobinTopology(k=2).plan(MEMBERS)
+    assert [assignment.reviewees for assignment in plan][-1] == ["m0", "m1"]
+    assert all(assignment.reviewer not in assignment.reviewees for assignment in plan)
+
+
+def test_tournament_advances_winners_round_by_round():
+    topology = TournamentTopology("judge")
+    responses = _responses()
+    reviews = {}
+    
+    first = topology.assignments(MEMBERS, responses, reviews)
+    assert [a.reviewees for a in first] == [["m0", "m1"], ["m2", "m3"]]
+    assert [a.key for a in topology.plan(MEMBERS)] == [a.key for a in first]
+    
+    reviews["round_1_match_1"] = _win("B", "A")
+    reviews["round_1_match_2"] = _win("C", "D")
+    second = topology.assignments(MEMBERS, responses, reviews)
+    # m4 had a bye through the first round
+    assert [a.reviewees for a in second] == [["m1", "m2"]]
+    
+    reviews["round_2_match_1"] = _win("C", "B")
+    final = topology.assignments(MEMBERS, responses, reviews)
+    assert [a.reviewees for a in final] == [["m2", "m4"]]
+
+
+def test_failed_answer_gives_its_opponent_a_bye():
+    topology = TournamentTopology("judge")
+    first = topology.assignments(MEMBERS, _responses(failed=("m1",)), {})
+    assert [a.reviewees for a in first] == [["m2", "m3"]]
+
+async def test_judge_topology_makes_one_review_call(council, monkeypatch):
+    monkeypatch.setattr(pipeline, "topology", JudgeTopology("meta-llama/Llama-3.3-70B-Instruct:groq"))
+    result = await pipeline.run_full_pipeline("What is a topology?", bypass_cache=True)
+    
+    assert len(result["stage_2_reviews"]) == 1
+    assert len(result["stage_2_reviews"][0]["rankings"]) == len(result["stage_1_responses"])
+    assert result["review_cost"]["topology"] == "judge"
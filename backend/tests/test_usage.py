@@ -0,0 +1,199 @@
+"""Tenants, admission reservations and the /usage report"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.conversations import ConversationStore
+from app.main import app
+from app.models import ConversationTurn
+from app.pipeline import pipeline
+from app.semantic_cache import semantic_cache
+from app.usage import BudgetExceeded, RunBudget, UnknownApiKey, usage_ledger
+
+pytestmark = pytest.mark.anyio
+
+KEYS = {"sk-a": "team-a", "sk-b": "team-b"}
+ADMIN_KEY = "sk-admin"
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    """Fresh per-process ledger with two named keys"""
+    monkeypatch.setattr(usage_ledger, "backend", None)
+    monkeypatch.setattr(usage_ledger, "api_keys", dict(KEYS))
+    monkeypatch.setattr(usage_ledger, "budgets", {})
+    monkeypatch.setattr(usage_ledger, "_days", {})
+    monkeypatch.setattr(usage_ledger, "_models", {})
+    monkeypatch.setattr(settings, "usage_admin_key", ADMIN_KEY)
+    return usage_ledger
+
+
+def test_unknown_key_is_rejected_once_keys_are_named(ledger, monkeypatch):
+    assert ledger.tenant_for("sk-a") == "team-a"
+    assert ledger.tenant_for(None) == "anonymous"
+    with pytest.raises(UnknownApiKey):
+        ledger.tenant_for("sk-made-up")
+    
+    monkeypatch.setattr(ledger, "api_keys", {})
+    assert ledger.tenant_for("sk-made-up").startswith("key-")
+
+
+async def test_unknown_key_gets_401(client, ledger):
+    response = await client.post("/query", json={"query": "Who are you?"}, headers={"X-API-Key": "sk-made-up"})
+    assert response.status_code == 401
+    
+    response = await client.get("/usage", headers={"X-API-Key": "sk-made-up"})
+    assert response.status_code == 401
+
+
+async def test_admission_reserves_the_expected_run(ledger, monkeypatch):
+    expected = ledger.expected_run_tokens()
+    monkeypatch.setattr(settings, "tenant_daily_token_budget", expected)
+    
+    first = await ledger.admit("team-a")
+    assert first.reserved == expected
+    assert await ledger.used_today("team-a") == expected
+    
+    # Nothing has been charged yet, but the reservation already covers the day
+    with pytest.raises(BudgetExceeded):
+        await ledger.admit("team-a")
+    
+    first.settle()
+    first.settle()
+    assert await ledger.used_today("team-a") == 0
+    second = await ledger.admit("team-a")
+    assert second.reserved == expected
+    second.settle()
+
+
+async def test_concurrent_admissions_cannot_share_the_remainder(ledger, monkeypatch):
+    expected = ledger.expected_run_tokens()
+    monkeypatch.setattr(settings, "tenant_daily_token_budget", 2 * expected)
+    
+    results = await asyncio.gather(*(ledger.admit("team-a") for _ in range(4)), return_exceptions=True)
+    
+    admitted = [result for result in results if not isinstance(result, Exception)]
+    assert len(admitted) == 2
+    assert sum(isinstance(result, BudgetExceeded) for result in results) == 2
+    for budget in admitted:
+        budget.settle()
+    assert await ledger.used_today("team-a") == 0
+
+
+async def test_reservation_never_exceeds_the_request_budget(ledger, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_daily_token_budget", 10 * ledger.expected_run_tokens())
+    monkeypatch.setattr(settings, "request_token_budget", 100)
+    
+    budget = await ledger.admit("team-a")
+    assert budget.limit == 100
+    assert budget.reserved == 100
+    budget.settle()
+
+
+async def test_run_gives_back_its_reservation(client, ledger, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_daily_token_budget", 10 * ledger.expected_run_tokens())
+    
+    response = await client.post("/query", json={"query": "What is entropy?", "bypass_cache": True}, headers={"X-API-Key": "sk-a"})
+    assert response.status_code == 200
+    
+    totals = ledger.report("team-a")["days"]
+    (day,) = totals
+    assert totals[day]["team-a"]["reserved"] == 0
+    assert await ledger.used_today("team-a") == response.json()["usage"]["total_tokens"]
+
+
+async def test_usage_is_scoped_to_the_callers_tenant(client, ledger):
+    ledger.record_degraded("team-a")
+    ledger.record_degraded("team-b")
+    
+    response = await client.get("/usage", headers={"X-API-Key": "sk-a"})
+    assert response.status_code == 200
+    report = response.json()
+    assert all(set(tenants) == {"team-a"} for tenants in report["days"].values())
+    assert set(report["budgets"]) == {"team-a"}
+    assert "models" not in report
+    
+    response = await client.get("/usage", params={"tenant": "team-b"}, headers={"X-API-Key": "sk-a"})
+    assert response.status_code == 403
+    
+    response = await client.get("/usage", headers={"X-API-Key": ADMIN_KEY})
+    assert response.status_code == 200
+    report = response.json()
+    assert {"team-a", "team-b"} <= {tenant for tenants in report["days"].values() for tenant in tenants}
+    assert "models" in report
+    
+    response = await client.get("/usage", params={"tenant": "team-b"}, headers={"X-API-Key": ADMIN_KEY})
+    assert all(set(tenants) == {"team-b"} for tenants in response.json()["days"].values())
+
+
+async def test_tenants_do_not_share_runs(council, ledger):
+    async def ask(http: httpx.AsyncClient, key: str):
+        response = await http.post("/query", json={"query": "Why is the sky blue?", "bypass_cache": True}, headers={"X-API-Key": key})
+        assert response.status_code == 200
+        return response.json()
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council", timeout=None) as http:
+        same = await asyncio.gather(ask(http, "sk-a"), ask(http, "sk-a"))
+        other = await asyncio.gather(ask(http, "sk-a"), ask(http, "sk-b"))
+    
+    assert sorted(bool(result.get("coalesced")) for result in same) == [False, True]
+    assert not any(result.get("coalesced") for result in other)
+    assert {result["usage"]["tenant"] for result in other} == {"team-a", "team-b"}
+
+
+async def test_budgeted_runs_are_not_shared(council, ledger, monkeypatch):
+    monkeypatch.setattr(settings, "request_token_budget", 10 * ledger.expected_run_tokens())
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://council", timeout=None) as http:
+        responses = await asyncio.gather(*(
+            http.post("/query", json={"query": "Why is the sky blue?", "bypass_cache": True}, headers={"X-API-Key": "sk-a"})
+            for _ in range(2)
+        ))
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert not any(response.json().get("coalesced") for response in responses)
+
+
+async def test_tenants_do_not_share_model_calls(council, ledger):
+    results = await asyncio.gather(*(
+        pipeline.run_full_pipeline("Why is the sky blue?", bypass_cache=True, include_timings=True, budget=RunBudget(tenant=tenant))
+        for tenant in ("team-a", "team-b")
+    ))
+    
+    # Joined calls are free, so each tenant's run makes and pays for its own
+    for result in results:
+        assert not any(call["coalesced"] for call in result["timings"]["calls"])
+        assert result["usage"]["total_tokens"] > 0
+
+
+async def test_degraded_runs_are_not_cached_for_other_tenants(council, ledger, monkeypatch):
+    monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+    
+    poor = await pipeline.run_full_pipeline("What is dark matter?", budget=RunBudget(tenant="team-a", limit=50))
+    assert poor["path"] == "direct_answer"
+    assert semantic_cache.stats()["entries"] == 0
+    
+    rich = await pipeline.run_full_pipeline("What is dark matter?", budget=RunBudget(tenant="team-b"))
+    assert "semantic_match" not in rich
+    assert rich["path"] != "direct_answer"
+
+
+async def test_conversation_summary_is_charged_to_the_tenant(council, ledger, state_dir):
+    store = ConversationStore(os.path.join(state_dir, "tenant-fold.db"), recent_turns=1, summary_batch=1)
+    await store.start()
+    try:
+        conversation_id = (await store.create())["conversation_id"]
+        for idx in range(2):
+            await store.add_turn(conversation_id, ConversationTurn(query=f"Question {idx}?", answer=f"Answer {idx}."), tenant="team-a")
+        await store.history(conversation_id)
+    finally:
+        await store.close()
+    
+    assert store.folds == 1
+    (tenants,) = ledger.report()["days"].values()
+    assert set(tenants) == {"team-a"}
+    assert tenants["team-a"]["calls"] == 1
@@ -2,16 +2,21 @@ import React, { useState, useEffect, useRef } from 'react';
 import ChatMessage from './components/ChatMessage';
 import ChatInput from './components/ChatInput';
 import LoadingStages from './components/LoadingStages';
-import { submitQuery, checkHealth } from './services/api';
+import { streamQuery, checkHealth, createConversation, deleteConversation } from './services/api';
 import './App.css';
 
+// Server-side conversation the follow-up questions belong to
+const CONVERSATION_ID_KEY = 'llm-council-conversation-id';
+
 function App() {
   const [conversation, setConversation] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
   const [currentStage, setCurrentStage] = useState(0);
+  const [streamingContent, setStreamingContent] = useState('');
   const [error, setError] = useState(null);
   const [health, setHealth] = useState(null);
   const messagesEndRef = useRef(null);
+  const conversationIdRef = useRef(localStorage.getItem(CONVERSATION_ID_KEY));
 
   // Load conversation from localStorage on mount
   useEffect(() => {
@@ -44,6 +49,15 @@ function App() {
       .catch(err => console.error('Health check failed:', err));
   }, []);
 
+  const ensureConversation = async () => {
+    if (!conversationIdRef.current) {
+      const { conversation_id } = await createConversation();
+      conversationIdRef.current = conversation_id;
+      localStorage.setItem(CONVERSATION_ID_KEY, conversation_id);
+    }
+    return conversationIdRef.current;
+  };
+
   const handleSendMessage = async (message) => {
     // Add user message to conversation
     const userMessage = {
@@ -56,21 +70,30 @@ function App() {
     setConversation(prev => [...prev, userMessage]);
     setIsLoading(true);
     setCurrentStage(1);
+    setStreamingContent('');
     setError(null);
 
+    const stageNumbers = { initial: 1, review: 2, synthesis: 3 };
+
     try {
-      // Simulate stage progression
-      const stageInterval = setInterval(() => {
-        setCurrentStage(prev => {
-          if (prev < 3) return prev + 1;
-          return prev;
-        });
-      }, 3000);
-
-      const data = await submitQuery(message);
-      
-      clearInterval(stageInterval);
-      setCurrentStage(3);
+      // Follow the real stage progression reported by the server
+      const onEvent = (event, payload) => {
+        if (event === 'stage') {
+          setCurrentStage(stageNumbers[payload.stage] || 0);
+        } else if (event === 'stage_3_token') {
+          setStreamingContent(prev => prev + payload.content);
+        }
+      };
+
+      let data;
+      try {
+        data = await streamQuery(message, onEvent, undefined, await ensureConversation());
+      } catch (err) {
+        if (err.response?.status !== 404) throw err;
+        // The server no longer knows this conversation; continue in a new one
+        conversationIdRef.current = null;
+        data = await streamQuery(message, onEvent, undefined, await ensureConversation());
+      }
 
       // Add assistant response to conversation
       const assistantMessage = {
@@ -98,6 +121,7 @@ function App() {
     } finally {
       setIsLoading(false);
       setCurrentStage(0);
+      setStreamingContent('');
     }
   };
 
@@ -105,6 +129,11 @@ function App() {
     if (window.confirm('Are you sure you want to clear the conversation history?')) {
       setConversation([]);
       localStorage.removeItem('llm-council-conversation');
+      if (conversationIdRef.current) {
+        deleteConversation(conversationIdRef.current).catch(() => {});
+        conversationIdRef.current = null;
+        localStorage.removeItem(CONVERSATION_ID_KEY);
+      }
     }
   };
 
@@ -158,6 +187,9 @@ function App() {
             {isLoading && (
               <div className="loading-message">
                 <LoadingStages currentStage={currentStage} />
+                {streamingContent && (
+                  <div className="message-text streaming-text">{streamingContent}</div>
+                )}
               </div>
             )}
             
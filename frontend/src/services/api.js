@@ -19,6 +19,91 @@ export const submitQuery = async (query) => {
   }
 };
 
+export const createConversation = async () => {
+  try {
+    const response = await api.post('/conversations');
+    return response.data;
+  } catch (error) {
+    console.error('API Error:', error);
+    throw error;
+  }
+};
+
+export const deleteConversation = async (conversationId) => {
+  try {
+    await api.delete(`/conversations/${conversationId}`);
+  } catch (error) {
+    console.error('API Error:', error);
+    throw error;
+  }
+};
+
+/**
+ * Submit a query and consume the Server-Sent Events stream from /query/stream.
+ *
+ * `onEvent(event, data)` is called for every event (stage, stage_1_response,
+ * stage_2_review, stage_2_aggregate, early_exit, stage_3_token, complete, error). Resolves with the payload
+ * of the final "complete" event. With a `conversationId` the query is asked
+ * as the next turn of that server-side conversation.
+ */
+export const streamQuery = async (query, onEvent = () => {}, signal, conversationId) => {
+  const response = await fetch(`${API_URL}/query/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(conversationId ? { query, conversation_id: conversationId } : { query }),
+    signal,
+  });
+
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    const error = new Error(body.detail || `Request failed with status ${response.status}`);
+    error.response = { status: response.status, data: body };
+    throw error;
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+
+  const handleFrame = (frame) => {
+    let event = 'message';
+    const dataLines = [];
+    frame.split('\n').forEach((line) => {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart());
+    });
+    if (dataLines.length === 0) return;
+
+    const data = JSON.parse(dataLines.join('\n'));
+    onEvent(event, data);
+
+    if (event === 'complete') result = data;
+    if (event === 'error') {
+      const error = new Error(data.detail);
+      error.response = { data };
+      throw error;
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      handleFrame(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+    }
+  }
+
+  if (!result) {
+    throw new Error('Stream ended before the council finished');
+  }
+  return result;
+};
+
 export const checkHealth = async () => {
   try {
     const response = await api.get('/health');